@@ -0,0 +1,33 @@
+class AdaptiveSampler:
+    """Pick the sampling step from how the per-frame detections evolve.
+
+    Sampling starts coarse (``coarse_step``, ~2 fps). When the detection
+    state of a sampled frame differs from the previous one, the step drops
+    to ``dense_step`` (~10 fps) and stays there until ``dense_hold`` frames
+    pass without another change; after that it doubles on every sample
+    until it is back at ``coarse_step``.
+    """
+
+    def __init__(self, fps, coarse_step=None, dense_step=None, dense_hold=None):
+        fps = fps if fps and fps > 0 else 30
+        self.coarse_step = coarse_step or max(1, int(round(fps / 2)))
+        self.dense_step = min(dense_step or max(1, int(round(fps / 10))), self.coarse_step)
+        self.dense_hold = dense_hold or max(1, int(round(fps)))
+        self.step = self.coarse_step
+        self._last_state = None
+        self._last_change = None
+
+    def mark_change(self, frame_number):
+        """Switch to dense sampling because something changed at ``frame_number``"""
+        self._last_change = frame_number
+        self.step = self.dense_step
+
+    def update(self, frame_number, state):
+        """Record the detection state of a sampled frame and return the next step"""
+        if self._last_state is not None and state != self._last_state:
+            self.mark_change(frame_number)
+        elif self._last_change is None or frame_number - self._last_change >= self.dense_hold:
+            # Nothing happening: back off towards coarse sampling
+            self.step = min(self.coarse_step, self.step * 2)
+        self._last_state = state
+        return self.step
@@ -0,0 +1,100 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class AnalyzerPool:
+    """Pool of analyzer instances, created lazily up to ``size``.
+
+    MediaPipe graphs in video mode keep tracking state between calls and must
+    not be shared by concurrent analyses, so every in-flight video checks out
+    its own analyzer. Analyzers are reset on checkin, so tracking state never
+    leaks from one video into the next.
+    """
+
+    def __init__(self, factory, size=None):
+        self.factory = factory
+        self.size = max(1, size or os.cpu_count() or 1)
+        self._idle = []  # most recently used last
+        self._created = 0  # includes analyzers still being constructed
+        self._built = 0
+        self._lock = threading.Lock()
+        # Signalled whenever an analyzer goes idle or a pool slot frees up
+        self._changed = threading.Condition(self._lock)
+
+    def checkout(self, timeout=None):
+        """Take an idle analyzer, creating one if the pool isn't full yet.
+
+        Raises ``queue.Empty`` if neither happens within ``timeout`` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            # Wait until an analyzer is idle or there is room to build one;
+            # a discarded or failed analyzer frees its slot for a waiter
+            while not self._idle and self._created >= self.size:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self._changed.wait(remaining)
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+
+        try:
+            analyzer = self.factory()
+        except Exception:
+            self._release_slot()
+            raise
+        with self._lock:
+            self._built += 1
+        return analyzer
+
+    def checkin(self, analyzer):
+        """Reset an analyzer's tracking state and return it to the pool"""
+        try:
+            analyzer.reset()
+        except Exception as e:
+            # A graph that can't be restarted is discarded and rebuilt later
+            print(f"Discarding analyzer after failed reset: {e}")
+            with self._lock:
+                self._built -= 1
+            self._release_slot()
+            return
+        with self._changed:
+            self._idle.append(analyzer)
+            self._changed.notify()
+
+    def _release_slot(self):
+        """Give up a pool slot and let a waiting checkout build a replacement"""
+        with self._changed:
+            self._created -= 1
+            self._changed.notify()
+
+    def warm_up(self, count=1):
+        """Build ``count`` analyzers ahead of the first request"""
+        analyzers = [self.checkout() for _ in range(min(count, self.size))]
+        for analyzer in analyzers:
+            self.checkin(analyzer)
+
+    @contextmanager
+    def analyzer(self, timeout=None):
+        analyzer = self.checkout(timeout=timeout)
+        try:
+            yield analyzer
+        finally:
+            self.checkin(analyzer)
+
+    def stats(self):
+        with self._lock:
+            created = self._created
+            built = self._built
+            idle = len(self._idle)
+        return {
+            'size': self.size,
+            'created': created,
+            'built': built,
+            'idle': idle,
+            'in_use': created - idle
+        }
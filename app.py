@@ -1,20 +1,85 @@
-from flask import Flask, render_template, request, redirect, url_for, send_from_directory, jsonify
+from flask import Flask, Response, render_template, request, redirect, url_for, send_from_directory, jsonify
 import os
+import threading
+import uuid
+from functools import partial
 from werkzeug.utils import secure_filename
 from datetime import datetime
 from video_analyzer import VideoAnalyzer
+from enhanced_analyzer import EnhancedVideoAnalyzer
+from image_batch import find_images
+from analyzer_pool import AnalyzerPool
+from job_queue import JobQueue, QueueFullError
+from result_cache import ResultCache
+from metrics import REGISTRY, format_metric
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max file size
+# Background analysis workers and how many uploads may wait for one
+app.config['ANALYSIS_WORKERS'] = int(os.environ.get('ANALYSIS_WORKERS', os.cpu_count() or 1))
+app.config['ANALYSIS_QUEUE_SIZE'] = int(os.environ.get('ANALYSIS_QUEUE_SIZE', 32))
+# Each worker needs its own analyzer (MediaPipe graphs are not thread-safe)
+app.config['ANALYZER_POOL_SIZE'] = int(os.environ.get('ANALYZER_POOL_SIZE', app.config['ANALYSIS_WORKERS']))
+# Split each video into this many time ranges analyzed on a process pool
+app.config['ANALYSIS_SEGMENTS'] = int(os.environ.get('ANALYSIS_SEGMENTS', 1))
+# Reuse the previous frame's detections when a sampled frame barely changed (unset = off)
+app.config['MOTION_THRESHOLD'] = float(os.environ['MOTION_THRESHOLD']) if os.environ.get('MOTION_THRESHOLD') else None
+# Sample ~2 fps and densify around detection changes instead of a fixed frame skip
+app.config['ADAPTIVE_SAMPLING'] = os.environ.get('ADAPTIVE_SAMPLING', '0') == '1'
+# Downscale wider frames to this width before MediaPipe (unset = native resolution)
+app.config['MAX_PROCESSING_WIDTH'] = int(os.environ['MAX_PROCESSING_WIDTH']) if os.environ.get('MAX_PROCESSING_WIDTH') else None
+# Decode with ffmpeg (select + scale filters) instead of OpenCV when it is installed
+app.config['FFMPEG_DECODE'] = os.environ.get('FFMPEG_DECODE', '0') == '1'
+# Frames decoded ahead on a background thread while MediaPipe runs (0 = decode inline)
+app.config['DECODE_AHEAD'] = int(os.environ.get('DECODE_AHEAD', 0))
+# Run MediaPipe on a crop around the driver, calibrated from the first seconds' landmarks
+app.config['DRIVER_ROI'] = os.environ.get('DRIVER_ROI', '0') == '1'
+# Directory per-frame landmarks are written to for re-scoring with rescore.py (unset = off)
+app.config['LANDMARK_STORE_DIR'] = os.environ.get('LANDMARK_STORE_DIR')
+# Stop reading a video once the rest can't change the verdict (or, with a confidence, very likely won't)
+app.config['EARLY_EXIT'] = os.environ.get('EARLY_EXIT', '0') == '1'
+app.config['EARLY_EXIT_CONFIDENCE'] = float(os.environ['EARLY_EXIT_CONFIDENCE']) if os.environ.get('EARLY_EXIT_CONFIDENCE') else None
+# Image batches: analyzers (MediaPipe graphs + shared model), decoding threads per request and
+# the server directory requests may name instead of uploading files (unset = uploads only)
+app.config['IMAGE_ANALYZER_POOL_SIZE'] = int(os.environ.get('IMAGE_ANALYZER_POOL_SIZE', 1))
+app.config['IMAGE_DECODE_THREADS'] = int(os.environ.get('IMAGE_DECODE_THREADS', 4))
+app.config['IMAGE_DIRECTORY_ROOT'] = os.environ.get('IMAGE_DIRECTORY_ROOT')
+app.config['IMAGE_BATCH_MAX_IMAGES'] = int(os.environ.get('IMAGE_BATCH_MAX_IMAGES', 200))
+# Results of repeated uploads: in-memory LRU plus an optional on-disk tier
+app.config['RESULT_CACHE_SIZE'] = int(os.environ.get('RESULT_CACHE_SIZE', 128))
+app.config['RESULT_CACHE_DIR'] = os.environ.get('RESULT_CACHE_DIR')
+app.config['RESULT_CACHE_MAX_BYTES'] = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+# Analyzers built in the background at startup (0 = build on first upload)
+app.config['ANALYZER_WARMUP'] = int(os.environ.get('ANALYZER_WARMUP', 1))
 
 ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# Initialize video analyzer
-analyzer = VideoAnalyzer()
+# Analyzer settings; together with the analyzer version they key the result cache
+analyzer_options = {
+    'segments': app.config['ANALYSIS_SEGMENTS'],
+    'motion_threshold': app.config['MOTION_THRESHOLD'],
+    'adaptive_sampling': app.config['ADAPTIVE_SAMPLING'],
+    'max_processing_width': app.config['MAX_PROCESSING_WIDTH'],
+    'ffmpeg_decode': app.config['FFMPEG_DECODE'],
+    'decode_ahead': app.config['DECODE_AHEAD'],
+    'driver_roi': app.config['DRIVER_ROI'],
+    'landmark_store': app.config['LANDMARK_STORE_DIR'],
+    'early_exit': app.config['EARLY_EXIT'],
+    'early_exit_confidence': app.config['EARLY_EXIT_CONFIDENCE']
+}
+analyzer_config = dict(analyzer='VideoAnalyzer', version=VideoAnalyzer.VERSION, **analyzer_options)
+
+# Analyzer pools, result cache and job queue, created by init_services(). Not at
+# import time: segment workers are spawned processes that re-import this module
+analyzer_pool = None
+image_analyzer_pool = None
+result_cache = None
+jobs = None
+services_lock = threading.Lock()
 
 def analyze_video(filename):
     """Analyze video for distracted driving behaviors using computer vision"""
@@ -22,7 +87,8 @@ def analyze_video(filename):
     
     try:
         # Perform real video analysis
-        analysis_result = analyzer.analyze_video(video_path)
+        with analyzer_pool.analyzer() as analyzer:
+            analysis_result = analyzer.analyze_video(video_path)
         analysis_result['analyzed_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         return analysis_result
     except Exception as e:
@@ -39,6 +105,71 @@ def analyze_video(filename):
             'analyzed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
 
+warmup_state = {'status': 'pending', 'error': None}
+
+def warm_up_analyzers():
+    """Build analyzers (MediaPipe graphs) off the request path"""
+    warmup_state['status'] = 'warming'
+    try:
+        analyzer_pool.warm_up(app.config['ANALYZER_WARMUP'])
+        warmup_state['status'] = 'ready'
+    except Exception as e:
+        warmup_state['status'] = 'failed'
+        warmup_state['error'] = str(e)
+
+def run_analysis_job(job, filepath, cache_key=None):
+    """Analyze an uploaded video on a background worker"""
+    try:
+        with analyzer_pool.analyzer() as analyzer:
+            analysis_result = analyzer.analyze_video(filepath, progress_callback=job.update_progress)
+        analysis_result['analyzed_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if cache_key is not None:
+            result_cache.put(cache_key, analysis_result)
+        analysis_result['filename'] = job.filename
+        return analysis_result
+    finally:
+        # Delete the video after analysis to avoid saving previous videos
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
+def init_services():
+    """Create the analyzer pools, result cache and job queue and start the warm-up (once)"""
+    global analyzer_pool, image_analyzer_pool, result_cache, jobs
+    with services_lock:
+        if jobs is not None:
+            return
+        # Analyzers are created on demand, one per concurrent analysis
+        analyzer_pool = AnalyzerPool(
+            partial(VideoAnalyzer, **analyzer_options),
+            size=app.config['ANALYZER_POOL_SIZE']
+        )
+        # Built on the first image request; loading the model takes a while
+        image_analyzer_pool = AnalyzerPool(EnhancedVideoAnalyzer, size=app.config['IMAGE_ANALYZER_POOL_SIZE'])
+        result_cache = ResultCache(
+            max_entries=app.config['RESULT_CACHE_SIZE'],
+            cache_dir=app.config['RESULT_CACHE_DIR'],
+            max_disk_bytes=app.config['RESULT_CACHE_MAX_BYTES']
+        )
+        jobs = JobQueue(
+            run_analysis_job,
+            workers=app.config['ANALYSIS_WORKERS'],
+            max_pending=app.config['ANALYSIS_QUEUE_SIZE']
+        )
+        if app.config['ANALYZER_WARMUP'] > 0:
+            threading.Thread(target=warm_up_analyzers, name='analyzer-warmup', daemon=True).start()
+        else:
+            # Analyzers are built by the first upload, which /ready must let through
+            warmup_state['status'] = 'disabled'
+
+@app.before_request
+def ensure_services():
+    # Servers other than `python app.py` (flask run, gunicorn) start them on the first request
+    init_services()
+
+def wants_json():
+    best = request.accept_mimetypes.best_match(['application/json', 'text/html'])
+    return best == 'application/json'
+
 @app.route('/')
 def dashboard():
     # Don't list or analyze previous videos to avoid shuffling
@@ -57,22 +188,129 @@ def upload_video():
         os.makedirs(app.config['UPLOAD_FOLDER'])
 
     filename = secure_filename(file.filename)
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    # Prefix stored uploads so concurrent jobs with the same name don't collide
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], f'{uuid.uuid4().hex}_{filename}')
     file.save(filepath)
 
-    # Analyze immediately and show result
+    # Same bytes analyzed with the same settings: answer from the cache
+    cache_key = ResultCache.make_key(filepath, analyzer_config)
+    cached_result = result_cache.get(cache_key)
+    if cached_result is not None:
+        os.remove(filepath)
+        cached_result['filename'] = filename
+        cached_result['cached'] = True
+        if wants_json():
+            return jsonify({'status': 'done', 'cached': True, 'result': cached_result})
+        return render_template('dashboard.html', result=cached_result, videos=[])
+
+    # Queue the analysis and answer right away
     try:
-        analysis_result = analyzer.analyze_video(filepath)
-        analysis_result['analyzed_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        analysis_result['filename'] = filename
-        # Delete the video after analysis to avoid saving previous videos
+        job = jobs.submit(filename, filepath, cache_key)
+    except QueueFullError as e:
         os.remove(filepath)
-        return render_template('dashboard.html', result=analysis_result, videos=[])
-    except Exception as e:
-        # Also delete on error
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        if wants_json():
+            return jsonify({'error': f'Analysis queue is full ({e}). Please retry later.'}), 503
+        return redirect(url_for('dashboard'))
+
+    if wants_json():
+        return jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': url_for('job_status', job_id=job.id)
+        }), 202
+    return redirect(url_for('job_page', job_id=job.id))
+
+def requested_image_directory():
+    """Directory named in the request, if it lies inside IMAGE_DIRECTORY_ROOT"""
+    body = request.get_json(silent=True) or {}
+    directory = body.get('directory') or request.form.get('directory')
+    root = app.config['IMAGE_DIRECTORY_ROOT']
+    if not directory:
+        return None
+    if not root:
+        raise PermissionError('Directory analysis is disabled (IMAGE_DIRECTORY_ROOT is not set)')
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(root, directory))
+    if os.path.commonpath([root, path]) != root or not os.path.isdir(path):
+        raise PermissionError(f'Not a directory under IMAGE_DIRECTORY_ROOT: {directory}')
+    return path
+
+@app.route('/images', methods=['POST'])
+def analyze_images():
+    """Analyze a batch of images: uploaded as 'files' or a 'directory' under IMAGE_DIRECTORY_ROOT"""
+    try:
+        directory = requested_image_directory()
+    except PermissionError as e:
+        return jsonify({'error': str(e)}), 403
+    if directory is not None:
+        images = find_images(directory)
+    else:
+        images = request.files.getlist('files') + request.files.getlist('file')
+    if not images:
+        return jsonify({'error': "No images: upload them as 'files' or name a 'directory'"}), 400
+    max_images = app.config['IMAGE_BATCH_MAX_IMAGES']
+    if len(images) > max_images:
+        return jsonify({'error': f'Too many images ({len(images)}); send at most {max_images} per request'}), 413
+    if directory is None:
+        images = [(secure_filename(file.filename) or 'image', file.read()) for file in images]
+
+    with image_analyzer_pool.analyzer() as analyzer:
+        batch_result = analyzer.analyze_images(images, decode_threads=app.config['IMAGE_DECODE_THREADS'])
+    if directory is not None:
+        # Name images the way the request named the directory, not by their server path
+        root = os.path.realpath(app.config['IMAGE_DIRECTORY_ROOT'])
+        for result in batch_result['results']:
+            result['image'] = os.path.relpath(result['image'], root)
+    batch_result['analyzed_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return jsonify(batch_result)
+
+@app.route('/jobs')
+def job_queue_stats():
+    stats = jobs.stats()
+    stats['analyzers'] = analyzer_pool.stats()
+    return jsonify(stats)
+
+@app.route('/ready')
+def readiness():
+    pool_stats = analyzer_pool.stats()
+    ready = pool_stats['built'] > 0 or warmup_state['status'] == 'disabled'
+    body = {'ready': ready, 'warmup': warmup_state, 'analyzers': pool_stats}
+    return jsonify(body), 200 if ready else 503
+
+@app.route('/metrics')
+def metrics():
+    queue_stats = jobs.stats()
+    pool_stats = analyzer_pool.stats()
+    cache = result_cache.stats()
+    body = REGISTRY.render_prometheus()
+    body += format_metric('driving_analysis_jobs_queued', queue_stats['queued'], 'Jobs waiting for a worker.')
+    body += format_metric('driving_analysis_jobs_running', queue_stats['running'], 'Jobs being analyzed.')
+    body += format_metric('driving_analysis_analyzers_in_use', pool_stats['in_use'], 'Analyzers checked out of the pool.')
+    body += format_metric('driving_analysis_cache_hits_total', cache['hits'], 'Result cache hits.', 'counter')
+    body += format_metric('driving_analysis_cache_misses_total', cache['misses'], 'Result cache misses.', 'counter')
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+@app.route('/cache')
+def cache_stats():
+    return jsonify(result_cache.stats())
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/view')
+def job_page(job_id):
+    job = jobs.get(job_id)
+    if job is None:
         return redirect(url_for('dashboard'))
+    if job.status == 'failed':
+        return render_template('dashboard.html', failed_job=job.to_dict(), videos=[])
+    if job.status == 'done':
+        return render_template('dashboard.html', result=job.result, videos=[])
+    return render_template('dashboard.html', job=job.to_dict(), videos=[])
 
 @app.route('/video/<filename>')
 def serve_video(filename):
@@ -83,4 +321,5 @@ def serve_temp(filename):
     return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
 
 if __name__ == '__main__':
+    init_services()
     app.run(debug=True)
\ No newline at end of file
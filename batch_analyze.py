@@ -0,0 +1,273 @@
+"""Analyze many videos in parallel and write one JSON line per video.
+
+    python batch_analyze.py /data/trips --output results.jsonl --workers 8 --timeout 600
+    python batch_analyze.py "/data/trips/2024-*/*.mp4" --output results.jsonl
+
+Each worker process builds one analyzer and reuses it for every video it
+gets. Videos already present in the output file are skipped, so an
+interrupted run continues where it stopped. A video that takes longer
+than ``--timeout`` seconds gets its worker terminated and replaced and is
+recorded with status ``timeout``. Workers that keep dying before they
+analyze anything (e.g. the analyzer crashes in native code) fail the batch.
+Paths are recorded and compared as absolute paths, so a resumed run may
+name the videos differently (relative path, other glob).
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from datetime import datetime
+
+VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv'}
+# Workers that may die in a row without finishing a video before the batch is given up
+MAX_STARTUP_FAILURES = 3
+
+
+def find_videos(inputs):
+    """Expand directories (recursively) and glob patterns into a sorted list of absolute video paths"""
+    paths = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                for name in files:
+                    if name.rsplit('.', 1)[-1].lower() in VIDEO_EXTENSIONS:
+                        paths.add(os.path.abspath(os.path.join(root, name)))
+        else:
+            paths.update(os.path.abspath(path) for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return sorted(paths)
+
+
+def read_done(output_path, retry_failed=False):
+    """Absolute paths that already have a record in the output file"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by an interrupted run; that video is redone
+                continue
+            if retry_failed and record.get('status') != 'ok':
+                continue
+            done.add(os.path.abspath(record['path']))
+    return done
+
+
+def _build_analyzer(name, options):
+    if name == 'enhanced':
+        from enhanced_analyzer import EnhancedVideoAnalyzer
+        return EnhancedVideoAnalyzer(**options)
+    from video_analyzer import VideoAnalyzer
+    return VideoAnalyzer(**options)
+
+
+def _worker_main(worker_id, tasks, results, analyzer_name, options):
+    # Analyzer log output would interleave with the progress lines
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        analyzer = _build_analyzer(analyzer_name, options)
+    except Exception as e:
+        results.put((worker_id, None, {'error': f'Could not build analyzer: {e}'}))
+        return
+    results.put((worker_id, None, None))  # ready
+
+    while True:
+        path = tasks.get()
+        if path is None:
+            return
+        start = time.perf_counter()
+        try:
+            result = analyzer.analyze_video(path)
+            record = {'status': 'ok', 'result': result}
+        except Exception as e:
+            record = {'status': 'error', 'error': f'{type(e).__name__}: {e}'}
+        finally:
+            try:
+                analyzer.reset()
+            except Exception:
+                pass
+        record['elapsed_s'] = round(time.perf_counter() - start, 3)
+        results.put((worker_id, path, record))
+
+
+class _Worker:
+    def __init__(self, ctx, worker_id, results, analyzer_name, options):
+        self.id = worker_id
+        self.tasks = ctx.Queue()
+        self.process = ctx.Process(
+            target=_worker_main, args=(worker_id, self.tasks, results, analyzer_name, options), daemon=True
+        )
+        self.process.start()
+        self.ready = False
+        self.path = None
+        self.started = None
+
+    def assign(self, path):
+        self.path = path
+        self.started = time.monotonic()
+        self.tasks.put(path)
+
+    def stop(self):
+        self.tasks.put(None)
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(5)
+
+
+def run_batch(paths, output_path, workers=None, timeout=None, analyzer_name='video', options=None,
+              max_startup_failures=MAX_STARTUP_FAILURES):
+    """Analyze ``paths`` on ``workers`` processes, appending a JSON line per video to ``output_path``"""
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    options = options or {}
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+    pending = list(reversed(paths))
+    summary = {'ok': 0, 'error': 0, 'timeout': 0}
+    next_id = 0
+    pool = {}
+    startup_failures = 0  # workers that died in a row while idle or starting up
+
+    def start_worker():
+        nonlocal next_id
+        worker = _Worker(ctx, next_id, results, analyzer_name, options)
+        pool[worker.id] = worker
+        next_id += 1
+
+    # Never cut a half-written last line onto the next record
+    if os.path.exists(output_path) and os.path.getsize(output_path):
+        with open(output_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+    else:
+        needs_newline = False
+
+    with open(output_path, 'a', encoding='utf-8') as out:
+        if needs_newline:
+            out.write('\n')
+
+        def write(path, record):
+            record = dict(path=os.path.abspath(path), analyzed_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'), **record)
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+            summary[record['status']] += 1
+            done = sum(summary.values())
+            print(f"[{done}/{len(paths)}] {record['status']:<7} {record['elapsed_s']:>8.1f}s  {path}", file=sys.stderr)
+
+        for _ in range(workers):
+            start_worker()
+
+        try:
+            while pending or any(worker.path for worker in pool.values()):
+                for worker in pool.values():
+                    if worker.ready and worker.path is None and pending:
+                        worker.assign(pending.pop())
+
+                try:
+                    worker_id, path, record = results.get(timeout=0.5)
+                except queue.Empty:
+                    worker_id = None
+                if worker_id is not None and worker_id in pool:
+                    worker = pool[worker_id]
+                    if path is None and record is not None:
+                        # The analyzer can't even be built; nothing will get analyzed
+                        raise RuntimeError(record['error'])
+                    if path is None:
+                        worker.ready = True
+                    elif path == worker.path:
+                        worker.path = None
+                        startup_failures = 0
+                        write(path, record)
+
+                now = time.monotonic()
+                for worker in list(pool.values()):
+                    if worker.path is None:
+                        if not worker.process.is_alive():
+                            # Died while idle or starting up (e.g. a crash in native code)
+                            del pool[worker.id]
+                            startup_failures += 1
+                            if startup_failures >= max_startup_failures:
+                                raise RuntimeError(
+                                    f'{startup_failures} workers in a row died before analyzing a video '
+                                    f'(last exit code {worker.process.exitcode})'
+                                )
+                            if pending:
+                                start_worker()
+                        continue
+                    if timeout and now - worker.started > timeout:
+                        record = {'status': 'timeout', 'error': f'No result after {timeout}s', 'elapsed_s': round(now - worker.started, 3)}
+                    elif not worker.process.is_alive():
+                        record = {'status': 'error', 'error': f'Worker exited with code {worker.process.exitcode}',
+                                  'elapsed_s': round(now - worker.started, 3)}
+                    else:
+                        continue
+                    worker.kill()
+                    del pool[worker.id]
+                    write(worker.path, record)
+                    if pending:
+                        start_worker()
+        finally:
+            for worker in pool.values():
+                worker.stop()
+            for worker in pool.values():
+                worker.process.join(5)
+                if worker.process.is_alive():
+                    worker.kill()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analyze a directory or glob of videos into a JSONL file')
+    parser.add_argument('inputs', nargs='+', help='directories (searched recursively) or glob patterns')
+    parser.add_argument('--output', required=True, help='JSONL file results are appended to')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes (one analyzer each)')
+    parser.add_argument('--timeout', type=float, default=None, help='seconds allowed per video')
+    parser.add_argument('--analyzer', choices=['video', 'enhanced'], default='video')
+    parser.add_argument('--retry-failed', action='store_true', help='redo videos recorded as error or timeout')
+    parser.add_argument('--motion-threshold', type=float, default=None)
+    parser.add_argument('--adaptive-sampling', action='store_true')
+    parser.add_argument('--max-processing-width', type=int, default=None)
+    parser.add_argument('--ffmpeg', action='store_true', help='decode with ffmpeg when it is installed')
+    parser.add_argument('--decode-ahead', type=int, default=0)
+    parser.add_argument('--driver-roi', action='store_true', help='run MediaPipe on a calibrated crop around the driver')
+    parser.add_argument('--landmark-store', default=None, help='directory to store per-frame landmarks in for rescore.py')
+    parser.add_argument('--early-exit', action='store_true', help='stop each video once the rest cannot change the verdict')
+    parser.add_argument('--early-exit-confidence', type=float, default=None,
+                        help='with --early-exit, stop once the verdict holds at this confidence (e.g. 0.95)')
+    args = parser.parse_args(argv)
+
+    options = {
+        'motion_threshold': args.motion_threshold,
+        'adaptive_sampling': args.adaptive_sampling,
+        'max_processing_width': args.max_processing_width,
+        'ffmpeg_decode': args.ffmpeg,
+        'decode_ahead': args.decode_ahead,
+        'driver_roi': args.driver_roi,
+        'landmark_store': args.landmark_store,
+        'early_exit': args.early_exit,
+        'early_exit_confidence': args.early_exit_confidence
+    }
+
+    videos = find_videos(args.inputs)
+    done = read_done(args.output, args.retry_failed)
+    todo = [path for path in videos if path not in done]
+    print(f'{len(videos)} videos found, {len(videos) - len(todo)} already in {args.output}', file=sys.stderr)
+    if not todo:
+        return 0
+
+    start = time.perf_counter()
+    summary = run_batch(todo, args.output, args.workers, args.timeout, args.analyzer, options)
+    wall = time.perf_counter() - start
+    print(f"Done in {wall:.1f}s: {summary['ok']} ok, {summary['error']} errors, {summary['timeout']} timeouts",
+          file=sys.stderr)
+    return 0 if summary['ok'] == len(todo) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""Reproducible benchmarks for the video analyzers on synthetic driving videos.
+
+Generates test videos locally, runs every analyzer on each of them in a
+fresh process and writes frames/sec, per-stage time, peak RSS and wall
+time as JSON. A saved report can be used as a baseline:
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --compare baseline.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+ANALYZERS = ['video', 'enhanced', 'enhanced-stub']
+
+
+class StubModel:
+    """Stands in for driver_model.h5 with a fixed, cheap prediction"""
+
+    def __init__(self, input_size=150, classes=10):
+        self.input_shape = (None, input_size, input_size, 3)
+        self.output_shape = (None, classes)
+        self._prediction = np.full(classes, 1.0 / classes, dtype=np.float32)
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        return np.tile(self._prediction, (len(batch), 1))
+
+
+def generate_video(path, width, height, seconds, fps, seed=0):
+    """Write a synthetic dashcam-like clip: cabin background, a head and a moving hand"""
+    rng = np.random.default_rng(seed)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f'Could not open video writer for {path}')
+
+    background = np.empty((height, width, 3), dtype=np.uint8)
+    background[:] = (60, 55, 50)
+    cv2.rectangle(background, (0, int(height * 0.7)), (width, height), (35, 35, 35), -1)
+    noise = rng.integers(0, 12, size=(height, width, 3), dtype=np.uint8)
+    background = cv2.add(background, noise)
+
+    head = (int(width * 0.35), int(height * 0.35))
+    axes = (int(width * 0.07), int(height * 0.16))
+    for i in range(int(seconds * fps)):
+        frame = background.copy()
+        t = i / fps
+        # Head turns a little, hand moves between wheel, face and dashboard
+        offset = int(np.sin(t * 0.7) * width * 0.02)
+        cv2.ellipse(frame, (head[0] + offset, head[1]), axes, 0, 0, 360, (150, 170, 200), -1)
+        for dx in (-0.025, 0.025):
+            eye = (int(head[0] + offset + dx * width), int(head[1] - axes[1] * 0.2))
+            cv2.circle(frame, eye, max(2, width // 200), (40, 30, 30), -1)
+        hand = (int(width * (0.45 + 0.15 * np.sin(t * 0.5))), int(height * (0.6 + 0.15 * np.cos(t * 0.3))))
+        cv2.circle(frame, hand, max(6, width // 40), (140, 160, 190), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def video_cases(resolutions, lengths, fps_values):
+    for width, height in resolutions:
+        for seconds in lengths:
+            for fps in fps_values:
+                yield {'width': width, 'height': height, 'seconds': seconds, 'fps': fps}
+
+
+def _build_analyzer(name):
+    if name == 'video':
+        from video_analyzer import VideoAnalyzer
+        return VideoAnalyzer()
+    from enhanced_analyzer import EnhancedVideoAnalyzer
+    analyzer = EnhancedVideoAnalyzer()
+    # Benchmarks never depend on whichever model file happens to be around
+    analyzer.driver_model = StubModel() if name == 'enhanced-stub' else None
+    return analyzer
+
+
+def _run_case(analyzer_name, video_path, result_queue):
+    import resource
+    # Keep analyzer log output out of the JSON report on stdout
+    sys.stdout = sys.stderr
+    try:
+        start = time.perf_counter()
+        analyzer = _build_analyzer(analyzer_name)
+        setup_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = analyzer.analyze_video(video_path)
+        wall_s = time.perf_counter() - start
+
+        stats = result.get('stats', {})
+        timings = stats.get('timings', {})
+        frames_analyzed = timings.get('counters', {}).get('frames_analyzed', 0)
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == 'darwin' else peak_rss / 1024
+
+        result_queue.put({
+            'setup_s': round(setup_s, 3),
+            'wall_s': round(wall_s, 3),
+            'frames_analyzed': frames_analyzed,
+            'analyzed_fps': round(frames_analyzed / wall_s, 2) if wall_s > 0 else 0.0,
+            'peak_rss_mb': round(peak_rss_mb, 1),
+            'stages_ms': {name: stage['total_ms'] for name, stage in timings.get('stages', {}).items()},
+            'counters': timings.get('counters', {}),
+            'behaviors': result.get('behaviors', [])
+        })
+    except Exception as e:
+        result_queue.put({'error': f'{type(e).__name__}: {e}'})
+
+
+def run_case(analyzer_name, video_path, timeout=None):
+    """Run one analyzer on one video in a fresh process (isolates peak RSS and warm-up).
+
+    A child that crashes (e.g. a segfault in MediaPipe or TF) or runs past
+    ``timeout`` seconds is recorded as an ``error`` instead of hanging the
+    benchmark.
+    """
+    ctx = multiprocessing.get_context('spawn')
+    result_queue = ctx.Queue()
+    process = ctx.Process(target=_run_case, args=(analyzer_name, video_path, result_queue))
+    process.start()
+    deadline = time.monotonic() + timeout if timeout else None
+    result = None
+    while result is None:
+        try:
+            result = result_queue.get(timeout=1.0)
+        except queue.Empty:
+            if not process.is_alive():
+                # It may have put its result just before exiting
+                try:
+                    result = result_queue.get(timeout=1.0)
+                except queue.Empty:
+                    result = {'error': f'benchmark process exited with code {process.exitcode}'}
+            elif deadline is not None and time.monotonic() > deadline:
+                process.terminate()
+                result = {'error': f'timed out after {timeout} s'}
+    process.join()
+    return result
+
+
+def run_benchmarks(args):
+    video_dir = args.video_dir or os.path.join(tempfile.gettempdir(), 'driving_benchmark_videos')
+    os.makedirs(video_dir, exist_ok=True)
+
+    report = {
+        'meta': {
+            'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'opencv': cv2.__version__,
+            'repeat': args.repeat
+        },
+        'cases': []
+    }
+
+    for case in video_cases(args.resolutions, args.seconds, args.fps):
+        name = f"{case['width']}x{case['height']}_{case['seconds']}s_{case['fps']}fps"
+        video_path = os.path.join(video_dir, f'{name}.mp4')
+        if not os.path.exists(video_path):
+            print(f'Generating {video_path}', file=sys.stderr)
+            generate_video(video_path, case['width'], case['height'], case['seconds'], case['fps'])
+
+        for analyzer_name in args.analyzers:
+            runs = [run_case(analyzer_name, video_path, args.timeout) for _ in range(args.repeat)]
+            failed = [run for run in runs if 'error' in run]
+            if failed:
+                entry = dict(case, id=f'{analyzer_name}/{name}', analyzer=analyzer_name, error=failed[0]['error'])
+            else:
+                # Report the fastest run; it is the least disturbed by noise
+                best = min(runs, key=lambda run: run['wall_s'])
+                entry = dict(case, id=f'{analyzer_name}/{name}', analyzer=analyzer_name, **best)
+                entry['video_frames'] = case['seconds'] * case['fps']
+                entry['video_fps'] = round(entry['video_frames'] / best['wall_s'], 2) if best['wall_s'] > 0 else 0.0
+            report['cases'].append(entry)
+            print(f"{entry['id']}: {entry.get('wall_s', 'error')} s", file=sys.stderr)
+    return report
+
+
+def compare_reports(current, baseline, threshold):
+    """Print a comparison table and return the ids of cases that regressed"""
+    baseline_cases = {case['id']: case for case in baseline['cases']}
+    regressions = []
+    out = sys.stderr
+    print(f"{'case':<40} {'baseline s':>11} {'current s':>10} {'change':>8}", file=out)
+    for case in current['cases']:
+        base = baseline_cases.get(case['id'])
+        if base is None or 'wall_s' not in base or 'wall_s' not in case:
+            print(f"{case['id']:<40} {'-':>11} {case.get('wall_s', 'error'):>10}", file=out)
+            continue
+        change = (case['wall_s'] - base['wall_s']) / base['wall_s'] * 100 if base['wall_s'] else 0.0
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(case['id'])
+        print(f"{case['id']:<40} {base['wall_s']:>11.3f} {case['wall_s']:>10.3f} {change:>+7.1f}%{flag}", file=out)
+    return regressions
+
+
+def _resolution(value):
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the driving video analyzers on synthetic videos')
+    parser.add_argument('--resolutions', type=lambda v: [_resolution(r) for r in v.split(',')],
+                        default=[(640, 360), (1280, 720), (1920, 1080)], help='e.g. 640x360,1280x720')
+    parser.add_argument('--seconds', type=lambda v: [int(s) for s in v.split(',')], default=[10],
+                        help='video lengths in seconds, e.g. 10,30')
+    parser.add_argument('--fps', type=lambda v: [int(f) for f in v.split(',')], default=[30],
+                        help='video frame rates, e.g. 15,30')
+    parser.add_argument('--analyzers', type=lambda v: v.split(','), default=ANALYZERS,
+                        help=f"comma separated subset of {','.join(ANALYZERS)}")
+    parser.add_argument('--repeat', type=int, default=1, help='runs per case (fastest is reported)')
+    parser.add_argument('--timeout', type=float, default=1800,
+                        help='seconds before a run is stopped and reported as failed (0 = no limit)')
+    parser.add_argument('--video-dir', help='where synthetic videos are generated and reused')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--compare', help='baseline JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='wall time increase (percent) reported as a regression')
+    args = parser.parse_args(argv)
+
+    unknown = set(args.analyzers) - set(ANALYZERS)
+    if unknown:
+        parser.error(f"unknown analyzers: {', '.join(sorted(unknown))}")
+
+    report = run_benchmarks(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} case(s) slower than the baseline by more than {args.threshold}%', file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
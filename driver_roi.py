@@ -0,0 +1,131 @@
+import numpy as np
+
+
+class DriverROI:
+    """Find the part of the frame the driver occupies and crop MediaPipe input to it.
+
+    The first ``calibration_frames`` analyzed frames run on the full frame;
+    the face and hand landmarks seen there (5th-95th percentile of their
+    extents, so a stray detection doesn't blow up the box), together with
+    ``watch_regions`` (normalized ``(x0, y0, x1, y1)`` areas the heuristics
+    look at, such as the radio region), padded by ``margin`` give the ROI.
+    Later frames are cropped to it. Landmarks found in a crop are mapped
+    back to full-frame coordinates in place, so detection code is unaware
+    of the crop.
+
+    The ROI grows when landmarks touch its edge, and calibration restarts
+    when the face is lost for ``lost_frames`` frames in a row and every
+    ``recheck_every`` frames, in case the camera or driver moved.
+    """
+
+    EDGE = 0.02
+
+    def __init__(self, watch_regions=(), calibration_frames=30, recheck_every=300, margin=0.15,
+                 lost_frames=10, min_detections=5):
+        self.watch_regions = list(watch_regions)
+        self.calibration_frames = calibration_frames
+        self.recheck_every = recheck_every
+        self.margin = margin
+        self.lost_frames = lost_frames
+        self.min_detections = min_detections
+        self.calibrations = 0
+        self.reset()
+
+    def reset(self):
+        self.box = None  # normalized (x0, y0, x1, y1) once calibrated
+        self._boxes = []
+        self._seen = 0
+        self._since_calibration = 0
+        self._lost = 0
+
+    def crop_box(self, frame_shape):
+        """Pixel ``(x0, y0, x1, y1)`` to crop the next frame to, or None for the full frame"""
+        if self.box is None:
+            return None
+        h, w = frame_shape[:2]
+        x0, y0, x1, y1 = self.box
+        box = (int(x0 * w), int(y0 * h), int(np.ceil(x1 * w)), int(np.ceil(y1 * h)))
+        if box == (0, 0, w, h):
+            return None
+        return box
+
+    def observe(self, hand_results, face_results, crop_box, frame_shape):
+        """Map a frame's landmarks to full-frame coordinates and update the ROI"""
+        landmark_lists = list(face_results.multi_face_landmarks or []) + list(hand_results.multi_hand_landmarks or [])
+        touches_edge = False
+        if crop_box is not None:
+            touches_edge = any(self._near_edge(landmarks) for landmarks in landmark_lists)
+            self._map_to_frame(landmark_lists, crop_box, frame_shape)
+        boxes = [self._extent(landmarks) for landmarks in landmark_lists]
+
+        if self.box is None:
+            self._calibrate(boxes, face_results)
+            return
+
+        self._since_calibration += 1
+        self._lost = 0 if face_results.multi_face_landmarks else self._lost + 1
+        if self._lost >= self.lost_frames or self._since_calibration >= self.recheck_every:
+            self.reset()
+        elif touches_edge:
+            # Something reached outside the ROI; grow it to keep the whole hand/face
+            self.box = self._pad(self._union([self.box] + boxes))
+
+    def _calibrate(self, boxes, face_results):
+        self._seen += 1
+        if face_results.multi_face_landmarks:
+            self._boxes.extend(boxes)
+        if self._seen < self.calibration_frames:
+            return
+        if len(self._boxes) >= self.min_detections:
+            extents = np.array(self._boxes)
+            landmarks_box = (
+                np.percentile(extents[:, 0], 5), np.percentile(extents[:, 1], 5),
+                np.percentile(extents[:, 2], 95), np.percentile(extents[:, 3], 95)
+            )
+            self.box = self._pad(self._union([landmarks_box] + self.watch_regions))
+            self.calibrations += 1
+        # Not enough detections stays on the full frame and tries again
+        self._boxes = []
+        self._seen = 0
+        self._since_calibration = 0
+        self._lost = 0
+
+    def _pad(self, box):
+        x0, y0, x1, y1 = box
+        pad_x = (x1 - x0) * self.margin
+        pad_y = (y1 - y0) * self.margin
+        return (max(0.0, x0 - pad_x), max(0.0, y0 - pad_y), min(1.0, x1 + pad_x), min(1.0, y1 + pad_y))
+
+    @staticmethod
+    def _union(boxes):
+        return (
+            min(box[0] for box in boxes), min(box[1] for box in boxes),
+            max(box[2] for box in boxes), max(box[3] for box in boxes)
+        )
+
+    @staticmethod
+    def _extent(landmarks):
+        xs = [lm.x for lm in landmarks.landmark]
+        ys = [lm.y for lm in landmarks.landmark]
+        return (min(xs), min(ys), max(xs), max(ys))
+
+    @classmethod
+    def _near_edge(cls, landmarks):
+        return any(
+            lm.x < cls.EDGE or lm.x > 1 - cls.EDGE or lm.y < cls.EDGE or lm.y > 1 - cls.EDGE
+            for lm in landmarks.landmark
+        )
+
+    @staticmethod
+    def _map_to_frame(landmark_lists, crop_box, frame_shape):
+        """Turn crop-normalized landmarks into frame-normalized ones, in place"""
+        h, w = frame_shape[:2]
+        x0, y0, x1, y1 = crop_box
+        scale_x, scale_y = (x1 - x0) / w, (y1 - y0) / h
+        offset_x, offset_y = x0 / w, y0 / h
+        for landmarks in landmark_lists:
+            for lm in landmarks.landmark:
+                lm.x = lm.x * scale_x + offset_x
+                lm.y = lm.y * scale_y + offset_y
+                # z is on the same scale as x
+                lm.z = lm.z * scale_x
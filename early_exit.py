@@ -0,0 +1,73 @@
+import itertools
+from statistics import NormalDist
+
+
+class EarlyExit:
+    """Decides when the rest of a video can no longer change the verdict.
+
+    Every counter (phone frames, radio frames, ...) that ends up compared
+    against a threshold can still grow by at most the weight of the frames
+    not analyzed yet. The verdict is settled when ``verdict(counts, total)``
+    comes out the same at every corner of that box of possible final
+    counts; the analyzers' verdicts only compare each counter's rate with
+    fixed thresholds, so agreeing corners mean every point in between
+    agrees as well.
+
+    With ``confidence`` (e.g. 0.95) the remaining frames are assumed to
+    look like the analyzed ones: each counter's rate over the rest of the
+    video is taken from its Wilson score interval at that confidence
+    instead of anywhere between 0 and 1. This stops much earlier but can,
+    rarely, stop on a verdict the full video would not give.
+    """
+
+    def __init__(self, confidence=None, check_every=10, min_samples=30):
+        self.confidence = confidence
+        # Verdicts are only re-evaluated every this many samples
+        self.check_every = check_every
+        # The confidence bound needs a few samples before its intervals mean anything
+        self.min_samples = min_samples
+        self._z = NormalDist().inv_cdf((1 + confidence) / 2) if confidence else None
+        # Frame number the analysis stopped at, None while it hasn't
+        self.stopped_at = None
+
+    @property
+    def mode(self):
+        return f'confidence {self.confidence}' if self.confidence else 'exact'
+
+    def due(self, samples):
+        return samples % self.check_every == 0
+
+    def final_range(self, count, seen, remaining, samples=None):
+        """Lowest and highest final value of a counter at ``count`` after ``seen`` of ``seen + remaining`` weight.
+
+        ``samples`` is the number of analyzed frames behind ``seen`` when
+        they are weighted (adaptive sampling); the interval width depends
+        on it, not on the weight.
+        """
+        samples = samples or seen
+        if self._z is None or samples < self.min_samples:
+            return count, count + remaining
+        low, high = self._wilson(min(1.0, count / seen), samples)
+        return count + low * remaining, count + high * remaining
+
+    def _wilson(self, rate, n):
+        z2 = self._z ** 2
+        center = (rate + z2 / (2 * n)) / (1 + z2 / n)
+        spread = self._z * (rate * (1 - rate) / n + z2 / (4 * n * n)) ** 0.5 / (1 + z2 / n)
+        return max(0.0, center - spread), min(1.0, center + spread)
+
+    def settled(self, verdict, counts, seen, remaining, samples=None):
+        """Whether ``verdict(final_counts, seen + remaining)`` is the same for every reachable final count"""
+        if remaining <= 0:
+            return True
+        names = list(counts)
+        ranges = [self.final_range(counts[name], seen, remaining, samples) for name in names]
+        total = seen + remaining
+        outcome = None
+        for corner in itertools.product(*ranges):
+            corner_outcome = verdict(dict(zip(names, corner)), total)
+            if outcome is None:
+                outcome = corner_outcome
+            elif corner_outcome != outcome:
+                return False
+        return True
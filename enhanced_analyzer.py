@@ -1,17 +1,46 @@
 import cv2
 import numpy as np
-import mediapipe as mp
+import importlib.util
 import os
-try:
-    import tensorflow as tf
-    from tensorflow import keras
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from frame_source import open_frame_reader
+from metrics import REGISTRY, StageTimings
+from motion_gate import MotionGate
+from adaptive_sampling import AdaptiveSampler
+from model_registry import MODEL_REGISTRY, compile_inference_fn
+from frame_preprocessor import FramePreprocessor
+from driver_roi import DriverROI
+from early_exit import EarlyExit
+from image_batch import decode_images
+from landmark_store import (LandmarkRecorder, landmark_arrays, write_store, NOSE_TIP, LEFT_EYE, RIGHT_EYE,
+                            MIDDLE_BASE)
+
+# TensorFlow and MediaPipe are only imported once an analyzer is built,
+# so importing this module stays cheap
+TF_AVAILABLE = importlib.util.find_spec('tensorflow') is not None
+
+MODEL_PATHS = ['driver_model.h5', 'driver_model_updated.h5']
 
 class EnhancedVideoAnalyzer:
-    def __init__(self):
+    # Bump when detection logic changes so cached results are not reused
+    VERSION = 1
+    # Frame areas the heuristics look at, always kept inside the driver ROI
+    ROI_WATCH_REGIONS = [(0.3, 0.4, 0.7, 0.8)]  # center/radio region
+    # Actual model classes (State Farm dataset)
+    BEHAVIOR_LABELS = ['Safe Driving', 'Texting Right', 'Phone Right', 'Texting Left', 'Phone Left',
+                       'Radio', 'Drinking', 'Reaching Behind', 'Hair/Makeup', 'Talking']
+    # Averaged probabilities above which the model's verdict counts
+    SAFE_DRIVING_PROBABILITY = 0.5
+    BEHAVIOR_PROBABILITY = 0.35  # Higher threshold, skip safe driving
+    
+    def __init__(self, model_batch_size=16, motion_threshold=None, adaptive_sampling=False,
+                 max_processing_width=None, ffmpeg_decode=False, decode_ahead=0, model_pipeline=True,
+                 model_backend='keras', tflite_quantization='float16', driver_roi=False, landmark_store=None,
+                 early_exit=False, early_exit_confidence=None):
         # Initialize MediaPipe
+        import mediapipe as mp
         self.mp_face_mesh = mp.solutions.face_mesh
         self.mp_hands = mp.solutions.hands
         self.face_mesh = self.mp_face_mesh.FaceMesh(
@@ -26,108 +55,512 @@ class EnhancedVideoAnalyzer:
             min_detection_confidence=0.5
         )
         
+        # Stills get their own static-image-mode graphs, created on first use,
+        # so no tracking state carries over between unrelated images
+        self._image_hands = None
+        self._image_face_mesh = None
+        
+        # Sampled frames are sent to the model this many at a time (one at a time
+        # with adaptive sampling, which reacts to each prediction)
+        self.model_batch_size = max(1, model_batch_size)
+        self._model_buffers_for = None
+        # Predict batches on a worker thread while MediaPipe handles the next frames
+        self.model_pipeline = model_pipeline
+        self._model_executor = None
+        # One RGB conversion per frame, shared by MediaPipe and the model input;
+        # frames wider than max_processing_width are downscaled first
+        self._preprocessor = FramePreprocessor(max_width=max_processing_width)
+        # Mean gray-level difference below which a sampled frame reuses the
+        # previous frame's CV detections instead of running MediaPipe (None = off)
+        self.motion_threshold = motion_threshold
+        # Sample coarsely and densify around detection/model changes instead of every 15th frame
+        self.adaptive_sampling = adaptive_sampling
+        # Decode with an ffmpeg process that emits only sampled, downscaled frames
+        # (falls back to OpenCV when ffmpeg isn't installed)
+        self.ffmpeg_decode = ffmpeg_decode
+        # Frames decoded ahead on a background thread (0 = decode inline). Adaptive
+        # sampling picks each step from the last results, so it always decodes inline
+        self.decode_ahead = decode_ahead
+        # Calibrate a driver region from the first seconds' landmarks and run
+        # MediaPipe on that crop only (the model still sees whole frames)
+        self._roi = None
+        self.driver_roi = driver_roi
+        # Directory the per-frame landmarks and model probabilities of each video
+        # are written to, for landmark_store.rescore_store (None = off)
+        self.landmark_store = landmark_store
+        # Stop reading once neither the rest of the CV detections nor the rest of
+        # the model predictions can change the behaviors/risk level; with a
+        # confidence (e.g. 0.95), once that is very unlikely
+        self.early_exit = early_exit
+        self.early_exit_confidence = early_exit_confidence
+        
+        # 'keras', or 'tflite' to run a cached TFLite conversion ('float16' or 'dynamic' int8)
+        self.model_backend = model_backend
+        self.tflite_quantization = tflite_quantization
+        
         # Load pre-trained models if available
         self.driver_model = None
         self.load_models()
     
+    def reset(self):
+        """Restart the MediaPipe graphs so tracking state doesn't carry over to the next video"""
+        self.hands.reset()
+        self.face_mesh.reset()
+        if self._roi is not None:
+            self._roi.reset()
+    
+    @property
+    def driver_roi(self):
+        """Whether MediaPipe runs on a calibrated crop around the driver"""
+        return self._roi is not None
+    
+    @driver_roi.setter
+    def driver_roi(self, enabled):
+        if enabled and self._roi is None:
+            self._roi = DriverROI(self.ROI_WATCH_REGIONS)
+        elif not enabled:
+            self._roi = None
+    
+    @property
+    def max_processing_width(self):
+        """Frames wider than this are downscaled before MediaPipe (None = native resolution)"""
+        return self._preprocessor.max_width
+    
+    @max_processing_width.setter
+    def max_processing_width(self, value):
+        self._preprocessor.max_width = value
+    
     def load_models(self):
         """Load pre-trained driver behavior models"""
         if not TF_AVAILABLE:
             print("TensorFlow not available, using basic analysis")
             return
-            
-        model_paths = ['driver_model.h5', 'driver_model_updated.h5']
         
-        for model_path in model_paths:
-            if os.path.exists(model_path):
+        # Models are loaded and warmed up once per process and shared by every analyzer
+        backends = ['tflite', 'keras'] if self.model_backend == 'tflite' else ['keras']
+        for model_path in MODEL_PATHS:
+            if not os.path.exists(model_path):
+                continue
+            for backend in backends:
                 try:
-                    self.driver_model = keras.models.load_model(model_path, compile=False)
-                    print(f"[SUCCESS] Loaded model: {model_path}")
-                    print(f"  Input shape: {self.driver_model.input_shape}")
-                    print(f"  Output shape: {self.driver_model.output_shape}")
-                    break
+                    self.driver_model = MODEL_REGISTRY.get(model_path, backend, self.tflite_quantization)
                 except Exception as e:
-                    print(f"[FAILED] Error loading {model_path}: {str(e)[:100]}")
+                    print(f"[FAILED] Error loading {model_path} ({backend}): {str(e)[:100]}")
                     continue
+                label = f" (TFLite, {self.tflite_quantization})" if backend == 'tflite' else ''
+                print(f"[SUCCESS] Loaded model: {model_path}{label}")
+                print(f"  Input shape: {self.driver_model.input_shape}")
+                print(f"  Output shape: {self.driver_model.output_shape}")
+                return
     
-    def analyze_video(self, video_path):
+    def analyze_video(self, video_path, progress_callback=None):
         """Enhanced video analysis using both computer vision and deep learning"""
-        cap = cv2.VideoCapture(video_path)
-        
-        # Analysis counters
-        total_frames = 0
-        phone_frames = 0
-        radio_frames = 0
-        distracted_frames = 0
+        timings = StageTimings()
+        # Only every 15th frame is decoded into an image. The model needs native
+        # resolution frames, so ffmpeg only downscales when there is no model
+        # (the preprocessor downscales for MediaPipe either way)
+        reader = open_frame_reader(video_path, step=15, ffmpeg=self.ffmpeg_decode,
+                                   max_width=self.max_processing_width if self.driver_model is None else None,
+                                   timings=timings,
+                                   decode_ahead=0 if self.adaptive_sampling else self.decode_ahead)
+        total_video_frames = reader.frame_count
+        
+        # Landmarks are collected per frame and scored in one batch at the end
+        recorder = LandmarkRecorder()
         model_predictions = []
+        batch_count = 0
+        
+        gate = MotionGate(self.motion_threshold) if self.motion_threshold else None
+        landmarks = None
+        if self._roi is not None:
+            self._roi.reset()
+        
+        sampler = AdaptiveSampler(reader.fps) if self.adaptive_sampling else None
+        if sampler is not None:
+            reader.step = sampler.step
+            reader.min_step = sampler.dense_step
+        previous_frame = 0
+        batch_weights = []
+        prediction_weights = []
+        pending_batches = deque()  # (future, weights) in submission order
+        # Adaptive sampling densifies at the sample where the model's top class
+        # changes, so each sample is predicted before the next one is picked
+        batch_size = 1 if sampler is not None else self.model_batch_size
+        early_exit = EarlyExit(self.early_exit_confidence) if self.early_exit else None
+        running = None
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
+        try:
+            for frame_number, frame in reader:
+                self._preprocessor.load(frame)
                 
-            total_frames += 1
-            
-            # Skip frames for performance
-            if total_frames % 15 != 0:
-                continue
+                # A frame that barely changed reuses the last MediaPipe outcomes
+                static = False
+                if gate is not None:
+                    with timings.time('motion_gate'):
+                        static = gate.is_static(frame) and landmarks is not None
                 
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # MediaPipe analysis
-            hand_results = self.hands.process(rgb_frame)
-            face_results = self.face_mesh.process(rgb_frame)
-            
-            # Traditional CV detection
-            if self._detect_phone_usage(hand_results, face_results, frame.shape):
-                phone_frames += 1
+                if static:
+                    timings.count('frames_gated')
+                else:
+                    landmarks = self._detect_landmarks(frame, timings)
+                    recorder.frame_shape = frame.shape[:2]
+                timings.count('frames_analyzed')
+                
+                # Adaptive samples stand for all video frames since the previous sample
+                weight = 1
+                if sampler is not None:
+                    weight = frame_number - previous_frame
+                    previous_frame = frame_number
+                    with timings.time('sampling_update'):
+                        flags = self._score_frames(landmarks[0][None], landmarks[1][None], frame.shape)
+                        reader.step = sampler.update(frame_number, tuple(int(hits[0]) for hits in flags))
+                recorder.add_frame(frame_number, landmarks[0], landmarks[1], weight, static)
+                
+                # Deep learning model prediction (queued into the next batch,
+                # which is predicted on the model worker while CV carries on)
+                if self.driver_model is not None:
+                    with timings.time('model_preprocess'):
+                        self._ensure_model_buffers()
+                        self._preprocess_for_model(self._model_batch[batch_count])
+                    batch_weights.append(weight)
+                    batch_count += 1
+                    if batch_count == batch_size:
+                        self._submit_batch(batch_count, batch_weights, pending_batches, timings)
+                        top_class_changed = self._collect_predictions(
+                            pending_batches, model_predictions, prediction_weights, timings,
+                            keep=0 if sampler is not None else 1
+                        )
+                        if top_class_changed and sampler is not None:
+                            sampler.mark_change(frame_number)
+                            reader.step = sampler.step
+                        batch_count = 0
+                        batch_weights = []
                 
-            if self._detect_radio_usage(hand_results, frame.shape):
-                radio_frames += 1
+                if progress_callback is not None:
+                    progress_callback(reader.frames_read, total_video_frames)
                 
-            if self._detect_distraction(face_results):
-                distracted_frames += 1
+                # Without a frame count there is no telling how much video is left
+                if early_exit is not None and total_video_frames > 0 and early_exit.due(len(recorder)):
+                    with timings.time('early_exit'):
+                        running = self._update_counts(running, recorder, timings)
+                        if self._verdict_settled(early_exit, running, model_predictions, prediction_weights,
+                                                 frame_number, total_video_frames, sampler is not None):
+                            early_exit.stopped_at = frame_number
+                            timings.count('early_exits')
+                            break
             
-            # Deep learning model prediction
-            if self.driver_model is not None:
-                prediction = self._predict_with_model(frame)
-                if prediction is not None:
-                    model_predictions.append(prediction)
-        
-        cap.release()
+            # Flush the last partial batch and wait for every prediction
+            if batch_count:
+                self._submit_batch(batch_count, batch_weights, pending_batches, timings)
+            self._collect_predictions(pending_batches, model_predictions, prediction_weights, timings, keep=0)
+            
+            total_frames = reader.frames_read
+        finally:
+            reader.release()
+            self._cancel_batches(pending_batches)
         
         # Combine traditional CV and ML results
-        return self._generate_analysis_result(
-            total_frames, phone_frames, radio_frames, 
-            distracted_frames, model_predictions
+        sampling = 'adaptive' if sampler is not None else 'fixed'
+        result = self._combine_results(
+            total_frames, recorder.columns(), recorder.frame_shape, model_predictions, prediction_weights,
+            sampling, timings
+        )
+        if self._roi is not None and self._roi.box is not None:
+            result['stats']['driver_roi'] = [round(v, 3) for v in self._roi.box]
+        if early_exit is not None:
+            result['stats']['early_exit'] = {'stopped_at_frame': early_exit.stopped_at, 'mode': early_exit.mode}
+        if self.landmark_store:
+            with timings.time('landmark_store'):
+                meta = {'analyzer': 'EnhancedVideoAnalyzer', 'version': self.VERSION, 'config': self._store_config(),
+                        'total_frames': total_frames, 'sampling': sampling}
+                result['stats']['landmark_store'] = write_store(
+                    self.landmark_store, video_path, recorder, meta, model_predictions, prediction_weights
+                )
+        result['stats']['timings'] = timings.summary()
+        REGISTRY.record(timings)
+        return result
+    
+    def _store_config(self):
+        """Settings that change which frames a landmark store holds and what was detected on them"""
+        return {
+            'motion_threshold': self.motion_threshold,
+            'adaptive_sampling': self.adaptive_sampling,
+            'max_processing_width': self.max_processing_width,
+            'ffmpeg_decode': self.ffmpeg_decode,
+            'driver_roi': self.driver_roi,
+            'early_exit': self.early_exit,
+            'early_exit_confidence': self.early_exit_confidence,
+            'model_backend': self.model_backend,
+            'tflite_quantization': self.tflite_quantization
+        }
+    
+    def _detect_landmarks(self, frame, timings):
+        """MediaPipe analysis of the loaded BGR frame, returned as ``landmark_arrays``"""
+        roi_box = self._use_roi_crop(frame.shape)
+        with timings.time('color_convert'):
+            rgb_frame = self._preprocessor.rgb()
+        
+        # MediaPipe analysis
+        with timings.time('hands'):
+            hand_results = self.hands.process(rgb_frame)
+        with timings.time('face_mesh'):
+            face_results = self.face_mesh.process(rgb_frame)
+        if self._roi is not None:
+            # Landmarks come back in full-frame coordinates for the heuristics
+            with timings.time('driver_roi'):
+                self._roi.observe(hand_results, face_results, roi_box, frame.shape)
+        with timings.time('landmark_arrays'):
+            return landmark_arrays(hand_results, face_results)
+    
+    def _score_frames(self, face, hands, frame_shape, timings=None):
+        """Traditional CV detection on a batch of frames' landmark arrays: (phone, radio, distracted) boolean arrays"""
+        timings = timings if timings is not None else StageTimings()
+        with timings.time('detect_phone'):
+            phone = self._detect_phone_usage(face, hands, frame_shape)
+        with timings.time('detect_radio'):
+            radio = self._detect_radio_usage(hands, frame_shape)
+        with timings.time('detect_distraction'):
+            distracted = self._detect_distraction(face)
+        
+        return phone, radio, distracted
+    
+    def _combine_results(self, total_frames, columns, frame_shape, model_predictions, prediction_weights, sampling,
+                         timings=None):
+        """Score recorded landmark columns and combine them with the model predictions"""
+        weights = np.asarray(columns['weight'], dtype=np.int64)
+        phone, radio, distracted = self._score_frames(
+            np.asarray(columns['face']), np.asarray(columns['hands']), frame_shape or (0, 0), timings
         )
+        phone_frames, radio_frames, distracted_frames = (int(weights[hits].sum()) for hits in (phone, radio, distracted))
+        
+        if sampling == 'adaptive':
+            result = self._generate_analysis_result(
+                total_frames, phone_frames, radio_frames,
+                distracted_frames, model_predictions,
+                analyzed_frames=int(weights.sum()), prediction_weights=prediction_weights
+            )
+        else:
+            result = self._generate_analysis_result(
+                total_frames, phone_frames, radio_frames, 
+                distracted_frames, model_predictions
+            )
+        result['stats']['frames_gated'] = int(np.count_nonzero(columns['gated']))
+        result['stats']['sampling'] = sampling
+        return result
+    
+    def _update_counts(self, counts, recorder, timings):
+        """Running weighted detection counts, adding the frames recorded since the last update"""
+        counts = counts or {'phone_frames': 0, 'radio_frames': 0, 'distracted_frames': 0,
+                            'analyzed_frames': 0, 'covered_frames': 0}
+        columns = recorder.columns(counts['analyzed_frames'])
+        weights = np.asarray(columns['weight'], dtype=np.int64)
+        detections = self._score_frames(columns['face'], columns['hands'], recorder.frame_shape or (0, 0), timings)
+        counts = dict(counts)
+        for name, hits in zip(('phone_frames', 'radio_frames', 'distracted_frames'), detections):
+            counts[name] += int(weights[hits].sum())
+        counts['analyzed_frames'] += len(weights)
+        counts['covered_frames'] += int(weights.sum())
+        return counts
+    
+    def _verdict_settled(self, early_exit, counts, model_predictions, prediction_weights, frame_number,
+                         total_video_frames, adaptive):
+        """Whether the rest of the video can no longer change the behaviors and risk level"""
+        # Weight still to come: samples on the fixed grid, video frames when adaptive.
+        # Queued model batches count as still to come as well
+        if adaptive:
+            seen = counts['covered_frames']
+            remaining = total_video_frames - frame_number
+            model_seen = int(sum(prediction_weights))
+            model_remaining = total_video_frames - model_seen
+        else:
+            seen = frame_number // 15
+            remaining = total_video_frames // 15 - seen
+            model_seen = len(model_predictions)
+            model_remaining = total_video_frames // 15 - model_seen
+        if remaining <= 0:
+            return False
+        
+        model_behaviors = []
+        if self.driver_model is not None:
+            model_behaviors = self._settled_model_behaviors(
+                early_exit, model_predictions, prediction_weights, model_seen, max(0, model_remaining)
+            )
+            if model_behaviors is None:
+                return False
+        
+        def verdict(final, total):
+            behaviors, _, risk_level = self._combine_detections(
+                final['phone_frames'] / total * 100, final['radio_frames'] / total * 100,
+                final['distracted_frames'] / total * 100, model_behaviors, 0
+            )
+            return behaviors, risk_level
+        
+        cv_counts = {name: counts[name] for name in ('phone_frames', 'radio_frames', 'distracted_frames')}
+        return early_exit.settled(verdict, cv_counts, seen, remaining, counts['analyzed_frames'])
+    
+    def _settled_model_behaviors(self, early_exit, model_predictions, prediction_weights, seen, remaining):
+        """``_model_behaviors`` of the final average prediction if the rest can't change it, else None"""
+        if model_predictions:
+            weights = prediction_weights if prediction_weights else None
+            sums = np.average(model_predictions, axis=0, weights=weights) * seen
+        elif remaining:
+            return None
+        else:
+            return []
+        total = seen + remaining
+        # Each class's averaged probability can still end up anywhere in [low, high]
+        ranges = np.array([early_exit.final_range(s, seen, remaining, len(model_predictions)) for s in sums])
+        low, high = ranges[:, 0] / total, ranges[:, 1] / total
+        
+        # Safe Driving is the top class above the threshold whatever comes
+        if low[0] > self.SAFE_DRIVING_PROBABILITY and (high[1:] <= low[0]).all():
+            return ['Safe Driving']
+        # Otherwise it has to be ruled out for sure, and every behavior settled either way
+        if high[0] > self.SAFE_DRIVING_PROBABILITY and not (low[1:] > high[0]).any():
+            return None
+        classes = range(1, min(len(low), len(self.BEHAVIOR_LABELS)))
+        if any(low[i] <= self.BEHAVIOR_PROBABILITY < high[i] for i in classes):
+            return None
+        return [self.BEHAVIOR_LABELS[i] for i in classes if low[i] > self.BEHAVIOR_PROBABILITY]
+    
+    @classmethod
+    def rescore(cls, meta, columns):
+        """Rebuild a result from a landmark store's columns with the current heuristics, without MediaPipe or the model"""
+        # Scoring only needs the heuristics, not MediaPipe graphs or a loaded model
+        analyzer = cls.__new__(cls)
+        model_predictions = list(np.asarray(columns['model'])) if 'model' in columns else []
+        prediction_weights = np.asarray(columns['model_weight']).tolist() if model_predictions else []
+        return analyzer._combine_results(
+            meta['total_frames'], columns, (meta['frame_height'], meta['frame_width']),
+            model_predictions, prediction_weights, meta['sampling']
+        )
+    
+    def _use_roi_crop(self, frame_shape):
+        """Point the preprocessor at the driver ROI for this frame and return the crop box"""
+        box = self._roi.crop_box(frame_shape) if self._roi is not None else None
+        if box != self._preprocessor.crop:
+            # Tracking state is relative to the previous image; start over on the new one
+            self.hands.reset()
+            self.face_mesh.reset()
+            self._preprocessor.crop = box
+        return box
+    
+    def _ensure_model_buffers(self):
+        """Allocate reusable preprocessing buffers sized for the current model"""
+        if self._model_buffers_for is self.driver_model:
+            return
+        
+        # Get model input shape
+        input_shape = self.driver_model.input_shape
+        target_size = (input_shape[1], input_shape[2]) if len(input_shape) == 4 else (224, 224)
+        # cv2 sizes are (width, height), arrays are (height, width)
+        buffer_shape = (target_size[1], target_size[0], 3)
+        
+        self._preprocessor.set_model_input_size(target_size)
+        # One batch is filled while the other is being predicted
+        self._model_batches = [
+            np.empty((self.model_batch_size,) + buffer_shape, dtype=np.float32) for _ in range(2)
+        ]
+        self._model_slot = 0
+        self._model_batch = self._model_batches[0]
+        self._single_input = np.empty((1,) + buffer_shape, dtype=np.float32)
+        # Registry handles compile their own; a Keras model assigned directly gets one here
+        self._inference_fn = None
+        if TF_AVAILABLE and callable(self.driver_model):
+            self._inference_fn = compile_inference_fn(self.driver_model)
+        self._model_buffers_for = self.driver_model
+    
+    def _preprocess_for_model(self, out):
+        """Resize and normalize the loaded frame's RGB buffer into a float32 NHWC slot"""
+        self._preprocessor.model_input(out)
+    
+    def _predict_batch(self, batch):
+        """Run the model on a float32 NHWC batch"""
+        try:
+            if self._inference_fn is not None:
+                predictions = self._inference_fn(batch).numpy()
+            else:
+                predictions = self.driver_model.predict(batch, batch_size=len(batch), verbose=0)
+            return list(predictions)
+        except Exception as e:
+            print(f"Model prediction error: {e}")
+            return []
+    
+    def _timed_predict_batch(self, batch, timings):
+        with timings.time('model'):
+            predictions = self._predict_batch(batch)
+        timings.count('model_calls')
+        return predictions
+    
+    def _submit_batch(self, count, weights, pending_batches, timings):
+        """Queue the filled batch for prediction and switch to the other batch buffer"""
+        batch = self._model_batch[:count]
+        if self.model_pipeline:
+            if self._model_executor is None:
+                self._model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model')
+            future = self._model_executor.submit(self._timed_predict_batch, batch, timings)
+        else:
+            future = Future()
+            future.set_result(self._timed_predict_batch(batch, timings))
+        pending_batches.append((future, weights))
+        self._model_slot = (self._model_slot + 1) % len(self._model_batches)
+        self._model_batch = self._model_batches[self._model_slot]
+    
+    def _cancel_batches(self, pending_batches):
+        """Drop batches an interrupted analysis left queued, waiting for the one being predicted.
+        
+        The next analysis refills the batch buffers, so none may still be in use.
+        """
+        while pending_batches:
+            future, _ = pending_batches.popleft()
+            if not future.cancel():
+                wait([future])
+    
+    def _collect_predictions(self, pending_batches, model_predictions, prediction_weights, timings, keep=1):
+        """Append finished predictions in order, waiting until at most ``keep`` batches are in flight.
+        
+        Keeping one in flight leaves the other batch buffer free to fill.
+        Returns True if the top class changed within the collected predictions.
+        """
+        changed = False
+        while pending_batches and (len(pending_batches) > keep or pending_batches[0][0].done()):
+            future, weights = pending_batches.popleft()
+            with timings.time('model_wait'):
+                predictions = future.result()
+            if not predictions:
+                continue
+            
+            top_classes = [int(np.argmax(prediction)) for prediction in predictions]
+            if model_predictions:
+                top_classes.insert(0, int(np.argmax(model_predictions[-1])))
+            changed = changed or any(a != b for a, b in zip(top_classes, top_classes[1:]))
+            
+            model_predictions.extend(predictions)
+            prediction_weights.extend(weights[:len(predictions)])
+        return changed
     
     def _predict_with_model(self, frame):
         """Use pre-trained model for prediction"""
         try:
-            # Get model input shape
-            input_shape = self.driver_model.input_shape
-            target_size = (input_shape[1], input_shape[2]) if len(input_shape) == 4 else (224, 224)
-            
-            # Preprocess frame
-            resized = cv2.resize(frame, target_size)
-            # Convert BGR to RGB
-            rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
-            # Normalize to [0, 1]
-            normalized = rgb.astype(np.float32) / 255.0
-            input_data = np.expand_dims(normalized, axis=0)
+            self._ensure_model_buffers()
+            self._preprocessor.load(frame)
+            self._preprocess_for_model(self._single_input[0])
             
             # Get prediction
-            prediction = self.driver_model.predict(input_data, verbose=0)
-            return prediction[0]
+            predictions = self._predict_batch(self._single_input)
+            return predictions[0] if predictions else None
             
         except Exception as e:
             print(f"Model prediction error: {e}")
             return None
     
-    def _generate_analysis_result(self, total_frames, phone_frames, radio_frames, distracted_frames, model_predictions):
+    def _generate_analysis_result(self, total_frames, phone_frames, radio_frames, distracted_frames, model_predictions,
+                                  analyzed_frames=None, prediction_weights=None):
         """Generate comprehensive analysis combining CV and ML results"""
-        analyzed_frames = max(1, total_frames // 15)
+        # Adaptive sampling passes the (weighted) number of frames the counts cover
+        if analyzed_frames is None:
+            analyzed_frames = max(1, total_frames // 15)
+        analyzed_frames = max(1, analyzed_frames)
         
         # Traditional CV percentages
         phone_percentage = (phone_frames / analyzed_frames) * 100
@@ -139,30 +572,55 @@ class EnhancedVideoAnalyzer:
         model_behaviors = []
         
         if model_predictions:
-            avg_prediction = np.mean(model_predictions, axis=0)
+            avg_prediction = np.average(model_predictions, axis=0, weights=prediction_weights)
             model_confidence = np.max(avg_prediction) * 100
-            
-            # Actual model classes (State Farm dataset)
-            behavior_labels = ['Safe Driving', 'Texting Right', 'Phone Right', 'Texting Left', 'Phone Left', 
-                             'Radio', 'Drinking', 'Reaching Behind', 'Hair/Makeup', 'Talking']
-            
-            # Get highest prediction
-            max_idx = np.argmax(avg_prediction)
-            max_prob = avg_prediction[max_idx]
-            
-            # If Safe Driving is highest with >50%, consider it safe
-            if max_idx == 0 and max_prob > 0.5:
-                model_behaviors.append('Safe Driving')
-            else:
-                # Map predictions to behaviors (skip class 0)
-                for i, prob in enumerate(avg_prediction):
-                    if i > 0 and i < len(behavior_labels) and prob > 0.35:  # Higher threshold, skip safe driving
-                        model_behaviors.append(behavior_labels[i])
+            model_behaviors = self._model_behaviors(avg_prediction)
             
             print(f"Model predictions: {avg_prediction[:min(len(avg_prediction), 10)]}")
             print(f"Detected behaviors: {model_behaviors}")
         
-        # Combine results
+        detected_behaviors, warnings, risk_level = self._combine_detections(
+            phone_percentage, radio_percentage, distraction_percentage, model_behaviors, model_confidence
+        )
+        
+        # Enhanced confidence calculation
+        final_confidence = max(model_confidence, 75) if model_predictions else min(85, 100 - distraction_percentage)
+        
+        return {
+            'behaviors': detected_behaviors,
+            'warnings': warnings,
+            'risk_level': risk_level,
+            'confidence': round(final_confidence, 1),
+            'stats': {
+                'phone_usage': round(phone_percentage, 1),
+                'radio_usage': round(radio_percentage, 1),
+                'distraction': round(distraction_percentage, 1),
+                'model_confidence': round(model_confidence, 1),
+                'analysis_method': 'AI + Computer Vision' if model_predictions else 'Computer Vision Only'
+            }
+        }
+    
+    def _model_behaviors(self, avg_prediction):
+        """Behaviors the averaged model prediction shows"""
+        model_behaviors = []
+        
+        # Get highest prediction
+        max_idx = np.argmax(avg_prediction)
+        max_prob = avg_prediction[max_idx]
+        
+        # If Safe Driving is highest with >50%, consider it safe
+        if max_idx == 0 and max_prob > self.SAFE_DRIVING_PROBABILITY:
+            model_behaviors.append('Safe Driving')
+        else:
+            # Map predictions to behaviors (skip class 0)
+            for i, prob in enumerate(avg_prediction):
+                if i > 0 and i < len(self.BEHAVIOR_LABELS) and prob > self.BEHAVIOR_PROBABILITY:
+                    model_behaviors.append(self.BEHAVIOR_LABELS[i])
+        return model_behaviors
+    
+    def _combine_detections(self, phone_percentage, radio_percentage, distraction_percentage, model_behaviors,
+                            model_confidence):
+        """Behaviors, warnings and risk level from the CV percentages and the model's behaviors"""
         detected_behaviors = []
         warnings = []
         
@@ -233,22 +691,7 @@ class EnhancedVideoAnalyzer:
         elif any(w['severity'] == 'Medium' for w in warnings):
             risk_level = 'Medium'
         
-        # Enhanced confidence calculation
-        final_confidence = max(model_confidence, 75) if model_predictions else min(85, 100 - distraction_percentage)
-        
-        return {
-            'behaviors': detected_behaviors,
-            'warnings': warnings,
-            'risk_level': risk_level,
-            'confidence': round(final_confidence, 1),
-            'stats': {
-                'phone_usage': round(phone_percentage, 1),
-                'radio_usage': round(radio_percentage, 1),
-                'distraction': round(distraction_percentage, 1),
-                'model_confidence': round(model_confidence, 1),
-                'analysis_method': 'AI + Computer Vision' if model_predictions else 'Computer Vision Only'
-            }
-        }
+        return detected_behaviors, warnings, risk_level
     
     def analyze_image(self, image_path):
         """Analyze a single image for driving behavior"""
@@ -256,22 +699,119 @@ class EnhancedVideoAnalyzer:
         if frame is None:
             return {'error': 'Could not read image'}
         
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # MediaPipe analysis
-        hand_results = self.hands.process(rgb_frame)
-        face_results = self.face_mesh.process(rgb_frame)
-        
-        # CV detection
-        phone_detected = self._detect_phone_usage(hand_results, face_results, frame.shape)
-        radio_detected = self._detect_radio_usage(hand_results, frame.shape)
-        distraction_detected = self._detect_distraction(face_results)
+        landmarks = self._image_landmarks(frame, StageTimings())
         
         # Model prediction
         model_prediction = None
         if self.driver_model is not None:
             model_prediction = self._predict_with_model(frame)
         
+        return self._image_result(frame.shape, landmarks, model_prediction)
+    
+    def analyze_images(self, images, decode_threads=4, batch_size=None):
+        """Analyze many images: threaded decoding, MediaPipe per image and batched model calls.
+        
+        ``images`` are paths or ``(name, encoded bytes)`` pairs (e.g. uploaded
+        files). Each result equals ``analyze_image`` on the same images in the
+        same order, plus an ``image`` name. The model sees ``batch_size``
+        images per call (None = ``model_batch_size``); only one batch of
+        model inputs is held at a time.
+        """
+        timings = StageTimings()
+        start = time.perf_counter()
+        results = []
+        analyzed = []  # (result index, frame shape, landmarks)
+        batch_size = batch_size or self.model_batch_size
+        batch = None
+        batch_count = 0
+        predictions = []
+        
+        for name, frame in decode_images(images, decode_threads):
+            results.append({'image': name})
+            if frame is None:
+                results[-1]['error'] = 'Could not read image'
+                continue
+            analyzed.append((len(results) - 1, frame.shape, self._image_landmarks(frame, timings)))
+            timings.count('images_analyzed')
+            if self.driver_model is None:
+                continue
+            # The RGB conversion MediaPipe just used is reused for the model input
+            with timings.time('model_preprocess'):
+                self._ensure_model_buffers()
+                if batch is None:
+                    batch = np.empty((batch_size,) + self._single_input.shape[1:], dtype=np.float32)
+                self._preprocess_for_model(batch[batch_count])
+            batch_count += 1
+            if batch_count == batch_size:
+                predictions.extend(self._predict_image_batch(batch[:batch_count], timings))
+                batch_count = 0
+        if batch_count:
+            predictions.extend(self._predict_image_batch(batch[:batch_count], timings))
+        
+        with timings.time('combine'):
+            for slot, (index, frame_shape, landmarks) in enumerate(analyzed):
+                model_prediction = predictions[slot] if predictions else None
+                results[index].update(self._image_result(frame_shape, landmarks, model_prediction))
+        
+        elapsed = time.perf_counter() - start
+        REGISTRY.record(timings, kind='image_batch')
+        return {
+            'results': results,
+            'stats': {
+                'images': len(results),
+                'failed': len(results) - len(analyzed),
+                'model_calls': (len(predictions) + batch_size - 1) // batch_size,
+                'elapsed_s': round(elapsed, 3),
+                'images_per_second': round(len(results) / elapsed, 1) if elapsed > 0 else None,
+                'timings': timings.summary()
+            }
+        }
+    
+    def _predict_image_batch(self, batch, timings):
+        """Model predictions for a batch of stills; a failed call leaves them without one, like analyze_image"""
+        return self._timed_predict_batch(batch, timings) or [None] * len(batch)
+    
+    def _image_graphs(self):
+        """Hands and face mesh in static image mode, detecting every image from scratch"""
+        if self._image_hands is None:
+            self._image_face_mesh = self.mp_face_mesh.FaceMesh(
+                static_image_mode=True,
+                max_num_faces=1,
+                refine_landmarks=True,
+                min_detection_confidence=0.5
+            )
+            self._image_hands = self.mp_hands.Hands(
+                static_image_mode=True,
+                max_num_hands=2,
+                min_detection_confidence=0.5
+            )
+        return self._image_hands, self._image_face_mesh
+    
+    def _image_landmarks(self, frame, timings):
+        """MediaPipe on a whole still image, returned as ``landmark_arrays``"""
+        # A single image has no calibration period; use the whole frame
+        self._preprocessor.crop = None
+        self._preprocessor.load(frame)
+        with timings.time('color_convert'):
+            rgb_frame = self._preprocessor.rgb()
+        
+        # MediaPipe analysis
+        hands, face_mesh = self._image_graphs()
+        with timings.time('hands'):
+            hand_results = hands.process(rgb_frame)
+        with timings.time('face_mesh'):
+            face_results = face_mesh.process(rgb_frame)
+        with timings.time('landmark_arrays'):
+            return landmark_arrays(hand_results, face_results)
+    
+    def _image_result(self, frame_shape, landmarks, model_prediction):
+        """Result dict of one image from its landmarks and model prediction (None without a model)"""
+        # CV detection
+        face, hands = landmarks
+        phone_detected, radio_detected, distraction_detected = (
+            bool(hits[0]) for hits in self._score_frames(face[None], hands[None], frame_shape)
+        )
+        
         # Generate result
         behaviors = []
         warnings = []
@@ -280,21 +820,7 @@ class EnhancedVideoAnalyzer:
         
         if model_prediction is not None:
             model_confidence = np.max(model_prediction) * 100
-            behavior_labels = ['Safe Driving', 'Texting Right', 'Phone Right', 'Texting Left', 'Phone Left', 
-                             'Radio', 'Drinking', 'Reaching Behind', 'Hair/Makeup', 'Talking']
-            
-            # Get highest prediction
-            max_idx = np.argmax(model_prediction)
-            max_prob = model_prediction[max_idx]
-            
-            # If Safe Driving is highest with >50%, consider it safe
-            if max_idx == 0 and max_prob > 0.5:
-                model_behaviors.append('Safe Driving')
-            else:
-                # Map predictions to behaviors (skip class 0)
-                for i, prob in enumerate(model_prediction):
-                    if i > 0 and i < len(behavior_labels) and prob > 0.35:
-                        model_behaviors.append(behavior_labels[i])
+            model_behaviors = self._model_behaviors(model_prediction)
         
         # Check if AI model detected safe driving
         ai_safe = 'Safe Driving' in model_behaviors
@@ -352,55 +878,40 @@ class EnhancedVideoAnalyzer:
             'behaviors': behaviors,
             'warnings': warnings,
             'risk_level': risk_level,
-            'confidence': round(model_confidence if model_prediction is not None else 75, 1),
+            'confidence': round(float(model_confidence) if model_prediction is not None else 75, 1),
             'analysis_method': 'AI + Computer Vision' if model_prediction is not None else 'Computer Vision Only'
         }
     
-    def _detect_phone_usage(self, hand_results, face_results, frame_shape):
-        if not hand_results.multi_hand_landmarks or not face_results.multi_face_landmarks:
-            return False
-            
+    def _detect_phone_usage(self, face, hands, frame_shape):
         h, w = frame_shape[:2]
+        scale = np.array([w, h], dtype=np.float64)
         
-        for hand_landmarks in hand_results.multi_hand_landmarks:
-            hand_x = hand_landmarks.landmark[9].x * w
-            hand_y = hand_landmarks.landmark[9].y * h
-            
-            face_landmarks = face_results.multi_face_landmarks[0]
-            face_x = face_landmarks.landmark[1].x * w
-            face_y = face_landmarks.landmark[1].y * h
-            
-            distance = np.sqrt((hand_x - face_x)**2 + (hand_y - face_y)**2)
-            if distance < w * 0.15:
-                return True
-        return False
+        # Middle finger base of each hand and the nose tip, in pixels
+        hand_points = hands[:, :, MIDDLE_BASE].astype(np.float64) * scale
+        face_points = face[:, NOSE_TIP].astype(np.float64) * scale
+        
+        # Missing hands/faces are NaN and never compare as near
+        distance = np.sqrt(((hand_points - face_points[:, None]) ** 2).sum(axis=-1))
+        return (distance < w * 0.15).any(axis=1)
     
-    def _detect_radio_usage(self, hand_results, frame_shape):
-        if not hand_results.multi_hand_landmarks:
-            return False
-            
+    def _detect_radio_usage(self, hands, frame_shape):
         h, w = frame_shape[:2]
         center_region = (w * 0.3, w * 0.7, h * 0.4, h * 0.8)
         
-        for hand_landmarks in hand_results.multi_hand_landmarks:
-            hand_x = hand_landmarks.landmark[9].x * w
-            hand_y = hand_landmarks.landmark[9].y * h
-            
-            if (center_region[0] < hand_x < center_region[1] and 
-                center_region[2] < hand_y < center_region[3]):
-                return True
-        return False
-    
-    def _detect_distraction(self, face_results):
-        if not face_results.multi_face_landmarks:
-            return True
-            
-        face_landmarks = face_results.multi_face_landmarks[0]
-        nose_tip = face_landmarks.landmark[1]
-        left_eye = face_landmarks.landmark[33]
-        right_eye = face_landmarks.landmark[263]
+        hand_x = hands[:, :, MIDDLE_BASE, 0].astype(np.float64) * w
+        hand_y = hands[:, :, MIDDLE_BASE, 1].astype(np.float64) * h
+        
+        in_region = ((center_region[0] < hand_x) & (hand_x < center_region[1]) &
+                     (center_region[2] < hand_y) & (hand_y < center_region[3]))
+        return in_region.any(axis=1)
+    
+    def _detect_distraction(self, face):
+        nose_x = face[:, NOSE_TIP, 0].astype(np.float64)
+        left_eye_x = face[:, LEFT_EYE, 0].astype(np.float64)
+        right_eye_x = face[:, RIGHT_EYE, 0].astype(np.float64)
         
-        eye_center_x = (left_eye.x + right_eye.x) / 2
-        deviation = abs(nose_tip.x - eye_center_x)
+        eye_center_x = (left_eye_x + right_eye_x) / 2
+        deviation = np.abs(nose_x - eye_center_x)
         
-        return deviation > 0.05
\ No newline at end of file
+        # No face counts as distracted
+        return np.isnan(nose_x) | (deviation > 0.05)
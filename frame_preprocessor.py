@@ -0,0 +1,105 @@
+import cv2
+import numpy as np
+
+
+class FramePreprocessor:
+    """Shared per-frame preprocessing into reusable buffers.
+
+    A sampled BGR frame is converted to RGB at most once, into a buffer that
+    is only reallocated when the frame size changes. MediaPipe (hands and
+    face mesh) reads that buffer directly and the model input is resized
+    from it, so the model path needs no second color conversion and no
+    per-frame allocations.
+
+    Frames wider than ``max_width`` are downscaled once (keeping the aspect
+    ratio) before the conversion, so MediaPipe cost stops growing with the
+    upload's resolution. Landmarks are normalized, so callers keep using
+    the original frame's shape to turn them into pixel positions.
+
+    ``crop`` (pixel ``(x0, y0, x1, y1)``) restricts the RGB buffer to part
+    of the frame. The model input is still made from the whole frame at
+    its native resolution, so predictions don't depend on ``crop`` or
+    ``max_width``.
+    """
+
+    def __init__(self, model_input_size=None, max_width=None):
+        self.max_width = max_width
+        self._small = None
+        self._rgb = None
+        self._frame = None
+        self._rgb_ready = False
+        self._crop = None
+        self.model_input_size = None
+        if model_input_size is not None:
+            self.set_model_input_size(model_input_size)
+
+    def set_model_input_size(self, size):
+        """Size the model buffers for a (width, height) input"""
+        if self.model_input_size == tuple(size):
+            return
+        self.model_input_size = tuple(size)
+        # cv2 sizes are (width, height), arrays are (height, width)
+        self._model_rgb = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        self._model_bgr = np.empty((size[1], size[0], 3), dtype=np.uint8)
+
+    def load(self, frame):
+        """Start preprocessing a new BGR frame; conversions happen on first use"""
+        self._frame = frame
+        self._rgb_ready = False
+
+    @property
+    def shape(self):
+        return self._frame.shape
+
+    @property
+    def crop(self):
+        return self._crop
+
+    @crop.setter
+    def crop(self, box):
+        if box != self._crop:
+            self._crop = box
+            self._rgb_ready = False
+
+    def rgb(self):
+        """The current frame in RGB, converted once per frame"""
+        if not self._rgb_ready:
+            source = self._downscaled()
+            if self._rgb is None or self._rgb.shape != source.shape:
+                self._rgb = np.empty(source.shape, dtype=np.uint8)
+            cv2.cvtColor(source, cv2.COLOR_BGR2RGB, dst=self._rgb)
+            self._rgb_ready = True
+        return self._rgb
+
+    def _downscaled(self):
+        """The current BGR frame (or its crop), shrunk to ``max_width`` if it is wider"""
+        frame = self._frame
+        if self._crop is not None:
+            x0, y0, x1, y1 = self._crop
+            frame = frame[y0:y1, x0:x1]
+        h, w = frame.shape[:2]
+        if not self._downscales(w):
+            return frame
+        size = (int(self.max_width), max(1, round(h * self.max_width / w)))
+        if self._small is None or self._small.shape[:2] != (size[1], size[0]):
+            self._small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        return self._small
+
+    def _downscales(self, width):
+        return bool(self.max_width) and width > self.max_width
+
+    def model_input(self, out):
+        """Write the current frame, resized and scaled to [0, 1], into a float32 HWC slot"""
+        if self._crop is not None or self._downscales(self._frame.shape[1]):
+            # The model was trained on whole cabin images, not the driver crop,
+            # and sees the frame at native resolution whatever MediaPipe gets
+            cv2.resize(self._frame, self.model_input_size, dst=self._model_bgr)
+            cv2.cvtColor(self._model_bgr, cv2.COLOR_BGR2RGB, dst=self._model_rgb)
+        else:
+            # Resizing works per channel, so resizing the RGB buffer matches
+            # resizing the BGR frame and converting afterwards
+            cv2.resize(self.rgb(), self.model_input_size, dst=self._model_rgb)
+        np.copyto(out, self._model_rgb)
+        out /= 255.0
+        return out
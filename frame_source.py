@@ -0,0 +1,493 @@
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# ffmpeg is optional; without it every reader falls back to OpenCV
+FFMPEG_PATH = shutil.which('ffmpeg')
+
+
+class SampledFrameReader:
+    """Read every ``step``-th frame of a video, skipping the rest cheaply.
+
+    Skipped frames are only advanced with ``cap.grab()``; the expensive
+    ``retrieve()`` (conversion of the decoded picture into a BGR numpy
+    array) runs for the frames that are actually analyzed. When the gap
+    between samples is large, the reader seeks straight to the next sampled
+    frame instead, letting the demuxer jump from the nearest keyframe.
+
+    ``start_frame``/``end_frame`` restrict reading to frame numbers
+    ``start_frame+1 .. end_frame`` while keeping the sampling grid of the
+    whole video, so adjacent ranges sample exactly the frames a single
+    pass would.
+
+    When ``timings`` (a ``metrics.StageTimings``) is given, the time spent
+    grabbing/seeking/decoding up to each sampled frame is recorded as the
+    ``decode`` stage.
+    """
+
+    def __init__(self, video_path, step=1, seek_threshold=None, start_frame=0, end_frame=None, timings=None):
+        self.cap = cv2.VideoCapture(video_path)
+        self.step = step
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.timings = timings
+        # Seek instead of grabbing once a gap reaches this many frames
+        # (defaults to ~2 seconds, a typical dashcam keyframe interval)
+        self.seek_threshold = seek_threshold
+        self.frames_read = 0     # frames consumed from the stream
+        self.frames_decoded = 0  # frames retrieved as BGR images
+        # Only used by FFmpegFrameReader; grab() can stop on any frame
+        self.min_step = None
+        self._next_frame = None
+
+    @property
+    def fps(self):
+        return self.cap.get(cv2.CAP_PROP_FPS)
+
+    @property
+    def frame_count(self):
+        return int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def _should_seek(self, gap):
+        threshold = self.seek_threshold
+        if threshold is None:
+            threshold = max(60, int(self.fps) * 2)
+        return gap >= threshold
+
+    def __iter__(self):
+        """Yield ``(frame_number, frame)`` with 1-based frame numbers"""
+        while self.cap.isOpened():
+            start = time.perf_counter()
+            if self._next_frame is None:
+                step = max(1, int(self.step))
+                self._next_frame = (self.start_frame // step + 1) * step
+                if self.start_frame > 0:
+                    if not self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame):
+                        break
+                    self.frames_read = self.start_frame
+            if self.end_frame is not None and self._next_frame > self.end_frame:
+                break
+
+            gap = self._next_frame - self.frames_read - 1
+            if gap > 0 and self._should_seek(gap):
+                frame_count = self.frame_count
+                if 0 < frame_count < self._next_frame:
+                    # Nothing left to sample; account for the unread tail
+                    self.frames_read = frame_count
+                    break
+                if not self.cap.set(cv2.CAP_PROP_POS_FRAMES, self._next_frame - 1):
+                    break
+                self.frames_read = self._next_frame - 1
+            else:
+                while self.frames_read < self._next_frame - 1:
+                    if not self.cap.grab():
+                        return
+                    self.frames_read += 1
+
+            if not self.cap.grab():
+                break
+            self.frames_read += 1
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                break
+            self.frames_decoded += 1
+            if self.timings is not None:
+                self.timings.observe('decode', time.perf_counter() - start)
+                self.timings.count('frames_decoded')
+
+            yield self.frames_read, frame
+            # The consumer may change the step after seeing a frame
+            self._next_frame += max(1, int(self.step))
+
+    def release(self):
+        self.cap.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class FFmpegFrameReader:
+    """Drop-in for ``SampledFrameReader`` that decodes with an ``ffmpeg`` process.
+
+    ffmpeg's ``select`` filter keeps only the frames on the sampling grid
+    (the same 1-based frame numbers ``SampledFrameReader`` yields) and its
+    ``scale`` filter shrinks them to ``max_width``, so only sampled,
+    already-downscaled BGR frames cross the pipe. They are read into
+    ``buffer_count`` preallocated arrays used round-robin: a yielded frame
+    stays valid until ``buffer_count - 1`` further frames have been read.
+
+    ffmpeg starts on first iteration with the step set at that point. If the
+    consumer changes ``step`` later (adaptive sampling), set ``min_step``
+    to the smallest step it will use: ffmpeg then emits that finer grid and
+    frames are skipped here until the next requested one.
+
+    ``start_frame`` uses ffmpeg's input seeking, which assumes a constant
+    frame rate (as dashcam recordings have).
+    """
+
+    def __init__(self, video_path, step=1, start_frame=0, end_frame=None, timings=None,
+                 max_width=None, buffer_count=1):
+        # Stream properties come from OpenCV so both readers agree on them
+        cap = cv2.VideoCapture(video_path)
+        self._fps = cap.get(cv2.CAP_PROP_FPS)
+        self._frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
+
+        self.video_path = video_path
+        self.step = step
+        self.min_step = None
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.timings = timings
+        self.frames_read = 0
+        self.frames_decoded = 0
+
+        if max_width and width > max_width:
+            width, height = int(max_width), max(1, round(height * max_width / width))
+        self.size = (width, height)
+        self._buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(max(1, buffer_count))]
+        self._process = None
+
+    @property
+    def fps(self):
+        return self._fps
+
+    @property
+    def frame_count(self):
+        return self._frame_count
+
+    def command(self, grid_step):
+        """The ffmpeg command line emitting every ``grid_step``-th frame"""
+        command = [FFMPEG_PATH or 'ffmpeg', '-nostdin', '-loglevel', 'error']
+        if self.start_frame > 0 and self._fps > 0:
+            # Half a frame early so rounding never skips the first frame of the range
+            command += ['-ss', f'{(self.start_frame - 0.5) / self._fps:.6f}']
+        # n counts from 0 at the first decoded frame; frame numbers are 1-based
+        filters = [f"select='not(mod(n+{self.start_frame + 1}\\,{grid_step}))'"]
+        width, height = self.size
+        filters.append(f'scale={width}:{height}:flags=area')
+        command += [
+            '-i', self.video_path, '-an', '-sn',
+            '-vf', ','.join(filters), '-vsync', '0',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1'
+        ]
+        return command
+
+    def _read_into(self, buffer):
+        view = memoryview(buffer).cast('B')
+        filled = 0
+        while filled < len(view):
+            n = self._process.stdout.readinto(view[filled:])
+            if not n:
+                return False
+            filled += n
+        return True
+
+    def __iter__(self):
+        """Yield ``(frame_number, frame)`` with 1-based frame numbers"""
+        step = max(1, int(self.step))
+        grid_step = max(1, int(self.min_step or step))
+        self._process = subprocess.Popen(
+            self.command(grid_step), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            bufsize=self.size[0] * self.size[1] * 3
+        )
+        self.frames_read = self.start_frame
+        frame_number = (self.start_frame // grid_step) * grid_step
+        next_frame = (self.start_frame // step + 1) * step
+        index = 0
+        while True:
+            start = time.perf_counter()
+            frame_number += grid_step
+            if self.end_frame is not None and frame_number > self.end_frame:
+                self.frames_read = self.end_frame
+                break
+            buffer = self._buffers[index]
+            if not self._read_into(buffer):
+                # The stream ended; ffmpeg went through all of it
+                self.frames_read = max(self.frames_read, self._frame_count)
+                break
+            self.frames_read = frame_number
+            if frame_number < next_frame:
+                continue
+
+            index = (index + 1) % len(self._buffers)
+            self.frames_decoded += 1
+            if self.timings is not None:
+                self.timings.observe('decode', time.perf_counter() - start)
+                self.timings.count('frames_decoded')
+
+            yield frame_number, buffer
+            # The consumer may change the step after seeing a frame
+            next_frame = frame_number + max(1, int(self.step))
+        self.release()
+
+    def release(self):
+        if self._process is None:
+            return
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.stdout.close()
+        self._process.wait()
+        self._process = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class DecodeAheadReader:
+    """Decode frames on a background thread while the consumer analyzes earlier ones.
+
+    Wraps a ``SampledFrameReader``/``FFmpegFrameReader``. A producer thread
+    iterates the wrapped reader and hands frames over through a queue of at
+    most ``depth`` frames, so memory stays bounded while decoding of frame
+    N+k overlaps with inference on frame N (OpenCV, ffmpeg pipe reads and
+    MediaPipe all release the GIL). Frames and their order are exactly
+    those of the wrapped reader.
+
+    The sampling step is fixed once iteration starts, since the producer
+    runs ahead of the consumer. Time the consumer spends blocked on the
+    queue is recorded as the ``decode_wait`` stage.
+    """
+
+    _DONE = object()
+
+    def __init__(self, reader, depth=4):
+        self.reader = reader
+        self.depth = max(1, depth)
+        self.frames_read = 0
+        self._queue = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def fps(self):
+        return self.reader.fps
+
+    @property
+    def frame_count(self):
+        return self.reader.frame_count
+
+    @property
+    def start_frame(self):
+        return self.reader.start_frame
+
+    @property
+    def frames_decoded(self):
+        return self.reader.frames_decoded
+
+    @property
+    def step(self):
+        return self.reader.step
+
+    @step.setter
+    def step(self, value):
+        if self._thread is not None and value != self.reader.step:
+            raise RuntimeError("The sampling step can't change while decoding ahead")
+        self.reader.step = value
+
+    def _produce(self):
+        try:
+            for frame_number, frame in self.reader:
+                item = (frame_number, frame, self.reader.frames_read)
+                while not self._stop.is_set():
+                    try:
+                        self._queue.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if self._stop.is_set():
+                    return
+            self._put_final(self._DONE)
+        except Exception as e:
+            self._put_final(e)
+
+    def _put_final(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def __iter__(self):
+        """Yield ``(frame_number, frame)`` like the wrapped reader"""
+        self._queue = queue.Queue(maxsize=self.depth)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._produce, name='decode-ahead', daemon=True)
+        self._thread.start()
+        timings = self.reader.timings
+        try:
+            while True:
+                start = time.perf_counter()
+                item = self._queue.get()
+                if timings is not None:
+                    timings.observe('decode_wait', time.perf_counter() - start)
+                if item is self._DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                frame_number, frame, self.frames_read = item
+                yield frame_number, frame
+        finally:
+            self._join()
+        self.frames_read = self.reader.frames_read
+
+    def _join(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def release(self):
+        self._join()
+        self.reader.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class LiveFrameReader:
+    """Read a live source on a background thread, keeping only the newest frame.
+
+    ``source`` is a camera index, a video file or a named pipe. When the
+    consumer is slower than the source, frames it didn't get to in time are
+    overwritten and counted in ``frames_dropped``, so the frame it gets next
+    is never older than one analysis. ``follow`` keeps waiting for more
+    data at the end of a file that is still being written (for up to
+    ``idle_timeout`` seconds without a new frame). ``realtime`` paces reading
+    of a file at its frame rate, as if it came from a camera; it defaults
+    to on for files and off for cameras.
+    """
+
+    def __init__(self, source, follow=False, realtime=None, idle_timeout=10.0):
+        if isinstance(source, str) and source.isdigit():
+            source = int(source)
+        self.source = source
+        self.is_camera = isinstance(source, int)
+        self.follow = follow
+        # Cameras and pipes already deliver frames in real time
+        self.realtime = (not self.is_camera and os.path.isfile(source)) if realtime is None else realtime
+        self.idle_timeout = idle_timeout
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.fps = 0.0
+        self._latest = None
+        self._ended = False
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.source)
+        if self.frames_read and not self.is_camera:
+            # Reopened to pick up data appended since the last read. Files still
+            # being written often have no index to seek with; skip by decoding then
+            seeked = cap.set(cv2.CAP_PROP_POS_FRAMES, self.frames_read)
+            if not seeked or int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != self.frames_read:
+                cap.release()
+                cap = cv2.VideoCapture(self.source)
+                for _ in range(self.frames_read):
+                    if not cap.grab():
+                        break
+        return cap
+
+    def _capture(self):
+        cap = self._open()
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        started = time.monotonic()
+        last_frame = started
+        try:
+            while not self._stop.is_set():
+                ok, frame = cap.read()
+                if not ok:
+                    if self.follow and time.monotonic() - last_frame < self.idle_timeout:
+                        self._stop.wait(0.5)
+                        cap.release()
+                        cap = self._open()
+                        continue
+                    break
+                self.frames_read += 1
+                last_frame = time.monotonic()
+                with self._cond:
+                    if self._latest is not None:
+                        self.frames_dropped += 1
+                    self._latest = (self.frames_read, frame, last_frame)
+                    self._cond.notify()
+                if self.realtime:
+                    delay = started + self.frames_read / self.fps - time.monotonic()
+                    if delay > 0:
+                        self._stop.wait(delay)
+        finally:
+            cap.release()
+            with self._cond:
+                self._ended = True
+                self._cond.notify()
+
+    def __iter__(self):
+        """Yield ``(frame_number, frame, captured_at)``; ``captured_at`` is a ``time.monotonic()`` value"""
+        self._thread = threading.Thread(target=self._capture, name='live-capture', daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                with self._cond:
+                    while self._latest is None and not self._ended:
+                        self._cond.wait()
+                    item, self._latest = self._latest, None
+                if item is None:
+                    break
+                yield item
+        finally:
+            self.release()
+
+    def release(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def open_frame_reader(video_path, step=1, ffmpeg=False, max_width=None, start_frame=0, end_frame=None,
+                      timings=None, decode_ahead=0):
+    """Build the frame reader for an analysis.
+
+    ``FFmpegFrameReader`` when asked for and ffmpeg is installed, else
+    ``SampledFrameReader``; wrapped in a ``DecodeAheadReader`` with a queue
+    of ``decode_ahead`` frames when that is above 0.
+    """
+    reader = None
+    if ffmpeg:
+        if FFMPEG_PATH:
+            # Queued frames, the one being read and the one being analyzed each need a buffer
+            reader = FFmpegFrameReader(video_path, step, start_frame=start_frame, end_frame=end_frame,
+                                       timings=timings, max_width=max_width,
+                                       buffer_count=decode_ahead + 2 if decode_ahead > 0 else 1)
+        else:
+            print("ffmpeg not found, decoding with OpenCV")
+    if reader is None:
+        reader = SampledFrameReader(video_path, step, start_frame=start_frame, end_frame=end_frame, timings=timings)
+    if decode_ahead > 0:
+        reader = DecodeAheadReader(reader, decode_ahead)
+    return reader
@@ -0,0 +1,57 @@
+"""Image collection and parallel decoding for ``EnhancedVideoAnalyzer.analyze_images``."""
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'bmp', 'webp'}
+
+
+def find_images(directory):
+    """Image files under ``directory`` (searched recursively), sorted by path"""
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.rsplit('.', 1)[-1].lower() in IMAGE_EXTENSIONS:
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def image_name(image):
+    """Name reported for an image given as a path or a ``(name, bytes)`` pair"""
+    return image if isinstance(image, str) else image[0]
+
+
+def decode_image(image):
+    """BGR frame of a path or ``(name, encoded bytes)`` pair, None if it can't be decoded"""
+    if isinstance(image, str):
+        return cv2.imread(image)
+    data = np.frombuffer(image[1], dtype=np.uint8)
+    if not data.size:
+        return None
+    return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+
+def decode_images(images, threads=4):
+    """Decode images on ``threads`` threads, yielding ``(name, frame)`` in input order.
+
+    OpenCV releases the GIL while decoding, so later images decode while
+    the caller works on earlier ones. At most ``2 * threads`` decoded
+    images wait to be consumed.
+    """
+    if threads <= 1:
+        for image in images:
+            yield image_name(image), decode_image(image)
+        return
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='image-decode') as executor:
+        for image in images:
+            pending.append((image_name(image), executor.submit(decode_image, image)))
+            if len(pending) >= 2 * threads:
+                name, future = pending.popleft()
+                yield name, future.result()
+        while pending:
+            name, future = pending.popleft()
+            yield name, future.result()
@@ -0,0 +1,124 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+class QueueFullError(Exception):
+    """Raised when too many jobs are already waiting for a worker"""
+
+
+class AnalysisJob:
+    def __init__(self, filename):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = 'queued'
+        self.frames_done = 0
+        self.total_frames = 0
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+
+    def update_progress(self, frames_done, total_frames):
+        """Progress callback handed to ``analyze_video``"""
+        self.frames_done = frames_done
+        self.total_frames = total_frames
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def to_dict(self):
+        progress = 0.0
+        if self.status == 'done':
+            progress = 100.0
+        elif self.total_frames > 0:
+            progress = min(100.0, self.frames_done / self.total_frames * 100)
+
+        return {
+            'job_id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'progress': {
+                'frames_done': self.frames_done,
+                'total_frames': self.total_frames,
+                'percent': round(progress, 1)
+            },
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S') if self.started_at else None,
+            'finished_at': self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else None,
+            'result': self.result,
+            'error': self.error
+        }
+
+
+class JobQueue:
+    """Bounded pool of worker threads running analysis jobs in the background.
+
+    ``run_job(job, *args)`` does the actual work and returns the result dict;
+    it can report progress through ``job.update_progress``. At most
+    ``max_pending`` jobs may wait for a worker at once, so a burst of uploads
+    is rejected early instead of piling up on disk.
+    """
+
+    def __init__(self, run_job, workers=1, max_pending=32, keep_finished=256):
+        self.run_job = run_job
+        self.workers = workers
+        self.max_pending = max_pending
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analysis')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, filename, *args):
+        """Queue a job and return it immediately"""
+        job = AnalysisJob(filename)
+        with self._lock:
+            if self._count('queued') >= self.max_pending:
+                raise QueueFullError(f'{self.max_pending} jobs already waiting')
+            self._jobs[job.id] = job
+            self._forget_old_jobs()
+        self._executor.submit(self._run, job, *args)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queued': self._count('queued'),
+                'running': self._count('running'),
+                'done': self._count('done'),
+                'failed': self._count('failed'),
+                'workers': self.workers,
+                'max_pending': self.max_pending
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job, *args):
+        job.status = 'running'
+        job.started_at = datetime.now()
+        try:
+            job.result = self.run_job(job, *args)
+            job.status = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = datetime.now()
+
+    def _count(self, status):
+        return sum(1 for job in self._jobs.values() if job.status == status)
+
+    def _forget_old_jobs(self):
+        # Drop the oldest finished jobs so the table doesn't grow forever
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
@@ -0,0 +1,177 @@
+"""Per-frame landmark stores, for re-scoring videos without running MediaPipe again.
+
+With ``landmark_store`` set, the analyzers write the landmarks their
+heuristics read (plus the model's probability vectors) for every analyzed
+frame into a directory per video::
+
+    <store>/<video name>.<analyzer>.<path + config hash>.landmarks/
+        meta.json       analyzer, config, version, frame size, sampling, ...
+        frame.npy       int32 (N,)          frame numbers
+        weight.npy      int32 (N,)          video frames each sample stands for
+        gated.npy       bool (N,)           reused the previous frame's detections
+        face.npy        float32 (N, 7, 2)   FACE_POINTS x/y, NaN without a face
+        hands.npy       float32 (N, 2, 2, 2) up to two hands x HAND_POINTS x/y, NaN if absent
+        model.npy       float32 (M, C)      model probabilities (enhanced analyzer)
+        model_weight.npy int32 (M,)
+
+Each column is a plain ``.npy`` file, so it can be memory-mapped. The
+face/hand arrays are the same ones the analyzers' vectorized heuristics
+score, so the re-scoring entry point (``rescore_store`` or ``rescore.py``)
+rebuilds the full result dict from a store with the current heuristics
+and thresholds in a few array operations.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+STORE_VERSION = 1
+STORE_SUFFIX = '.landmarks'
+
+# Face mesh points used by the heuristics, and their rows in the face arrays
+FACE_POINTS = (1, 33, 61, 234, 263, 291, 454)
+NOSE_TIP, LEFT_EYE, MOUTH_LEFT, LEFT_EAR, RIGHT_EYE, MOUTH_RIGHT, RIGHT_EAR = range(len(FACE_POINTS))
+# Hand points used by the heuristics, and their rows in the hand arrays
+HAND_POINTS = (8, 9)
+INDEX_TIP, MIDDLE_BASE = range(len(HAND_POINTS))
+MAX_HANDS = 2
+
+
+def landmark_arrays(hand_results, face_results):
+    """One frame's MediaPipe results as ``(face, hands)`` arrays, NaN where nothing was found"""
+    # Gathered into lists first: one array construction beats per-row assignment
+    if face_results.multi_face_landmarks:
+        landmarks = face_results.multi_face_landmarks[0].landmark
+        face = np.array([(landmarks[index].x, landmarks[index].y) for index in FACE_POINTS], dtype=np.float32)
+    else:
+        face = np.full((len(FACE_POINTS), 2), np.nan, dtype=np.float32)
+    hand_points = [
+        [(hand_landmarks.landmark[index].x, hand_landmarks.landmark[index].y) for index in HAND_POINTS]
+        for hand_landmarks in (hand_results.multi_hand_landmarks or [])[:MAX_HANDS]
+    ]
+    hand_points += [[(np.nan, np.nan)] * len(HAND_POINTS)] * (MAX_HANDS - len(hand_points))
+    return face, np.array(hand_points, dtype=np.float32)
+
+
+class LandmarkRecorder:
+    """Collects the heuristics' landmark arrays for each analyzed frame in memory"""
+
+    def __init__(self):
+        self._frames = []
+        self._weights = []
+        self._gated = []
+        self._face = []
+        self._hands = []
+        # (height, width) of the frames the landmarks are relative to
+        self.frame_shape = None
+
+    def add_frame(self, frame_number, face, hands, weight=1, gated=False):
+        """Record an analyzed frame's ``landmark_arrays``"""
+        self._frames.append(frame_number)
+        self._weights.append(weight)
+        self._gated.append(gated)
+        self._face.append(face)
+        self._hands.append(hands)
+
+    def extend(self, other):
+        """Append another recorder's frames (e.g. the next video segment's)"""
+        self._frames.extend(other._frames)
+        self._weights.extend(other._weights)
+        self._gated.extend(other._gated)
+        self._face.extend(other._face)
+        self._hands.extend(other._hands)
+        self.frame_shape = self.frame_shape or other.frame_shape
+
+    def __len__(self):
+        return len(self._frames)
+
+    def columns(self, start=0):
+        """Column arrays of the recorded frames from ``start`` on"""
+        n = len(self._frames) - start
+        return {
+            'frame': np.array(self._frames[start:], dtype=np.int32),
+            'weight': np.array(self._weights[start:], dtype=np.int32),
+            'gated': np.array(self._gated[start:], dtype=bool),
+            'face': np.array(self._face[start:], dtype=np.float32).reshape(n, len(FACE_POINTS), 2),
+            'hands': np.array(self._hands[start:], dtype=np.float32).reshape(n, MAX_HANDS, len(HAND_POINTS), 2)
+        }
+
+
+def store_path(store_dir, video_path, analyzer, config=None):
+    """Where the store for ``video_path`` goes.
+
+    The hash covers the video's path and the analyzer settings that change
+    the recorded frames (``config``), so same-named videos, the two
+    analyzers and differently configured runs each get their own store.
+    """
+    name = os.path.splitext(os.path.basename(video_path))[0]
+    key = os.path.abspath(video_path) + '\n' + json.dumps(config or {}, sort_keys=True, default=str)
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:10]
+    return os.path.join(store_dir, f'{name}.{analyzer}.{digest}{STORE_SUFFIX}')
+
+
+def write_store(store_dir, video_path, recorder, meta, model_predictions=None, model_weights=None):
+    """Write a recorded video's columns and metadata, replacing an older store of the same video and config.
+
+    ``meta`` must name the ``analyzer`` and should carry its ``config``.
+    """
+    path = store_path(store_dir, video_path, meta['analyzer'], meta.get('config'))
+    columns = recorder.columns()
+    height, width = recorder.frame_shape or (0, 0)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    os.makedirs(tmp_path, exist_ok=True)
+    for name, values in columns.items():
+        np.save(os.path.join(tmp_path, f'{name}.npy'), values)
+    if model_predictions is not None and len(model_predictions):
+        np.save(os.path.join(tmp_path, 'model.npy'), np.asarray(model_predictions, dtype=np.float32))
+        np.save(os.path.join(tmp_path, 'model_weight.npy'), np.asarray(model_weights, dtype=np.int32))
+    meta = dict(meta, store_version=STORE_VERSION, video=os.path.abspath(video_path),
+                frames=len(columns['frame']), frame_width=width, frame_height=height)
+    with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_store(path, mmap=True):
+    """``(meta, columns)`` of a store; columns are memory-mapped unless ``mmap`` is False"""
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('store_version') != STORE_VERSION:
+        raise ValueError(f"{path}: unsupported landmark store version {meta.get('store_version')}")
+    columns = {}
+    for name in os.listdir(path):
+        if name.endswith('.npy'):
+            columns[name[:-4]] = np.load(os.path.join(path, name), mmap_mode='r' if mmap else None)
+    return meta, columns
+
+
+def find_stores(inputs):
+    """Store directories given directly or found (recursively) under the given directories"""
+    stores = set()
+    for root in inputs:
+        if root.rstrip(os.sep).endswith(STORE_SUFFIX):
+            stores.add(root.rstrip(os.sep))
+            continue
+        for dirpath, dirnames, _ in os.walk(root):
+            for name in list(dirnames):
+                if name.endswith(STORE_SUFFIX):
+                    stores.add(os.path.join(dirpath, name))
+                    dirnames.remove(name)
+    return sorted(stores)
+
+
+def rescore_store(path):
+    """Rebuild an analysis result from a landmark store with the current heuristics"""
+    meta, columns = read_store(path)
+    if meta['analyzer'] == 'EnhancedVideoAnalyzer':
+        from enhanced_analyzer import EnhancedVideoAnalyzer as analyzer_class
+    else:
+        from video_analyzer import VideoAnalyzer as analyzer_class
+    result = analyzer_class.rescore(meta, columns)
+    result['stats']['landmark_store'] = path
+    return result
@@ -0,0 +1,130 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _new_stage():
+    return {'count': 0, 'sum': 0.0, 'max': 0.0, 'buckets': [0] * len(LATENCY_BUCKETS)}
+
+
+class StageTimings:
+    """Per-stage latency histograms and event counters for one analysis"""
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage, seconds):
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = _new_stage()
+        entry['count'] += 1
+        entry['sum'] += seconds
+        entry['max'] = max(entry['max'], seconds)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                entry['buckets'][i] += 1
+                break
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        """Raw, picklable state (used to ship timings out of worker processes)"""
+        return {
+            'stages': {name: dict(entry, buckets=list(entry['buckets'])) for name, entry in self.stages.items()},
+            'counters': dict(self.counters)
+        }
+
+    def merge(self, snapshot):
+        for name, other in snapshot['stages'].items():
+            entry = self.stages.get(name)
+            if entry is None:
+                entry = self.stages[name] = _new_stage()
+            entry['count'] += other['count']
+            entry['sum'] += other['sum']
+            entry['max'] = max(entry['max'], other['max'])
+            entry['buckets'] = [a + b for a, b in zip(entry['buckets'], other['buckets'])]
+        for name, value in snapshot['counters'].items():
+            self.count(name, value)
+
+    def summary(self):
+        """Compact per-stage summary in milliseconds for result ``stats``"""
+        stages = {}
+        for name, entry in self.stages.items():
+            stages[name] = {
+                'count': entry['count'],
+                'total_ms': round(entry['sum'] * 1000, 2),
+                'mean_ms': round(entry['sum'] / entry['count'] * 1000, 3) if entry['count'] else 0.0,
+                'max_ms': round(entry['max'] * 1000, 3)
+            }
+        return {'counters': dict(self.counters), 'stages': stages}
+
+
+class MetricsRegistry:
+    """Process-wide totals of every analysis, exported in Prometheus text format"""
+
+    def __init__(self, prefix='driving_analysis'):
+        self.prefix = prefix
+        self._totals = StageTimings()
+        self._analyses = {}  # kind ('video', 'stream', 'image_batch') -> count
+        self._lock = threading.Lock()
+
+    def record(self, timings, kind='video'):
+        """Add one finished analysis of ``kind`` and its stage timings"""
+        snapshot = timings.snapshot()
+        with self._lock:
+            self._totals.merge(snapshot)
+            self._analyses[kind] = self._analyses.get(kind, 0) + 1
+
+    def render_prometheus(self):
+        with self._lock:
+            snapshot = self._totals.snapshot()
+            analyses = dict(self._analyses)
+
+        name = f'{self.prefix}_stage_seconds'
+        lines = [
+            f'# HELP {self.prefix}_videos_total Videos analyzed by this process.',
+            f'# TYPE {self.prefix}_videos_total counter',
+            f'{self.prefix}_videos_total {analyses.get("video", 0)}',
+            f'# HELP {self.prefix}_analyses_total Finished analyses by kind (video, stream, image_batch).',
+            f'# TYPE {self.prefix}_analyses_total counter',
+        ]
+        for kind, count in sorted(analyses.items()):
+            lines.append(f'{self.prefix}_analyses_total{{kind="{kind}"}} {count}')
+        for counter, value in sorted(snapshot['counters'].items()):
+            lines.append(f'# HELP {self.prefix}_{counter}_total Total {counter.replace("_", " ")}.')
+            lines.append(f'# TYPE {self.prefix}_{counter}_total counter')
+            lines.append(f'{self.prefix}_{counter}_total {value}')
+
+        lines.append(f'# HELP {name} Time spent in each analysis stage.')
+        lines.append(f'# TYPE {name} histogram')
+        for stage, entry in sorted(snapshot['stages'].items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, entry['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {entry["count"]}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {entry["sum"]:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {entry["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+def format_metric(name, value, help_text, metric_type='gauge'):
+    """Format a single unlabelled sample for the Prometheus text format"""
+    return f'# HELP {name} {help_text}\n# TYPE {name} {metric_type}\n{name} {value}\n'
+
+
+# Shared by every analyzer in the process
+REGISTRY = MetricsRegistry()
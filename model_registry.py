@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+
+def compile_inference_fn(model):
+    """Wrap a Keras model in a tf.function traced once for any batch size"""
+    import tensorflow as tf
+    input_shape = tuple(model.input_shape[1:])
+
+    @tf.function(input_signature=[tf.TensorSpec((None,) + input_shape, tf.float32)])
+    def infer(batch):
+        return model(batch, training=False)
+    return infer
+
+
+class ModelHandle:
+    """A loaded, warmed-up model shared by every analyzer in the process.
+
+    ``predict()`` may be called from any thread: Keras models run through a
+    compiled tf.function (safe to call concurrently) and TFLite models
+    serialize calls on their interpreter.
+    """
+
+    def __init__(self, model, path, backend):
+        self.model = model
+        self.path = path
+        self.backend = backend
+        self.input_shape = model.input_shape
+        self.output_shape = model.output_shape
+        self._infer = compile_inference_fn(model) if callable(model) else None
+        self.load_s = 0.0
+        self.warmup_s = 0.0
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        if self._infer is not None:
+            return self._infer(np.asarray(batch, dtype=np.float32)).numpy()
+        return self.model.predict(batch, batch_size=batch_size or len(batch), verbose=verbose)
+
+    def warm_up(self):
+        """Trace/allocate with a dummy batch so the first real call is not slow"""
+        start = time.perf_counter()
+        self.predict(np.zeros((1,) + tuple(self.input_shape[1:]), dtype=np.float32))
+        self.warmup_s = time.perf_counter() - start
+
+
+class ModelRegistry:
+    """Load each model file once per process and hand out shared handles.
+
+    Models are keyed by path, modification time, backend and quantization,
+    so replacing a model file loads the new version on the next request;
+    the registry then lets go of the older versions of that file.
+    """
+
+    def __init__(self):
+        self._handles = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_path, backend='keras', quantization='float16'):
+        """The shared handle for ``model_path``, loading and warming it up on first use"""
+        path, mtime = os.path.abspath(model_path), os.path.getmtime(model_path)
+        variant = (backend, quantization if backend == 'tflite' else None)
+        key = (path, mtime) + variant
+        # Loading is rare and slow; one lock keeps concurrent first requests from loading twice
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is None:
+                handle = self._load(model_path, backend, quantization)
+                # A replaced file's earlier versions would otherwise stay in memory for good
+                for stale in [k for k in self._handles if k[0] == path and k[2:] == variant]:
+                    del self._handles[stale]
+                self._handles[key] = handle
+        return handle
+
+    def _load(self, model_path, backend, quantization):
+        start = time.perf_counter()
+        if backend == 'tflite':
+            from tflite_backend import load_tflite_model
+            model = load_tflite_model(model_path, quantization)
+        elif backend == 'keras':
+            from tensorflow import keras
+            model = keras.models.load_model(model_path, compile=False)
+        else:
+            raise ValueError(f"Unknown model backend: {backend}")
+        handle = ModelHandle(model, model_path, backend)
+        handle.load_s = time.perf_counter() - start
+        handle.warm_up()
+        return handle
+
+    def preload(self, model_paths, backend='tflite', quantization='float16'):
+        """Load and warm models now, e.g. in a server's master process before it forks workers.
+
+        Forked workers then share the weights copy-on-write instead of each
+        loading its own copy. Only the TFLite backend survives a fork: once
+        TensorFlow has run, its thread pools hang in forked children, so
+        Keras models have to be loaded after the fork (or in spawned workers).
+        """
+        if backend == 'keras':
+            print("Preloading Keras models: TensorFlow is not fork-safe, don't fork after this")
+        return [self.get(path, backend, quantization) for path in model_paths if os.path.exists(path)]
+
+    def stats(self):
+        with self._lock:
+            handles = list(self._handles.values())
+        return [{
+            'path': handle.path,
+            'backend': handle.backend,
+            'load_s': round(handle.load_s, 3),
+            'warmup_s': round(handle.warmup_s, 3)
+        } for handle in handles]
+
+    def clear(self):
+        with self._lock:
+            self._handles.clear()
+
+
+# Shared by every analyzer in the process
+MODEL_REGISTRY = ModelRegistry()
@@ -0,0 +1,45 @@
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Detect sampled frames that barely differ from the last fully analyzed one.
+
+    Frames are compared on a tiny grayscale thumbnail against the reference
+    frame, i.e. the last frame that went through MediaPipe, so slow drift
+    accumulates until it crosses ``threshold`` instead of being missed.
+    ``threshold`` is the mean absolute gray-level difference (0-255). At most
+    ``max_reuse`` frames in a row are skipped before a fresh analysis is forced.
+    """
+
+    def __init__(self, threshold=2.0, size=(64, 36), max_reuse=10):
+        self.threshold = threshold
+        self.size = size
+        self.max_reuse = max_reuse
+        self._small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        self._gray = np.empty((size[1], size[0]), dtype=np.uint8)
+        self._reference = np.empty((size[1], size[0]), dtype=np.uint8)
+        self._diff = np.empty((size[1], size[0]), dtype=np.uint8)
+        self._has_reference = False
+        self._reused = 0
+
+    def reset(self):
+        self._has_reference = False
+        self._reused = 0
+
+    def is_static(self, frame):
+        """True if the previous frame's results can be reused for this BGR frame"""
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+        if self._has_reference and self._reused < self.max_reuse:
+            cv2.absdiff(self._gray, self._reference, dst=self._diff)
+            if cv2.mean(self._diff)[0] < self.threshold:
+                self._reused += 1
+                return True
+
+        # This frame gets analyzed and becomes the new reference
+        self._gray, self._reference = self._reference, self._gray
+        self._has_reference = True
+        self._reused = 0
+        return False
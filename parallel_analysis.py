@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Per-process analyzer, created once by the pool initializer
+_worker_analyzer = None
+
+_executor = None
+_executor_processes = None
+_executor_lock = threading.Lock()
+
+
+def _init_worker():
+    global _worker_analyzer
+    # Imported here: video_analyzer imports this module
+    from video_analyzer import VideoAnalyzer
+    _worker_analyzer = VideoAnalyzer()
+
+
+def _analyze_segment(video_path, start_frame, end_frame, frame_skip, options):
+    # Apply the caller's analyzer settings; every segment starts from fresh tracking state
+    for name, value in options.items():
+        setattr(_worker_analyzer, name, value)
+    _worker_analyzer.reset()
+    return _worker_analyzer.analyze_segment(video_path, start_frame, end_frame, frame_skip)
+
+
+def _get_executor(processes):
+    """Reuse one process pool so workers only load MediaPipe once"""
+    global _executor, _executor_processes
+    with _executor_lock:
+        if _executor is None or _executor_processes != processes:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            # spawn: forking a process that already runs MediaPipe/TF threads is unsafe
+            _executor = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker
+            )
+            _executor_processes = processes
+        return _executor
+
+
+def split_frames(total_frames, segments):
+    """Split frames 1..total_frames into contiguous (start_frame, end_frame) ranges"""
+    segments = max(1, min(segments, total_frames))
+    bounds = [total_frames * i // segments for i in range(segments + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def analyze_video_segments(video_path, total_frames, frame_skip, segments, processes=None, progress_callback=None, timings=None, options=None,
+                           recorder=None):
+    """Analyze a video as ``segments`` time ranges in parallel and merge their counters.
+
+    Each worker process owns its own MediaPipe graphs and seeks to the start
+    of its range. Sampling stays on the whole-video grid, so the merged
+    counters cover the same frames as a sequential pass; only tracking state
+    is restarted at each segment boundary. Worker stage timings are merged
+    into ``timings`` when given. ``options`` are analyzer attributes (such
+    as ``motion_threshold``) applied to the worker analyzers. When the
+    workers record landmarks (``landmark_store``), their recordings are
+    appended to ``recorder`` in frame order.
+    """
+    processes = processes or min(segments, os.cpu_count() or 1)
+    executor = _get_executor(processes)
+
+    futures = {
+        executor.submit(_analyze_segment, video_path, start, end, frame_skip, options or {}): (start, end)
+        for start, end in split_frames(total_frames, segments)
+    }
+
+    merged = {}
+    recordings = {}
+    frames_done = 0
+    for future in as_completed(futures):
+        counters, timing_snapshot, recording = future.result()
+        for name, value in counters.items():
+            merged[name] = merged.get(name, 0) + value
+        if timings is not None:
+            timings.merge(timing_snapshot)
+        start, end = futures[future]
+        recordings[start] = recording
+        frames_done += end - start
+        if progress_callback is not None:
+            progress_callback(frames_done, total_frames)
+    if recorder is not None:
+        for start in sorted(recordings):
+            if recordings[start] is not None:
+                recorder.extend(recordings[start])
+    return merged
@@ -0,0 +1,51 @@
+"""Rebuild analysis results from landmark stores with the current heuristics.
+
+    python batch_analyze.py /data/trips --output results.jsonl --landmark-store /data/landmarks
+    # ...tune thresholds in the analyzers, then:
+    python rescore.py /data/landmarks --output rescored.jsonl
+
+No MediaPipe and no model run: every video is scored from the landmarks
+and model probabilities its first analysis stored, one JSON line each.
+"""
+import argparse
+import json
+import sys
+import time
+
+from landmark_store import find_stores, rescore_store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Re-score landmark stores into a JSONL file')
+    parser.add_argument('stores', nargs='+', help='store directories, or directories searched (recursively) for them')
+    parser.add_argument('--output', default=None, help='JSONL file to write (default: stdout)')
+    args = parser.parse_args(argv)
+
+    stores = find_stores(args.stores)
+    print(f'{len(stores)} landmark stores found', file=sys.stderr)
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    # Heuristic log lines would end up between the JSON lines
+    log, sys.stdout = sys.stdout, sys.stderr
+
+    start = time.perf_counter()
+    failed = 0
+    try:
+        for path in stores:
+            try:
+                result = rescore_store(path)
+                record = {'store': path, 'status': 'ok', 'result': result}
+            except Exception as e:
+                record = {'store': path, 'status': 'error', 'error': f'{type(e).__name__}: {e}'}
+                failed += 1
+            out.write(json.dumps(record) + '\n')
+    finally:
+        sys.stdout = log
+        if args.output:
+            out.close()
+    wall = time.perf_counter() - start
+    print(f'Re-scored {len(stores) - failed} stores in {wall:.2f}s, {failed} errors', file=sys.stderr)
+    return 0 if not failed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
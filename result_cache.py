@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """Analysis results keyed by video content and analyzer configuration.
+
+    Results live in an in-memory LRU and, when ``cache_dir`` is set, in
+    JSON files on disk. The disk tier is trimmed oldest-first once it grows
+    past ``max_disk_bytes``; reads refresh a file's mtime, so eviction is
+    least-recently-used there as well.
+    """
+
+    def __init__(self, max_entries=128, cache_dir=None, max_disk_bytes=512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+
+        if self.cache_dir and not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    @staticmethod
+    def make_key(video_path, config):
+        """Hash the file's bytes together with the analyzer configuration"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps(config, sort_keys=True).encode('utf-8'))
+        with open(video_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return json.loads(self._memory[key])
+
+        result = self._read_disk(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, json.dumps(result))
+        return result
+
+    def put(self, key, result):
+        # Stored serialized so callers can't mutate cached results
+        data = json.dumps(result)
+        with self._lock:
+            self._remember(key, data)
+        self._write_disk(key, data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups * 100, 1) if lookups else 0.0,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'memory_entries': len(self._memory),
+                'max_entries': self.max_entries,
+                'disk_bytes': self._disk_usage()[0] if self.cache_dir else 0,
+                'max_disk_bytes': self.max_disk_bytes if self.cache_dir else 0
+            }
+
+    def _remember(self, key, data):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            os.utime(path)
+            return result
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, data):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write cache entry {key}: {e}")
+            return
+        self._evict_disk()
+
+    def _disk_usage(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        return sum(size for _, size, _ in entries), entries
+
+    def _evict_disk(self):
+        total, entries = self._disk_usage()
+        for _, size, name in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,39 @@
+"""Analyze a live source and print one JSON verdict per line.
+
+    python stream_analyze.py 0                          # first camera
+    python stream_analyze.py /tmp/dashcam.fifo --window 10
+    python stream_analyze.py recording.mkv --follow      # file still being written
+"""
+import argparse
+import json
+import sys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rolling-window driving behavior verdicts for a live source')
+    parser.add_argument('source', help='camera index, video file or named pipe')
+    parser.add_argument('--window', type=float, default=5.0, help='seconds of frames each verdict covers')
+    parser.add_argument('--every', type=float, default=1.0, help='seconds between verdicts')
+    parser.add_argument('--follow', action='store_true', help='wait for more data at the end of the file')
+    parser.add_argument('--realtime', choices=['auto', 'on', 'off'], default='auto',
+                        help='pace file reading at the video frame rate (auto: on for regular files)')
+    parser.add_argument('--max-processing-width', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    # Analyzer log lines would break the JSON output
+    stdout, sys.stdout = sys.stdout, sys.stderr
+    from video_analyzer import VideoAnalyzer
+    analyzer = VideoAnalyzer(max_processing_width=args.max_processing_width)
+
+    realtime = {'auto': None, 'on': True, 'off': False}[args.realtime]
+    try:
+        for verdict in analyzer.analyze_stream(args.source, args.window, args.every, args.follow, realtime):
+            stdout.write(json.dumps(verdict) + '\n')
+            stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
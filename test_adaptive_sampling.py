@@ -0,0 +1,128 @@
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+from adaptive_sampling import AdaptiveSampler
+from landmark_store import (FACE_POINTS, HAND_POINTS, LEFT_EYE, MAX_HANDS, NOSE_TIP, RIGHT_EYE, LandmarkRecorder,
+                            read_store)
+
+print("=== Adaptive Sampling Test ===\n")
+
+
+def test_steps_follow_detection_changes():
+    sampler = AdaptiveSampler(30)
+    assert (sampler.coarse_step, sampler.dense_step, sampler.dense_hold) == (15, 3, 30)
+    assert AdaptiveSampler(0).coarse_step == 15, "unknown fps is taken as 30"
+    assert AdaptiveSampler(30, coarse_step=4, dense_step=10).dense_step == 4, "dense is never coarser"
+
+    quiet = (0, 0, 0)
+    assert sampler.step == 15
+    assert sampler.update(15, quiet) == 15
+    assert sampler.update(30, quiet) == 15
+    # A change in the detections switches to the dense step...
+    assert sampler.update(45, (1, 0, 0)) == 3
+    # ...which holds while the state keeps changing and for dense_hold frames after
+    assert sampler.update(48, (1, 0, 0)) == 3
+    assert sampler.update(51, (1, 1, 0)) == 3
+    steps = [sampler.update(frame, (1, 1, 0)) for frame in range(54, 81, 3)]
+    assert steps == [3] * 9, steps
+    # Then the step doubles back up to coarse
+    assert sampler.update(81, (1, 1, 0)) == 6
+    assert sampler.update(87, (1, 1, 0)) == 12
+    assert sampler.update(99, (1, 1, 0)) == 15
+    assert sampler.update(114, (1, 1, 0)) == 15
+    print("   [OK] coarse until a detection changes, dense for dense_hold frames, then doubling back")
+
+
+def test_mark_change():
+    sampler = AdaptiveSampler(30)
+    sampler.update(15, (0, 0, 0))
+    sampler.mark_change(20)
+    assert sampler.step == 3
+    # Unchanged detections don't end the dense period early
+    assert sampler.update(23, (0, 0, 0)) == 3
+    assert sampler.update(49, (0, 0, 0)) == 3
+    assert sampler.update(50, (0, 0, 0)) == 6
+    assert sampler.update(56, (0, 0, 0)) == 12
+    # A new mark restarts the hold
+    sampler.mark_change(60)
+    assert sampler.update(63, (0, 0, 0)) == 3
+    print("   [OK] mark_change densifies for dense_hold frames and then decays")
+
+
+def test_counts_weighted_by_covered_time():
+    from video_analyzer import VideoAnalyzer
+
+    def face(distracted):
+        points = np.full((len(FACE_POINTS), 2), 0.5, dtype=np.float32)
+        points[LEFT_EYE, 0], points[RIGHT_EYE, 0] = 0.4, 0.6
+        points[NOSE_TIP, 0] = 0.6 if distracted else 0.5
+        return points
+
+    no_hands = np.full((MAX_HANDS, len(HAND_POINTS), 2), np.nan, dtype=np.float32)
+    recorder = LandmarkRecorder()
+    recorder.frame_shape = (480, 640)
+    # Coarse samples covering 15 frames each, dense ones 3 frames around a glance away
+    for frame, weight, distracted in ((15, 15, False), (30, 15, False), (33, 3, True), (36, 3, True),
+                                      (39, 3, True), (42, 3, False), (57, 15, False)):
+        recorder.add_frame(frame, face(distracted), no_hands, weight)
+
+    analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+    analyzer.adaptive_sampling = True
+    counters = analyzer._count_detections(recorder.columns(), recorder.frame_shape)
+    assert counters['distracted_frames'] == 9 and counters['covered_frames'] == 57, counters
+    assert counters['face_detected_frames'] == 57 and counters['analyzed_frames'] == 7, counters
+    stats = analyzer._build_result(counters, 57)['stats']
+    # 9 of 57 video frames, not 3 of 7 samples
+    assert stats['distraction'] == round(9 / 57 * 100, 1), stats
+    print("   [OK] detections count for the video time their sample covers")
+
+
+class ColorModel:
+    """Stub model whose top class is 0 on dark frames and 1 on bright ones"""
+    input_shape = (None, 32, 32, 3)
+    output_shape = (None, 10)
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        bright = batch.mean(axis=(1, 2, 3)) > 0.5
+        predictions = np.full((len(batch), 10), 0.02, dtype=np.float32)
+        predictions[np.arange(len(batch)), bright.astype(int)] = 0.82
+        return predictions
+
+
+def test_model_class_change_densifies_at_the_change():
+    from enhanced_analyzer import EnhancedVideoAnalyzer
+
+    flip = 150
+    with tempfile.TemporaryDirectory() as tmp:
+        video = os.path.join(tmp, 'trip.avi')
+        writer = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*'MJPG'), 30, (64, 48))
+        for i in range(1, 301):
+            writer.write(np.full((48, 64, 3), 40 if i < flip else 220, dtype=np.uint8))
+        writer.release()
+
+        analyzer = EnhancedVideoAnalyzer(adaptive_sampling=True, landmark_store=os.path.join(tmp, 'store'))
+        analyzer.driver_model = ColorModel()
+        result = analyzer.analyze_video(video)
+        _, columns = read_store(result['stats']['landmark_store'])
+
+    frames = [int(frame) for frame in columns['frame']]
+    # 30 fps: coarse step 15, dense step 3
+    assert frames[:10] == list(range(15, flip + 1, 15)), frames
+    assert frames[10:13] == [flip + 3, flip + 6, flip + 9], frames
+    print(f"   [OK] dense sampling starts at the frame the model's top class changes on ({flip})")
+
+
+if __name__ == '__main__':
+    try:
+        test_steps_follow_detection_changes()
+        test_mark_change()
+        test_counts_weighted_by_covered_time()
+        test_model_class_change_densifies_at_the_change()
+    except AssertionError as e:
+        print(f"   [FAIL] {e}")
+        sys.exit(1)
+    print("\n=== Test Complete ===")
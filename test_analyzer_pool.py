@@ -0,0 +1,92 @@
+import queue
+import sys
+import threading
+import time
+
+from analyzer_pool import AnalyzerPool
+
+print("=== Analyzer Pool Test ===\n")
+
+
+class FakeAnalyzer:
+    def __init__(self, fail_reset=False):
+        self.fail_reset = fail_reset
+
+    def reset(self):
+        if self.fail_reset:
+            raise RuntimeError('graph crashed')
+
+
+def checkout_in_thread(pool):
+    """Start a checkout on another thread; returns (thread, result list)"""
+    got = []
+    thread = threading.Thread(target=lambda: got.append(pool.checkout(timeout=5)), daemon=True)
+    thread.start()
+    time.sleep(0.1)  # let it block
+    return thread, got
+
+
+def test_waiter_rebuilds_after_discarded_analyzer():
+    built = []
+    pool = AnalyzerPool(lambda: built.append(FakeAnalyzer(fail_reset=not built)) or built[-1], size=1)
+    broken = pool.checkout()
+    thread, got = checkout_in_thread(pool)
+    assert not got, "checkout should wait while the only analyzer is in use"
+    pool.checkin(broken)  # reset fails, analyzer is discarded
+    thread.join(5)
+    assert got and got[0] is built[1], "waiter did not build a replacement"
+    assert pool.stats()['created'] == 1
+    print("   [OK] waiter builds a replacement for a discarded analyzer")
+
+
+def test_waiter_retries_after_factory_failure():
+    started = threading.Event()
+    proceed = threading.Event()
+    calls = []
+
+    def factory():
+        calls.append(1)
+        if len(calls) == 1:
+            started.set()
+            proceed.wait(5)
+            raise RuntimeError('model failed to load')
+        return FakeAnalyzer()
+
+    pool = AnalyzerPool(factory, size=1)
+    errors = []
+    first = threading.Thread(target=lambda: errors.append(_raises(pool.checkout)), daemon=True)
+    first.start()
+    started.wait(5)
+    thread, got = checkout_in_thread(pool)
+    assert not got, "second checkout should wait while the only slot is being built"
+    proceed.set()
+    first.join(5)
+    thread.join(5)
+    assert errors == [True] and got, "waiter did not build after the factory failed"
+    print("   [OK] waiter builds after another checkout's factory failed")
+
+
+def test_checkout_timeout():
+    pool = AnalyzerPool(FakeAnalyzer, size=1)
+    pool.checkout()
+    assert _raises(lambda: pool.checkout(timeout=0.05), queue.Empty)
+    print("   [OK] exhausted pool times out with queue.Empty")
+
+
+def _raises(call, error=Exception):
+    try:
+        call()
+    except error:
+        return True
+    return False
+
+
+if __name__ == '__main__':
+    try:
+        test_waiter_rebuilds_after_discarded_analyzer()
+        test_waiter_retries_after_factory_failure()
+        test_checkout_timeout()
+    except AssertionError as e:
+        print(f"   [FAIL] {e}")
+        sys.exit(1)
+    print("\n=== Test Complete ===")
@@ -0,0 +1,102 @@
+import importlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+print("=== App Test ===\n")
+
+
+def fresh_app(**config):
+    """The app module with no services started yet and ``config`` applied"""
+    import app as app_module
+    app_module = importlib.reload(app_module)
+    app_module.app.config.update(ANALYSIS_WORKERS=1, ANALYZER_POOL_SIZE=1, **config)
+    return app_module
+
+
+def test_ready_without_warmup():
+    app_module = fresh_app(ANALYZER_WARMUP=0)
+    response = app_module.app.test_client().get('/ready')
+    body = response.get_json()
+    assert response.status_code == 200, body
+    assert body['warmup']['status'] == 'disabled' and body['analyzers']['built'] == 0, body
+    print("   [OK] /ready lets traffic through when the first upload builds the analyzer")
+
+
+def test_ready_after_warmup():
+    app_module = fresh_app(ANALYZER_WARMUP=1)
+    client = app_module.app.test_client()
+    deadline = time.monotonic() + 60
+    response = client.get('/ready')
+    while response.status_code != 200 and time.monotonic() < deadline:
+        assert response.get_json()['warmup']['status'] in ('pending', 'warming'), response.get_json()
+        time.sleep(0.1)
+        response = client.get('/ready')
+    body = response.get_json()
+    assert response.status_code == 200, body
+    assert body['analyzers']['built'] >= 1, body
+    print("   [OK] /ready turns 200 once the warm-up has built an analyzer")
+
+
+def test_images_limit():
+    app_module = fresh_app(ANALYZER_WARMUP=0)
+    client = app_module.app.test_client()
+    limit = app_module.app.config['IMAGE_BATCH_MAX_IMAGES']
+    assert limit == 200, limit
+
+    response = client.post('/images', data={'files': [(io.BytesIO(b'x'), f'{i}.jpg') for i in range(limit + 1)]})
+    assert response.status_code == 413, response.get_json()
+    assert 'at most 200' in response.get_json()['error']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, 'day'))
+        for i in range(limit + 1):
+            open(os.path.join(tmp, 'day', f'{i}.jpg'), 'wb').close()
+        app_module.app.config['IMAGE_DIRECTORY_ROOT'] = tmp
+        response = client.post('/images', json={'directory': 'day'})
+    assert response.status_code == 413, response.get_json()
+    print("   [OK] /images refuses more than IMAGE_BATCH_MAX_IMAGES uploaded or listed images with 413")
+
+
+def test_images_directory_root():
+    app_module = fresh_app(ANALYZER_WARMUP=0)
+    client = app_module.app.test_client()
+    response = client.post('/images', json={'directory': 'day'})
+    assert response.status_code == 403 and 'disabled' in response.get_json()['error'], response.get_json()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root, outside = os.path.join(tmp, 'root'), os.path.join(tmp, 'outside')
+        for directory in (os.path.join(root, 'day', 'cab'), outside):
+            os.makedirs(directory)
+        cv2.imwrite(os.path.join(root, 'day', 'cab', 'a.jpg'), np.full((80, 120, 3), 90, dtype=np.uint8))
+        cv2.imwrite(os.path.join(outside, 'b.jpg'), np.full((80, 120, 3), 90, dtype=np.uint8))
+        os.symlink(outside, os.path.join(root, 'link'))
+        app_module.app.config['IMAGE_DIRECTORY_ROOT'] = root
+
+        for directory in ('../outside', outside, 'link', 'day/../../outside', 'missing', 'day/cab/a.jpg'):
+            response = client.post('/images', json={'directory': directory})
+            assert response.status_code == 403, (directory, response.get_json())
+
+        response = client.post('/images', data={'directory': 'day'})
+        body = response.get_json()
+        assert response.status_code == 200, body
+        # Named relative to the root, not by their server path
+        assert [result['image'] for result in body['results']] == ['day/cab/a.jpg'], body['results']
+    print("   [OK] /images only reads directories inside IMAGE_DIRECTORY_ROOT and names images relative to it")
+
+
+if __name__ == '__main__':
+    try:
+        test_ready_without_warmup()
+        test_ready_after_warmup()
+        test_images_limit()
+        test_images_directory_root()
+    except AssertionError as e:
+        print(f"   [FAIL] {e}")
+        sys.exit(1)
+    print("\n=== Test Complete ===")
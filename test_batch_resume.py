@@ -0,0 +1,109 @@
+import json
+import os
+import sys
+import tempfile
+from unittest import mock
+
+import batch_analyze
+from batch_analyze import find_videos, read_done, run_batch
+
+print("=== Batch Resume Test ===\n")
+
+
+def test_read_done():
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'results.jsonl')
+        assert read_done(output) == set()
+
+        records = [
+            {'path': 'a.mp4', 'status': 'ok'},
+            {'path': 'b.mp4', 'status': 'error'},
+            {'path': 'c.mp4', 'status': 'timeout'},
+            {'path': 'd.mp4', 'status': 'error'},
+            {'path': 'd.mp4', 'status': 'ok'},  # failed once, done on a retry
+        ]
+        with open(output, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+            # Interrupted while writing the last line
+            f.write('{"path": "e.mp4", "sta')
+
+        absolute = {name: os.path.abspath(f'{name}.mp4') for name in 'abcd'}
+        assert read_done(output) == {absolute[name] for name in 'abcd'}
+        assert read_done(output, retry_failed=True) == {absolute['a'], absolute['d']}
+    print("   [OK] finished videos are skipped, failed ones only without --retry-failed, cut lines redone")
+
+
+def test_resume_with_other_path_spelling():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, 'trips'))
+        for name in ('a.mp4', 'b.mp4'):
+            open(os.path.join(tmp, 'trips', name), 'w').close()
+        output = os.path.join(tmp, 'results.jsonl')
+        with open(output, 'w', encoding='utf-8') as f:
+            # Recorded by a run started from tmp with a relative directory
+            f.write(json.dumps({'path': os.path.join(tmp, 'trips', 'a.mp4'), 'status': 'ok'}) + '\n')
+
+        cwd = os.getcwd()
+        try:
+            os.chdir(tmp)
+            for inputs, expected in ((['trips'], ['b.mp4']), (['trips/*.mp4'], ['b.mp4']),
+                                     ([os.path.join(tmp, 'trips')], ['b.mp4']), (['./trips/../trips/a.mp4'], [])):
+                videos = find_videos(inputs)
+                assert all(os.path.isabs(path) for path in videos), videos
+                todo = [os.path.basename(path) for path in videos if path not in read_done(output)]
+                assert todo == expected, (inputs, todo)
+        finally:
+            os.chdir(cwd)
+    print("   [OK] resuming with a relative path or another glob skips the recorded videos")
+
+
+def test_find_videos():
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ('trip1.mp4', 'sub/trip2.MOV', 'sub/notes.txt', 'sub/deeper/trip3.avi'):
+            path = os.path.join(tmp, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, 'w').close()
+        found = [os.path.relpath(path, tmp) for path in find_videos([tmp])]
+        assert found == ['sub/deeper/trip3.avi', 'sub/trip2.MOV', 'trip1.mp4'], found
+        found = [os.path.relpath(path, tmp) for path in find_videos([os.path.join(tmp, '*.mp4')])]
+        assert found == ['trip1.mp4'], found
+    print("   [OK] directories are searched recursively, globs expanded")
+
+
+class CrashingWorker(batch_analyze._Worker):
+    """Worker whose process dies on startup without a word, like a native crash"""
+    spawned = 0
+
+    def __init__(self, ctx, worker_id, results, analyzer_name, options):
+        CrashingWorker.spawned += 1
+        self.id = worker_id
+        self.tasks = ctx.Queue()
+        self.process = ctx.Process(target=os._exit, args=(3,), daemon=True)
+        self.process.start()
+        self.ready = False
+        self.path = None
+        self.started = None
+
+
+def test_startup_crashes_fail_the_batch():
+    with tempfile.TemporaryDirectory() as tmp, mock.patch.object(batch_analyze, '_Worker', CrashingWorker):
+        try:
+            run_batch([f'{tmp}/{i}.mp4' for i in range(10)], os.path.join(tmp, 'results.jsonl'), workers=2)
+            assert False, "the batch should have failed"
+        except RuntimeError as e:
+            assert 'died before analyzing a video' in str(e) and 'exit code 3' in str(e), e
+    assert CrashingWorker.spawned <= batch_analyze.MAX_STARTUP_FAILURES + 2, CrashingWorker.spawned
+    print(f"   [OK] workers that keep dying on startup fail the batch ({CrashingWorker.spawned} started)")
+
+
+if __name__ == '__main__':
+    try:
+        test_read_done()
+        test_find_videos()
+        test_resume_with_other_path_spelling()
+        test_startup_crashes_fail_the_batch()
+    except AssertionError as e:
+        print(f"   [FAIL] {e}")
+        sys.exit(1)
+    print("\n=== Test Complete ===")
@@ -0,0 +1,140 @@
+import contextlib
+import io
+import sys
+
+import numpy as np
+
+from early_exit import EarlyExit
+from landmark_store import LandmarkRecorder
+
+print("=== Early Exit Test ===\n")
+
+COUNTERS = ('phone_frames', 'radio_frames', 'distracted_frames', 'face_detected_frames')
+
+
+def test_final_range():
+    exact = EarlyExit()
+    assert exact.final_range(3, 10, 90) == (3, 93)
+    assert exact.final_range(0, 10, 0) == (0, 0)
+
+    bounded = EarlyExit(confidence=0.95, min_samples=30)
+    # Too few samples for the interval: falls back to the exact bounds
+    assert bounded.final_range(3, 20, 80) == (3, 83)
+    low, high = bounded.final_range(30, 100, 900)
+    assert 30 < low < 30 + 0.3 * 900 < high < 30 + 900, (low, high)
+    # Weighted samples: the interval width follows the sample count, not the weight
+    wide = bounded.final_range(300, 1000, 9000, samples=40)
+    narrow = bounded.final_range(300, 1000, 9000, samples=400)
+    assert wide[0] < narrow[0] < narrow[1] < wide[1], (wide, narrow)
+    # Rates of 0 and 1 stay inside [0, 1]
+    assert bounded.final_range(0, 100, 100)[0] == 0
+    assert bounded.final_range(100, 100, 100)[1] == 200
+    print("   [OK] exact bounds, Wilson ranges and the min_samples fallback")
+
+
+def test_settled_video_verdicts_match_full_video():
+    from video_analyzer import VideoAnalyzer
+
+    # _verdict only needs the thresholds, not MediaPipe graphs
+    analyzer = VideoAnalyzer.__new__(VideoAnalyzer)
+    analyzer.adaptive_sampling = False
+    early_exit = EarlyExit()
+    rng = np.random.default_rng(2)
+    stops = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(3000):
+            samples = int(rng.integers(30, 300))
+            hits = rng.random((samples, len(COUNTERS))) < rng.uniform(0, 1, len(COUNTERS)) * [0.5, 0.5, 0.6, 1]
+            full = analyzer._verdict(dict(zip(COUNTERS, hits.sum(0).tolist())), samples)
+            for seen in range(early_exit.check_every, samples, early_exit.check_every):
+                counts = dict(zip(COUNTERS, hits[:seen].sum(0).tolist()))
+                if early_exit.settled(analyzer._verdict, counts, seen, samples - seen):
+                    stops += 1
+                    assert analyzer._verdict(counts, seen) == full, (seen, samples, counts)
+                    break
+    assert stops > 300, stops
+    print(f"   [OK] {stops} early stops, each on the full video's verdict")
+
+
+class FlagAnalyzer:
+    """Enhanced analyzer whose heuristics read phone/radio/distraction bits off the nose x coordinate"""
+
+    @staticmethod
+    def _score_frames(face, hands, frame_shape, timings=None):
+        flags = np.nan_to_num(face[:, 0, 0]).astype(int)
+        return flags & 1 > 0, flags & 2 > 0, flags & 4 > 0
+
+
+def test_settled_enhanced_verdicts_match_full_video():
+    from enhanced_analyzer import EnhancedVideoAnalyzer
+
+    analyzer_cls = type('FlagEnhancedAnalyzer', (FlagAnalyzer, EnhancedVideoAnalyzer), {})
+    analyzer = analyzer_cls.__new__(analyzer_cls)
+    rng = np.random.default_rng(1)
+    stops = 0
+
+    def run(flags, predictions, frames, weights, total, adaptive, stop):
+        recorder = LandmarkRecorder()
+        recorder.frame_shape = (100, 100)
+        early_exit = EarlyExit()
+        counts = None
+        model_predictions, prediction_weights = [], []
+        for i, frame_number in enumerate(frames):
+            face = np.full((7, 2), np.nan, np.float32)
+            face[0, 0] = flags[i]
+            recorder.add_frame(int(frame_number), face, np.full((2, 2, 2), np.nan, np.float32), int(weights[i]))
+            # Model predictions lag a batch behind, as they do with asynchronous inference
+            if predictions is not None:
+                while len(model_predictions) < i + 1 - 32:
+                    model_predictions.append(predictions[len(model_predictions)])
+                    prediction_weights.append(int(weights[len(prediction_weights)]))
+            if stop and early_exit.due(len(recorder)):
+                counts = analyzer._update_counts(counts, recorder, None)
+                if analyzer._verdict_settled(early_exit, counts, model_predictions, prediction_weights,
+                                             int(frame_number), total, adaptive):
+                    early_exit.stopped_at = int(frame_number)
+                    break
+        analyzed = len(recorder)
+        model_predictions = list(predictions[:analyzed]) if predictions is not None else []
+        prediction_weights = [int(w) for w in weights[:analyzed]] if predictions is not None else []
+        total_frames = early_exit.stopped_at or total
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = analyzer._combine_results(total_frames, recorder.columns(), recorder.frame_shape,
+                                               model_predictions, prediction_weights,
+                                               'adaptive' if adaptive else 'fixed')
+        return (result['behaviors'], result['risk_level']), early_exit.stopped_at
+
+    for trial in range(600):
+        with_model = trial % 3 != 0
+        analyzer.driver_model = object() if with_model else None
+        adaptive = trial % 2 == 0
+        samples = int(rng.integers(20, 200))
+        flags = (rng.random((samples, 3)) < rng.uniform(0, 0.5, 3)) @ np.array([1, 2, 4])
+        alpha = rng.dirichlet(np.ones(10)) * rng.choice([2, 20, 200])
+        predictions = rng.dirichlet(alpha + 0.01, samples) if with_model else None
+        if adaptive:
+            frames = np.cumsum(rng.integers(3, 30, samples))
+            weights = np.diff(np.concatenate([[0], frames]))
+        else:
+            frames = np.arange(1, samples + 1) * 15
+            weights = np.ones(samples, dtype=int)
+        total = int(frames[-1] + rng.integers(0, 15))
+
+        full, _ = run(flags, predictions, frames, weights, total, adaptive, stop=False)
+        partial, stopped_at = run(flags, predictions, frames, weights, total, adaptive, stop=True)
+        if stopped_at is not None:
+            stops += 1
+            assert partial == full, (trial, full, partial)
+    assert stops > 50, stops
+    print(f"   [OK] {stops} early stops of the enhanced analyzer, each on the full video's verdict")
+
+
+if __name__ == '__main__':
+    try:
+        test_final_range()
+        test_settled_video_verdicts_match_full_video()
+        test_settled_enhanced_verdicts_match_full_video()
+    except AssertionError as e:
+        print(f"   [FAIL] {e}")
+        sys.exit(1)
+    print("\n=== Test Complete ===")
@@ -0,0 +1,48 @@
+import sys
+
+import numpy as np
+
+from frame_preprocessor import FramePreprocessor
+
+print("=== Frame Preprocessor Test ===\n")
+
+
+def model_input(preprocessor, frame):
+    preprocessor.load(frame)
+    # MediaPipe converts first; the model input must not depend on that buffer
+    preprocessor.rgb()
+    return preprocessor.model_input(np.empty((96, 128, 3), dtype=np.float32)).copy()
+
+
+def test_model_input_ignores_max_width():
+    rng = np.random.default_rng(0)
+    native = FramePreprocessor(model_input_size=(128, 96))
+    downscaled = FramePreprocessor(model_input_size=(128, 96), max_width=320)
+    for width, height in ((1280, 720), (640, 480), (320, 240), (200, 150)):
+        frame = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        expected = model_input(native, frame)
+        assert np.array_equal(model_input(downscaled, frame), expected), (width, height)
+        # MediaPipe still gets the downscaled frame
+        assert downscaled.rgb().shape[1] == min(width, 320)
+    print("   [OK] model inputs are the same with and without max_width")
+
+
+def test_model_input_ignores_crop():
+    rng = np.random.default_rng(1)
+    frame = rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+    expected = model_input(FramePreprocessor(model_input_size=(128, 96)), frame)
+    cropped = FramePreprocessor(model_input_size=(128, 96), max_width=320)
+    cropped.crop = (300, 100, 1100, 700)
+    assert np.array_equal(model_input(cropped, frame), expected)
+    assert cropped.rgb().shape[:2] == (240, 320)
+    print("   [OK] model inputs are made from the whole frame when MediaPipe gets a crop")
+
+
+if __name__ == '__main__':
+    try:
+        test_model_input_ignores_max_width()
+        test_model_input_ignores_crop()
+    except AssertionError as e:
+        print(f"   [FAIL] {e}")
+        sys.exit(1)
+    print("\n=== Test Complete ===")
@@ -0,0 +1,301 @@
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+from unittest import mock
+
+import cv2
+import numpy as np
+
+import frame_source
+from frame_source import SampledFrameReader
+
+print("=== Frame Source Test ===\n")
+
+
+def make_video(path, frames=95, fps=15):
+    """MJPG video (every frame a keyframe, so seeking is exact) whose frames all differ"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (64, 48))
+    for i in range(frames):
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        frame[:, :, 0] = (i * 2) % 256
+        frame[: 8 + i % 40, :, 1] = 255
+        writer.write(frame)
+    writer.release()
+
+
+def full_decode(path):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def check_reader(path, reference, label, **kwargs):
+    """Sampled frame numbers and pixels must match the full decode"""
+    step = kwargs.get('step', 1)
+    start, end = kwargs.get('start_frame', 0), kwargs.get('end_frame') or len(reference)
+    expected = [n for n in range(1, len(reference) + 1) if n % step == 0 and start < n <= end]
+    reader = SampledFrameReader(path, **kwargs)
+    got = list(reader)
+    reader.release()
+    numbers = [n for n, _ in got]
+    assert numbers == expected, f"{label}: frames {numbers} != {expected}"
+    for n, frame in got:
+        assert np.array_equal(frame, reference[n - 1]), f"{label}: frame {n} pixels differ"
+    print(f"   [OK] {label}: {len(got)} frames")
+
+
+def test_sampled_frames_match_full_decode():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.avi')
+        make_video(path)
+        reference = full_decode(path)
+        assert len(reference) == 95
+
+        check_reader(path, reference, 'every frame', step=1)
+        check_reader(path, reference, 'grab every 15th', step=15)
+        check_reader(path, reference, 'seek every 15th', step=15, seek_threshold=2)
+        check_reader(path, reference, 'range 30-75', step=15, start_frame=30, end_frame=75)
+        check_reader(path, reference, 'range with seeks', step=7, start_frame=20, end_frame=90, seek_threshold=3)
+
+
+def read_adaptively(reader, reference):
+    """Frames of a reader whose step the consumer changes after every frame, as adaptive sampling does"""
+    got = []
+    reader.min_step = 3
+    for frame_number, frame in reader:
+        got.append(frame_number)
+        assert np.abs(frame.astype(int) - reference[frame_number - 1]).mean() < 1, f"frame {frame_number} pixels differ"
+        reader.step = 3 if (frame_number // 20) % 2 else 9
+    reader.release()
+    return got
+
+
+def test_ffmpeg_frames_match_sampled_reader():
+    if not frame_source.FFMPEG_PATH:
+        print("   [SKIP] ffmpeg is not installed")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.avi')
+        make_video(path)
+        reference = full_decode(path)
+
+        for kwargs in ({'step': 15}, {'step': 1}, {'step': 7, 'start_frame': 20, 'end_frame': 90},
+                       {'step': 15, 'start_frame': 30, 'end_frame': 75}):
+            reader = frame_source.FFmpegFrameReader(path, **kwargs)
+            got = [(n, frame.copy()) for n, frame in reader]
+            expected = [n for n, _ in SampledFrameReader(path, **kwargs)]
+            assert [n for n, _ in got] == expected, f"{kwargs}: {[n for n, _ in got]} != {expected}"
+            for n, frame in got:
+                # Each frame differs from its neighbors by several gray levels on average
+                assert np.abs(frame.astype(int) - reference[n - 1]).mean() < 1, f"{kwargs}: frame {n} pixels differ"
+            assert reader.frames_read == (kwargs.get('end_frame') or len(reference)), reader.frames_read
+
+        ffmpeg_frames = read_adaptively(frame_source.FFmpegFrameReader(path, step=9), reference)
+        opencv_frames = read_adaptively(SampledFrameReader(path, step=9), reference)
+        assert ffmpeg_frames == opencv_frames, (ffmpeg_frames, opencv_frames)
+
+        reader = frame_source.FFmpegFrameReader(path, step=15, max_width=32)
+        assert all(frame.shape == (24, 32, 3) for _, frame in reader)
+    print("   [OK] ffmpeg's select filter yields the frames SampledFrameReader does, also when the step changes")
+
+
+def test_open_frame_reader_falls_back_without_ffmpeg():
+    try:
+        with mock.patch.object(shutil, 'which', return_value=None):
+            module = importlib.reload(frame_source)
+        assert module.FFMPEG_PATH is None
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'video.avi')
+            make_video(path)
+            reader = module.open_frame_reader(path, step=15, ffmpeg=True, max_width=32)
+            assert isinstance(reader, module.SampledFrameReader), type(reader)
+            assert [n for n, _ in reader] == [15, 30, 45, 60, 75, 90]
+            reader.release()
+            reader = module.open_frame_reader(path, step=15, ffmpeg=True, decode_ahead=2)
+            assert isinstance(reader.reader, module.SampledFrameReader), type(reader.reader)
+            reader.release()
+    finally:
+        importlib.reload(frame_source)
+    print("   [OK] open_frame_reader decodes with OpenCV when ffmpeg is not on the PATH")
+
+
+def test_decode_ahead_matches_inline_reading():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.avi')
+        make_video(path)
+        for kwargs in ({'step': 1}, {'step': 15}, {'step': 7, 'start_frame': 20, 'end_frame': 90}):
+            inline = SampledFrameReader(path, **kwargs)
+            expected = [(n, frame.copy()) for n, frame in inline]
+            inline.release()
+            for depth in (1, 4):
+                reader = frame_source.DecodeAheadReader(SampledFrameReader(path, **kwargs), depth)
+                got = [(n, frame.copy()) for n, frame in reader]
+                reader.release()
+                assert [n for n, _ in got] == [n for n, _ in expected], (kwargs, depth)
+                assert all(np.array_equal(a, b) for (_, a), (_, b) in zip(got, expected)), (kwargs, depth)
+                assert reader.frames_read == inline.frames_read, (kwargs, reader.frames_read, inline.frames_read)
+
+        if frame_source.FFMPEG_PATH:
+            # ffmpeg frames live in buffers that are reused; queued ones need their own
+            inline = frame_source.FFmpegFrameReader(path, step=5)
+            expected = [(n, frame.copy()) for n, frame in inline]
+            reader = frame_source.open_frame_reader(path, step=5, ffmpeg=True, decode_ahead=3)
+            got = [(n, frame.copy()) for n, frame in reader]
+            reader.release()
+            assert [n for n, _ in got] == [n for n, _ in expected]
+            assert all(np.array_equal(a, b) for (_, a), (_, b) in zip(got, expected))
+    print("   [OK] decode-ahead yields the same (frame_number, frame) sequence as inline reading")
+
+
+def test_decode_ahead_release_stops_producer():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.avi')
+        make_video(path)
+        reader = frame_source.DecodeAheadReader(SampledFrameReader(path, step=1), depth=2)
+        frames = iter(reader)
+        assert [next(frames)[0] for _ in range(3)] == [1, 2, 3]
+        producer = reader._thread
+        assert producer.is_alive()
+        try:
+            reader.step = 2
+            assert False, "the step can't change while decoding ahead"
+        except RuntimeError:
+            pass
+        # The producer is blocked on the full queue with frames left to decode
+        reader.release()
+        assert not producer.is_alive() and reader._thread is None
+        assert not reader.reader.cap.isOpened()
+
+        # Leaving the loop early stops it too
+        reader = frame_source.DecodeAheadReader(SampledFrameReader(path, step=1), depth=2)
+        for frame_number, _ in reader:
+            producer = reader._thread
+            if frame_number == 5:
+                break
+        assert not producer.is_alive()
+        reader.release()
+    print("   [OK] release() and leaving the loop stop the producer while frames remain")
+
+
+def test_decode_ahead_passes_on_errors():
+    class BrokenReader:
+        step, fps, frame_count, start_frame, frames_read, frames_decoded, timings = 1, 30, 10, 0, 0, 0, None
+
+        def __iter__(self):
+            yield 1, np.zeros((4, 4, 3), dtype=np.uint8)
+            raise IOError('corrupt frame')
+
+        def release(self):
+            pass
+
+    reader = frame_source.DecodeAheadReader(BrokenReader())
+    got = []
+    try:
+        for frame_number, _ in reader:
+            got.append(frame_number)
+        assert False, "the decoding error should reach the consumer"
+    except IOError as e:
+        assert str(e) == 'corrupt frame' and got == [1], (e, got)
+    print("   [OK] decoding errors are raised to the consumer after the frames before them")
+
+
+class FailingAnalysis(Exception):
+    pass
+
+
+def fail_on_frame(analyzer, fail_at):
+    """Make ``analyzer``'s MediaPipe step raise on its ``fail_at``-th frame"""
+    calls = []
+    detect = analyzer._detect_landmarks
+
+    def detect_landmarks(frame, timings):
+        calls.append(frame)
+        if len(calls) == fail_at:
+            raise FailingAnalysis(f'frame {fail_at}')
+        return detect(frame, timings)
+    analyzer._detect_landmarks = detect_landmarks
+
+
+class SlowModel:
+    input_shape = (None, 16, 16, 3)
+    output_shape = (None, 10)
+    running = 0
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        import time
+        self.running += 1
+        time.sleep(0.2)
+        self.running -= 1
+        return np.full((len(batch), 10), 0.1, dtype=np.float32)
+
+
+def decode_threads():
+    import threading
+    return [thread for thread in threading.enumerate() if thread.name == 'decode-ahead' and thread.is_alive()]
+
+
+def test_analyzers_release_reader_on_error():
+    from video_analyzer import VideoAnalyzer
+    from enhanced_analyzer import EnhancedVideoAnalyzer
+
+    processes = []
+    popen = frame_source.subprocess.Popen
+
+    def tracked_popen(command, *args, **kwargs):
+        process = popen(command, *args, **kwargs)
+        # Imports (MediaPipe's sound library lookup) start other processes
+        if command[0] == frame_source.FFMPEG_PATH:
+            processes.append(process)
+        return process
+
+    ffmpeg = bool(frame_source.FFMPEG_PATH)
+    with tempfile.TemporaryDirectory() as tmp, mock.patch.object(frame_source.subprocess, 'Popen', tracked_popen):
+        path = os.path.join(tmp, 'video.avi')
+        make_video(path, frames=400)
+
+        analyzer = VideoAnalyzer(decode_ahead=2, ffmpeg_decode=ffmpeg)
+        fail_on_frame(analyzer, 5)
+        try:
+            analyzer.analyze_video(path)
+            assert False, "the analysis should have failed"
+        except FailingAnalysis:
+            # Checked while the failed call's frames are still referenced
+            assert not decode_threads(), "decode-ahead thread left running"
+            assert all(process.poll() is not None for process in processes), "ffmpeg left running"
+
+        analyzer = EnhancedVideoAnalyzer(decode_ahead=2, model_batch_size=2, ffmpeg_decode=ffmpeg)
+        analyzer.driver_model = SlowModel()
+        fail_on_frame(analyzer, 12)
+        try:
+            analyzer.analyze_video(path)
+            assert False, "the analysis should have failed"
+        except FailingAnalysis:
+            assert not decode_threads(), "decode-ahead thread left running"
+            assert all(process.poll() is not None for process in processes), "ffmpeg left running"
+            assert analyzer._model_executor._work_queue.qsize() == 0, "model batches left queued"
+            assert analyzer.driver_model.running == 0, "model still predicting a batch"
+    assert len(processes) == (2 if ffmpeg else 0), [process.args for process in processes]
+    print("   [OK] a failing analysis stops its decoder and drops queued model batches")
+
+
+if __name__ == '__main__':
+    try:
+        test_sampled_frames_match_full_decode()
+        test_ffmpeg_frames_match_sampled_reader()
+        test_open_frame_reader_falls_back_without_ffmpeg()
+        test_decode_ahead_matches_inline_reading()
+        test_decode_ahead_release_stops_producer()
+        test_decode_ahead_passes_on_errors()
+        test_analyzers_release_reader_on_error()
+    except AssertionError as e:
+        print(f"   [FAIL] {e}")
+        sys.exit(1)
+    print("\n=== Test Complete ===")
@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+from image_batch import find_images
+
+print("=== Image Batch Test ===\n")
+
+
+class StubModel:
+    """Deterministic per-image "model": class scores from each image's mean color"""
+    input_shape = (None, 32, 32, 3)
+    output_shape = (None, 10)
+
+    def __init__(self):
+        self.calls = []
+        self.weights = np.random.default_rng(0).normal(0, 20, (3, 10)).astype(np.float32)
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        self.calls.append(len(batch))
+        logits = batch.mean(axis=(1, 2)) @ self.weights
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+
+def make_images(directory, count=11):
+    """Differently sized and colored images, one in a subdirectory, plus one that can't be decoded"""
+    rng = np.random.default_rng(1)
+    os.makedirs(os.path.join(directory, 'sub'))
+    for i in range(count):
+        height, width = rng.integers(60, 300, 2)
+        image = np.full((height, width, 3), rng.integers(0, 256, 3), dtype=np.uint8)
+        cv2.circle(image, (width // 2, height // 2), min(width, height) // 4, (255, 255, 255), -1)
+        name = os.path.join(directory, 'sub' if i == 3 else '', f'cab{i:02d}.jpg')
+        cv2.imwrite(name, image)
+    with open(os.path.join(directory, 'broken.jpg'), 'wb') as f:
+        f.write(b'not a jpeg')
+
+
+def strip_name(result):
+    result = dict(result)
+    result.pop('image')
+    return result
+
+
+def test_batch_matches_analyze_image():
+    from enhanced_analyzer import EnhancedVideoAnalyzer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_images(tmp)
+        paths = find_images(tmp)
+        assert len(paths) == 12 and os.path.join(tmp, 'sub', 'cab03.jpg') in paths
+
+        single = EnhancedVideoAnalyzer()
+        single.driver_model = StubModel()
+        expected = [single.analyze_image(path) for path in paths]
+        assert sum('error' in result for result in expected) == 1
+
+        batched = EnhancedVideoAnalyzer(model_batch_size=4)
+        batched.driver_model = StubModel()
+        by_path = batched.analyze_images(paths)
+        by_bytes = batched.analyze_images([(os.path.basename(path), open(path, 'rb').read()) for path in paths],
+                                          decode_threads=1, batch_size=5)
+
+    assert [result['image'] for result in by_path['results']] == paths
+    assert [result['image'] for result in by_bytes['results']] == [os.path.basename(path) for path in paths]
+    for path, result, path_result, bytes_result in zip(paths, expected, by_path['results'], by_bytes['results']):
+        assert strip_name(path_result) == result, path
+        assert strip_name(bytes_result) == result, path
+    # 11 decodable images: batches of 4 by default (model_batch_size), then of 5
+    assert batched.driver_model.calls == [4, 4, 3, 5, 5, 1], batched.driver_model.calls
+    assert by_path['stats']['model_calls'] == 3 and by_bytes['stats']['model_calls'] == 3
+    assert by_path['stats']['images'] == 12 and by_path['stats']['failed'] == 1
+    print("   [OK] analyze_images matches analyze_image result for result, in model_batch_size batches")
+
+
+if __name__ == '__main__':
+    try:
+        test_batch_matches_analyze_image()
+    except AssertionError as e:
+        print(f"   [FAIL] {e}")
+        sys.exit(1)
+    print("\n=== Test Complete ===")
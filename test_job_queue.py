@@ -0,0 +1,59 @@
+import sys
+import threading
+import time
+
+from job_queue import JobQueue, QueueFullError
+
+print("=== Job Queue Test ===\n")
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_max_pending_rejects_excess_jobs():
+    release = threading.Event()
+
+    def run_job(job, value):
+        release.wait(5)
+        if value == 'fail':
+            raise ValueError('bad video')
+        return {'value': value}
+
+    jobs = JobQueue(run_job, workers=1, max_pending=2)
+    try:
+        running = jobs.submit('a.mp4', 'a')
+        wait_for(lambda: running.status == 'running')
+        # The running job doesn't count against max_pending; two may wait
+        queued = [jobs.submit('b.mp4', 'b'), jobs.submit('c.mp4', 'fail')]
+        try:
+            jobs.submit('d.mp4', 'd')
+            raise AssertionError("third waiting job was accepted")
+        except QueueFullError:
+            pass
+        stats = jobs.stats()
+        assert (stats['queued'], stats['running']) == (2, 1), stats
+        print("   [OK] job over max_pending rejected")
+
+        release.set()
+        wait_for(lambda: all(job.finished for job in [running] + queued))
+        assert running.to_dict()['result'] == {'value': 'a'}
+        assert queued[1].status == 'failed' and queued[1].error == 'bad video'
+        # Room again once the backlog drained
+        assert jobs.submit('e.mp4', 'e').status in ('queued', 'running', 'done')
+        print("   [OK] jobs finish, failures keep their error, queue accepts again")
+    finally:
+        release.set()
+        jobs.shutdown()
+
+
+if __name__ == '__main__':
+    try:
+        test_max_pending_rejects_excess_jobs()
+    except AssertionError as e:
+        print(f"   [FAIL] {e}")
+        sys.exit(1)
+    print("\n=== Test Complete ===")
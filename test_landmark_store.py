@@ -0,0 +1,108 @@
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+from landmark_store import (FACE_POINTS, HAND_POINTS, MAX_HANDS, LandmarkRecorder, find_stores, read_store,
+                            rescore_store, store_path, write_store)
+
+print("=== Landmark Store Test ===\n")
+
+
+def random_recorder(frames=500, seed=0):
+    """Landmarks spread over the frame, with missing faces and hands"""
+    rng = np.random.default_rng(seed)
+    recorder = LandmarkRecorder()
+    recorder.frame_shape = (480, 640)
+    for i in range(frames):
+        face = rng.uniform(0, 1, (len(FACE_POINTS), 2)).astype(np.float32)
+        if rng.random() < 0.2:
+            face[:] = np.nan
+        hands = rng.uniform(0, 1, (MAX_HANDS, len(HAND_POINTS), 2)).astype(np.float32)
+        hands[rng.random(MAX_HANDS) < 0.5] = np.nan
+        recorder.add_frame((i + 1) * 5, face, hands, weight=int(rng.integers(1, 20)), gated=bool(i % 7 == 0))
+    return recorder
+
+
+def strip(result):
+    result = dict(result, stats=dict(result['stats']))
+    result['stats'].pop('landmark_store', None)
+    result['stats'].pop('timings', None)
+    return result
+
+
+def test_round_trip_and_rescore():
+    from video_analyzer import VideoAnalyzer
+    from enhanced_analyzer import EnhancedVideoAnalyzer
+
+    recorder = random_recorder()
+    columns = recorder.columns()
+    with tempfile.TemporaryDirectory() as tmp:
+        for cls, sampling in ((VideoAnalyzer, 'fixed'), (VideoAnalyzer, 'adaptive'),
+                              (EnhancedVideoAnalyzer, 'adaptive')):
+            meta = {'analyzer': cls.__name__, 'version': cls.VERSION, 'config': {'sampling': sampling},
+                    'total_frames': 2500, 'sampling': sampling}
+            predictions = np.random.default_rng(1).dirichlet(np.ones(10), 100).astype(np.float32)
+            weights = list(range(1, 101))
+            path = write_store(tmp, 'trip.mp4', recorder, meta, predictions, weights)
+
+            stored_meta, stored = read_store(path)
+            for name, values in columns.items():
+                assert np.array_equal(stored[name], values, equal_nan=True), name
+            assert stored_meta['frames'] == len(recorder) and stored_meta['frame_height'] == 480
+            assert np.array_equal(stored['model'], predictions)
+
+            expected = cls.rescore(stored_meta, dict(columns, model=predictions, model_weight=np.array(weights)))
+            assert strip(rescore_store(path)) == strip(expected), cls.__name__
+        assert len(find_stores([tmp])) == 3
+    print("   [OK] columns survive the round trip and rescore_store dispatches to the right analyzer")
+
+
+def test_store_names_separate_analyzers_and_configs():
+    names = {
+        store_path('s', 'trip.mp4', 'VideoAnalyzer', {'adaptive_sampling': False}),
+        store_path('s', 'trip.mp4', 'VideoAnalyzer', {'adaptive_sampling': True}),
+        store_path('s', 'trip.mp4', 'EnhancedVideoAnalyzer', {'adaptive_sampling': False}),
+        store_path('s', 'other/trip.mp4', 'VideoAnalyzer', {'adaptive_sampling': False}),
+    }
+    assert len(names) == 4, names
+    assert store_path('s', 'trip.mp4', 'VideoAnalyzer', {'a': 1, 'b': 2}) == \
+        store_path('s', 'trip.mp4', 'VideoAnalyzer', {'b': 2, 'a': 1})
+    print("   [OK] store names differ per analyzer, config and video path")
+
+
+def test_analyzed_video_rescores_to_same_result():
+    from video_analyzer import VideoAnalyzer
+    from enhanced_analyzer import EnhancedVideoAnalyzer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video = os.path.join(tmp, 'trip.avi')
+        writer = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*'MJPG'), 15, (160, 120))
+        for i in range(120):
+            writer.write(np.full((120, 160, 3), (i * 2) % 255, dtype=np.uint8))
+        writer.release()
+
+        store = os.path.join(tmp, 'store')
+        results = [
+            VideoAnalyzer(landmark_store=store).analyze_video(video),
+            VideoAnalyzer(landmark_store=store, adaptive_sampling=True).analyze_video(video),
+            EnhancedVideoAnalyzer(landmark_store=store).analyze_video(video),
+        ]
+        paths = [result['stats']['landmark_store'] for result in results]
+        assert len(set(paths)) == 3, paths
+        for result, path in zip(results, paths):
+            assert strip(rescore_store(path)) == strip(result), path
+    print("   [OK] both analyzers' stores coexist and rescore to the analyzed results")
+
+
+if __name__ == '__main__':
+    try:
+        test_store_names_separate_analyzers_and_configs()
+        test_round_trip_and_rescore()
+        test_analyzed_video_rescores_to_same_result()
+    except AssertionError as e:
+        print(f"   [FAIL] {e}")
+        sys.exit(1)
+    print("\n=== Test Complete ===")
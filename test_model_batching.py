@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+from frame_source import SampledFrameReader
+from landmark_store import read_store
+
+print("=== Model Batching Test ===\n")
+
+
+class StubModel:
+    """Deterministic per-image "model": class scores from each image's mean color"""
+    input_shape = (None, 32, 32, 3)
+    output_shape = (None, 10)
+
+    def __init__(self):
+        self.calls = []
+        self.weights = np.random.default_rng(0).normal(0, 20, (3, 10)).astype(np.float32)
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        self.calls.append(len(batch))
+        logits = batch.mean(axis=(1, 2)) @ self.weights
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+
+def make_video(path, frames=300):
+    """Frames whose colors wander, so the stub model's top class changes now and then"""
+    rng = np.random.default_rng(1)
+    colors = np.cumsum(rng.normal(0, 12, (frames, 3)), axis=0) % 255
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 15, (96, 72))
+    for color in colors:
+        writer.write(np.full((72, 96, 3), color, dtype=np.uint8))
+    writer.release()
+
+
+def analyze(video, store, **kwargs):
+    from enhanced_analyzer import EnhancedVideoAnalyzer
+
+    analyzer = EnhancedVideoAnalyzer(landmark_store=store, **kwargs)
+    analyzer.driver_model = StubModel()
+    result = analyzer.analyze_video(video)
+    stored_meta, columns = read_store(result['stats']['landmark_store'])
+    result['stats'] = {k: v for k, v in result['stats'].items() if k not in ('timings', 'landmark_store')}
+    return analyzer, result, columns
+
+
+def test_batched_predictions_match_per_frame():
+    with tempfile.TemporaryDirectory() as tmp:
+        video = os.path.join(tmp, 'trip.avi')
+        make_video(video)
+
+        batched, batched_result, batched_columns = analyze(video, os.path.join(tmp, 'a'), model_batch_size=8)
+        single, single_result, single_columns = analyze(video, os.path.join(tmp, 'b'), model_batch_size=1,
+                                                        model_pipeline=False)
+        assert max(batched.driver_model.calls) == 8 and set(single.driver_model.calls) == {1}
+
+        # Per-frame reference: the model on each sampled frame, one at a time
+        reader = SampledFrameReader(video, step=15)
+        reference = np.array([single._predict_with_model(frame) for _, frame in reader])
+        reader.release()
+
+        assert len(reference) == len(batched_columns['model']) == 20
+        assert np.allclose(batched_columns['model'], reference, atol=1e-6)
+        assert np.allclose(single_columns['model'], reference, atol=1e-6)
+        assert len(set(np.argmax(reference, axis=1))) > 1, "stub model never changes class"
+        assert batched_result == single_result, (batched_result, single_result)
+    print("   [OK] batched and pipelined predictions equal per-frame ones, and so do the results")
+
+
+if __name__ == '__main__':
+    try:
+        test_batched_predictions_match_per_frame()
+    except AssertionError as e:
+        print(f"   [FAIL] {e}")
+        sys.exit(1)
+    print("\n=== Test Complete ===")
@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+
+from model_registry import ModelRegistry
+
+print("=== Model Registry Test ===\n")
+
+
+class StubHandle:
+    def __init__(self, path, backend, quantization):
+        self.path = path
+        self.backend = backend
+        self.quantization = quantization
+        self.load_s = self.warmup_s = 0.0
+
+
+class StubRegistry(ModelRegistry):
+    """Registry that "loads" a stub handle instead of a TensorFlow model"""
+
+    def __init__(self):
+        super().__init__()
+        self.loads = 0
+
+    def _load(self, model_path, backend, quantization):
+        self.loads += 1
+        return StubHandle(model_path, backend, quantization)
+
+
+def test_handles_shared_and_replaced_files_evicted():
+    registry = StubRegistry()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'driver_model.h5')
+        other = os.path.join(tmp, 'other_model.h5')
+        for name in (path, other):
+            open(name, 'wb').close()
+            os.utime(name, (1000, 1000))
+
+        keras = registry.get(path)
+        assert registry.get(path) is keras and registry.get(os.path.relpath(path)) is keras
+        tflite = registry.get(path, backend='tflite')
+        dynamic = registry.get(path, backend='tflite', quantization='dynamic')
+        other_handle = registry.get(other)
+        assert registry.loads == 4 and len(registry.stats()) == 4
+
+        # The file is replaced: the next request loads it again...
+        os.utime(path, (2000, 2000))
+        reloaded = registry.get(path)
+        assert reloaded is not keras and registry.loads == 5
+        # ...and only the replaced version of that backend is dropped
+        handles = [registry.get(path, backend='tflite'), registry.get(path, backend='tflite', quantization='dynamic'),
+                   registry.get(other)]
+        assert registry.loads == 7, registry.loads
+        assert handles[2] is other_handle
+        assert len(registry.stats()) == 4, registry.stats()
+        assert all(handle not in registry._handles.values() for handle in (keras, tflite, dynamic))
+    print("   [OK] handles are shared, and a replaced model file's old handles are dropped")
+
+
+if __name__ == '__main__':
+    try:
+        test_handles_shared_and_replaced_files_evicted()
+    except AssertionError as e:
+        print(f"   [FAIL] {e}")
+        sys.exit(1)
+    print("\n=== Test Complete ===")
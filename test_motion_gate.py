@@ -0,0 +1,100 @@
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+from frame_source import SampledFrameReader
+from landmark_store import FACE_POINTS, HAND_POINTS, MAX_HANDS, LandmarkRecorder
+from motion_gate import MotionGate
+
+print("=== Motion Gate Test ===\n")
+
+
+def scene(level, noise=0, seed=0):
+    frame = np.zeros((72, 128, 3), dtype=np.uint8)
+    frame[:, :64] = level
+    frame[:, 64:] = 255 - level
+    if noise:
+        jitter = np.random.default_rng(seed).integers(-noise, noise + 1, frame.shape)
+        frame = np.clip(frame.astype(int) + jitter, 0, 255).astype(np.uint8)
+    return frame
+
+
+def test_static_and_moving_frames():
+    gate = MotionGate(threshold=2.0)
+    assert not gate.is_static(scene(40)), "the first frame has nothing to reuse"
+    assert gate.is_static(scene(40))
+    # Sensor noise averages out on the thumbnail
+    assert gate.is_static(scene(40, noise=3, seed=1))
+    assert not gate.is_static(scene(120)), "a new scene is analyzed"
+    assert gate.is_static(scene(120))
+
+    # Slow drift is measured against the last analyzed frame, so it adds up
+    gate = MotionGate(threshold=2.0)
+    levels = [40 + i for i in range(8)]
+    outcomes = [gate.is_static(scene(level)) for level in levels]
+    assert outcomes == [False, True, False, True, False, True, False, True], outcomes
+
+    gate.reset()
+    assert not gate.is_static(scene(47)), "reset forgets the reference"
+    print("   [OK] static frames reused, moving and drifting frames analyzed")
+
+
+def test_max_reuse():
+    gate = MotionGate(threshold=2.0, max_reuse=3)
+    outcomes = [gate.is_static(scene(40)) for _ in range(9)]
+    assert outcomes == [False, True, True, True, False, True, True, True, False], outcomes
+    print("   [OK] a fresh analysis is forced after max_reuse reused frames")
+
+
+def test_analyze_frames_reuses_last_outcomes():
+    from video_analyzer import VideoAnalyzer
+
+    class CountingAnalyzer(VideoAnalyzer):
+        """Landmarks that identify the frame MediaPipe ran on"""
+        detected = []
+
+        def _detect_landmarks(self, frame, timings):
+            self.detected.append(int(frame[0, 0, 0]))
+            face = np.full((len(FACE_POINTS), 2), frame[0, 0, 0] / 255, dtype=np.float32)
+            hands = np.full((MAX_HANDS, len(HAND_POINTS), 2), np.nan, dtype=np.float32)
+            return face, hands
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video = os.path.join(tmp, 'trip.avi')
+        writer = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*'MJPG'), 15, (128, 72))
+        # Three still scenes of 50 frames each
+        for i in range(150):
+            writer.write(scene(40 + 80 * (i // 50)))
+        writer.release()
+
+        analyzer = CountingAnalyzer(motion_threshold=2.0)
+        recorder = LandmarkRecorder()
+        reader = SampledFrameReader(video, step=5)
+        counters = analyzer._analyze_frames(reader, reader.frame_count, recorder=recorder)
+        reader.release()
+
+    columns = recorder.columns()
+    assert list(columns['frame']) == list(range(5, 151, 5))
+    first_of_scene = [frame in (5, 55, 105) for frame in columns['frame']]
+    assert list(columns['gated']) == [not first for first in first_of_scene], list(columns['gated'])
+    assert len(analyzer.detected) == 3, analyzer.detected
+    # Gated frames carry the landmarks of the scene's analyzed frame
+    for frame, face in zip(columns['frame'], columns['face']):
+        level = 40 + 80 * ((frame - 1) // 50)
+        assert abs(face[0, 0] * 255 - level) < 3, (frame, face[0, 0] * 255)
+    assert counters['gated_frames'] == 27 and counters['analyzed_frames'] == 30, counters
+    print("   [OK] _analyze_frames runs MediaPipe once per still scene and reuses its landmarks")
+
+
+if __name__ == '__main__':
+    try:
+        test_static_and_moving_frames()
+        test_max_reuse()
+        test_analyze_frames_reuses_last_outcomes()
+    except AssertionError as e:
+        print(f"   [FAIL] {e}")
+        sys.exit(1)
+    print("\n=== Test Complete ===")
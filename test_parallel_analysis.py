@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+from landmark_store import read_store
+from parallel_analysis import split_frames
+
+print("=== Parallel Segment Test ===\n")
+
+
+def test_split_frames():
+    for total, segments in [(450, 3), (100, 7), (5, 10), (1, 1), (1000, 4)]:
+        ranges = split_frames(total, segments)
+        assert ranges[0][0] == 0 and ranges[-1][1] == total, (total, segments, ranges)
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:])), ranges
+        assert all(end > start for start, end in ranges), ranges
+        assert len(ranges) == min(segments, total)
+        sizes = [end - start for start, end in ranges]
+        assert max(sizes) - min(sizes) <= 1, sizes
+    print("   [OK] split_frames covers 1..N with contiguous, even ranges")
+
+
+def make_video(path, frames=200, fps=15):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (160, 120))
+    for i in range(frames):
+        frame = np.full((120, 160, 3), (i * 3) % 255, dtype=np.uint8)
+        writer.write(frame)
+    writer.release()
+
+
+def test_segments_merge_like_a_single_pass():
+    from video_analyzer import VideoAnalyzer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video = os.path.join(tmp, 'trip.avi')
+        make_video(video)
+        results = {}
+        for segments in (1, 3):
+            analyzer = VideoAnalyzer(segments=segments, landmark_store=os.path.join(tmp, f'store{segments}'))
+            results[segments] = analyzer.analyze_video(video)
+
+        single, merged = results[1]['stats'], results[3]['stats']
+        for key in ('frames_analyzed', 'total_frames', 'phone_usage', 'radio_usage', 'distraction',
+                    'face_detection', 'hand_detection'):
+            assert single[key] == merged[key], (key, single[key], merged[key])
+        # The same sampled frames, recorded in frame order
+        single_frames = np.asarray(read_store(single['landmark_store'])[1]['frame'])
+        merged_frames = np.asarray(read_store(merged['landmark_store'])[1]['frame'])
+        assert np.array_equal(single_frames, merged_frames), (single_frames, merged_frames)
+        # VideoAnalyzer samples every max(5, fps // 6)-th frame
+        assert list(single_frames) == list(range(5, 201, 5))
+    print("   [OK] 3 segments merge into the counters and frames of a single pass")
+
+
+if __name__ == '__main__':
+    try:
+        test_split_frames()
+        test_segments_merge_like_a_single_pass()
+    except AssertionError as e:
+        print(f"   [FAIL] {e}")
+        sys.exit(1)
+    print("\n=== Test Complete ===")
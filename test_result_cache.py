@@ -0,0 +1,59 @@
+import os
+import sys
+import tempfile
+import time
+
+from result_cache import ResultCache
+
+print("=== Result Cache Test ===\n")
+
+
+def result(n):
+    return {'behaviors': ['Normal Driving'], 'padding': 'x' * 1000, 'n': n}
+
+
+def test_memory_lru():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', result(1))
+    cache.put('b', result(2))
+    assert cache.get('a')['n'] == 1  # a is now the most recent
+    cache.put('c', result(3))  # evicts b
+    assert cache.get('b') is None
+    assert cache.get('a')['n'] == 1 and cache.get('c')['n'] == 3
+    # Cached results can't be changed through a returned copy
+    cache.get('a')['n'] = 99
+    assert cache.get('a')['n'] == 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['memory_entries']) == (5, 1, 2), stats
+    print("   [OK] memory tier evicts the least recently used entry")
+
+
+def test_disk_eviction_least_recently_used():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResultCache(max_entries=10, cache_dir=tmp, max_disk_bytes=3500)
+        for key in ('a', 'b', 'c'):
+            cache.put(key, result(key))
+        # Make the write order visible to mtime-based eviction: a oldest, c newest
+        now = time.time()
+        for age, key in zip((300, 200, 100), ('a', 'b', 'c')):
+            os.utime(os.path.join(tmp, f'{key}.json'), (now - age, now - age))
+
+        # A fresh process only has the disk tier; reading a refreshes its mtime
+        restarted = ResultCache(max_entries=10, cache_dir=tmp, max_disk_bytes=3500)
+        assert restarted.get('a')['n'] == 'a'
+        assert restarted.stats()['disk_hits'] == 1
+        restarted.put('d', result('d'))  # over 3500 bytes: b is now the oldest
+        remaining = sorted(name[:-5] for name in os.listdir(tmp) if name.endswith('.json'))
+        assert remaining == ['a', 'c', 'd'], remaining
+        assert restarted.stats()['disk_bytes'] <= 3500
+    print("   [OK] disk tier evicts least recently read/written files past max_disk_bytes")
+
+
+if __name__ == '__main__':
+    try:
+        test_memory_lru()
+        test_disk_eviction_least_recently_used()
+    except AssertionError as e:
+        print(f"   [FAIL] {e}")
+        sys.exit(1)
+    print("\n=== Test Complete ===")
@@ -0,0 +1,150 @@
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+
+from landmark_store import landmark_arrays
+
+print("=== Vectorized Heuristics Test ===\n")
+
+# The per-frame heuristics as they were written against MediaPipe result
+# objects, before they were vectorized over landmark arrays
+
+
+def scalar_video_phone(hand_results, face_results, frame_shape):
+    if not hand_results.multi_hand_landmarks or not face_results.multi_face_landmarks:
+        return False
+    h, w = frame_shape[:2]
+    face_landmarks = face_results.multi_face_landmarks[0]
+    points = [(face_landmarks.landmark[i].x * w, face_landmarks.landmark[i].y * h) for i in (234, 454, 61, 291)]
+    for hand_landmarks in hand_results.multi_hand_landmarks:
+        hand_x = hand_landmarks.landmark[8].x * w
+        hand_y = hand_landmarks.landmark[8].y * h
+        for point_x, point_y in points:
+            if np.sqrt((hand_x - point_x) ** 2 + (hand_y - point_y) ** 2) < w * 0.08:
+                return True
+    return False
+
+
+def scalar_video_radio(hand_results, frame_shape):
+    if not hand_results.multi_hand_landmarks:
+        return False
+    h, w = frame_shape[:2]
+    region = (w * 0.45, w * 0.75, h * 0.55, h * 0.85)
+    for hand_landmarks in hand_results.multi_hand_landmarks:
+        hand_x = hand_landmarks.landmark[9].x * w
+        hand_y = hand_landmarks.landmark[9].y * h
+        if region[0] < hand_x < region[1] and region[2] < hand_y < region[3]:
+            return True
+    return False
+
+
+def scalar_video_distraction(face_results):
+    if not face_results.multi_face_landmarks:
+        return False
+    landmarks = face_results.multi_face_landmarks[0].landmark
+    nose_tip, left_eye, right_eye = landmarks[1], landmarks[33], landmarks[263]
+    deviation = abs(nose_tip.x - (left_eye.x + right_eye.x) / 2)
+    interocular = abs(left_eye.x - right_eye.x)
+    if interocular <= 0.001:
+        return deviation > 0.08
+    return deviation / interocular > 0.28
+
+
+def scalar_enhanced_phone(hand_results, face_results, frame_shape):
+    if not hand_results.multi_hand_landmarks or not face_results.multi_face_landmarks:
+        return False
+    h, w = frame_shape[:2]
+    for hand_landmarks in hand_results.multi_hand_landmarks:
+        hand_x = hand_landmarks.landmark[9].x * w
+        hand_y = hand_landmarks.landmark[9].y * h
+        face_landmarks = face_results.multi_face_landmarks[0]
+        face_x = face_landmarks.landmark[1].x * w
+        face_y = face_landmarks.landmark[1].y * h
+        if np.sqrt((hand_x - face_x) ** 2 + (hand_y - face_y) ** 2) < w * 0.15:
+            return True
+    return False
+
+
+def scalar_enhanced_radio(hand_results, frame_shape):
+    if not hand_results.multi_hand_landmarks:
+        return False
+    h, w = frame_shape[:2]
+    region = (w * 0.3, w * 0.7, h * 0.4, h * 0.8)
+    for hand_landmarks in hand_results.multi_hand_landmarks:
+        hand_x = hand_landmarks.landmark[9].x * w
+        hand_y = hand_landmarks.landmark[9].y * h
+        if region[0] < hand_x < region[1] and region[2] < hand_y < region[3]:
+            return True
+    return False
+
+
+def scalar_enhanced_distraction(face_results):
+    if not face_results.multi_face_landmarks:
+        return True
+    landmarks = face_results.multi_face_landmarks[0].landmark
+    return abs(landmarks[1].x - (landmarks[33].x + landmarks[263].x) / 2) > 0.05
+
+
+def fake_results(rng):
+    """MediaPipe-like results with float32 coordinates, clustered so every heuristic fires sometimes"""
+    def landmarks(count, center, spread):
+        values = rng.normal(center, spread, (count, 2)).astype(np.float32)
+        return SimpleNamespace(landmark=[SimpleNamespace(x=float(x), y=float(y)) for x, y in values])
+
+    center = rng.uniform(0.2, 0.8, 2)
+    face = [landmarks(478, center, 0.05)] if rng.random() < 0.8 else None
+    if face and rng.random() < 0.1:
+        # Eyes almost on top of each other: the interocular fallback
+        face[0].landmark[263].x = face[0].landmark[33].x + float(rng.uniform(-0.001, 0.001))
+    hands = [landmarks(21, rng.uniform(0.1, 0.9, 2) if rng.random() < 0.5 else center, 0.08)
+             for _ in range(rng.integers(0, 3))] or None
+    return SimpleNamespace(multi_hand_landmarks=hands), SimpleNamespace(multi_face_landmarks=face)
+
+
+def test_vectorized_matches_scalar():
+    from video_analyzer import VideoAnalyzer
+    from enhanced_analyzer import EnhancedVideoAnalyzer
+
+    # The heuristics don't need MediaPipe graphs
+    video = VideoAnalyzer.__new__(VideoAnalyzer)
+    enhanced = EnhancedVideoAnalyzer.__new__(EnhancedVideoAnalyzer)
+    rng = np.random.default_rng(0)
+    frame_shape = (720, 1280, 3)
+    frames = [fake_results(rng) for _ in range(20000)]
+    arrays = [landmark_arrays(hand_results, face_results) for hand_results, face_results in frames]
+    face = np.stack([a[0] for a in arrays])
+    hands = np.stack([a[1] for a in arrays])
+
+    video_hits = video._score_frames(face, hands, frame_shape)
+    enhanced_hits = enhanced._score_frames(face, hands, frame_shape)
+    expected = {
+        'video phone': ([scalar_video_phone(h, f, frame_shape) for h, f in frames], video_hits['phone_frames']),
+        'video radio': ([scalar_video_radio(h, frame_shape) for h, f in frames], video_hits['radio_frames']),
+        'video distraction': ([scalar_video_distraction(f) for h, f in frames], video_hits['distracted_frames']),
+        'enhanced phone': ([scalar_enhanced_phone(h, f, frame_shape) for h, f in frames], enhanced_hits[0]),
+        'enhanced radio': ([scalar_enhanced_radio(h, frame_shape) for h, f in frames], enhanced_hits[1]),
+        'enhanced distraction': ([scalar_enhanced_distraction(f) for h, f in frames], enhanced_hits[2]),
+    }
+    for name, (scalar, vectorized) in expected.items():
+        scalar = np.array(scalar)
+        mismatches = int(np.count_nonzero(scalar != np.asarray(vectorized)))
+        assert mismatches == 0, f"{name}: {mismatches} of {len(scalar)} frames differ"
+        # Make sure the case isn't trivially all-False/all-True
+        assert 0 < scalar.sum() < len(scalar), f"{name}: fires on {scalar.sum()} frames"
+        print(f"   [OK] {name}: {len(scalar)} frames match ({int(scalar.sum())} hits)")
+
+    # One frame at a time, as adaptive sampling scores them
+    for i in range(0, 2000, 7):
+        single = video._score_frames(face[i:i + 1], hands[i:i + 1], frame_shape)
+        assert all(single[name][0] == video_hits[name][i] for name in single), i
+    print("   [OK] single-frame batches match")
+
+
+if __name__ == '__main__':
+    try:
+        test_vectorized_matches_scalar()
+    except AssertionError as e:
+        print(f"   [FAIL] {e}")
+        sys.exit(1)
+    print("\n=== Test Complete ===")
@@ -0,0 +1,177 @@
+"""TFLite inference for the Keras driver models.
+
+The first time a model is used with this backend it is converted to
+TFLite (float16 weights, or int8 dynamic-range quantization) and cached
+next to the ``.h5`` file, keyed by the file's hash. Later loads read the
+cached artifact without loading the Keras model at all.
+
+Check a conversion against the Keras model before switching:
+
+    python tflite_backend.py driver_model.h5 --quantization float16 --samples uploads/radio.mp4
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+
+import cv2
+import numpy as np
+
+from frame_preprocessor import FramePreprocessor
+
+QUANTIZATIONS = ('float16', 'dynamic')
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tflite_path(model_path, quantization, digest=None):
+    """Where the converted model for ``model_path`` is cached"""
+    digest = digest or file_hash(model_path)
+    root = os.path.splitext(model_path)[0]
+    return f'{root}.{digest[:16]}.{quantization}.tflite'
+
+
+def convert(keras_model, quantization='float16'):
+    """Convert a Keras model to a TFLite flatbuffer"""
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"quantization must be one of {', '.join(QUANTIZATIONS)}")
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    # 'dynamic': weights stored as int8, activations quantized on the fly
+    return converter.convert()
+
+
+def _interpreter_class():
+    # The standalone runtime is much lighter than full TensorFlow when installed
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteModel:
+    """TFLite interpreter with the part of the Keras model interface the analyzers use"""
+
+    def __init__(self, model_content, num_threads=None):
+        Interpreter = _interpreter_class()
+        self._interpreter = Interpreter(model_content=model_content, num_threads=num_threads or os.cpu_count())
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = None
+        # One interpreter, one inference at a time
+        self._lock = threading.Lock()
+
+        self.input_shape = (None,) + tuple(int(d) for d in self._input['shape'][1:])
+        self.output_shape = (None,) + tuple(int(d) for d in self._output['shape'][1:])
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            if self._batch_size != len(batch):
+                self._interpreter.resize_tensor_input(self._input['index'], list(batch.shape))
+                self._interpreter.allocate_tensors()
+                self._batch_size = len(batch)
+            self._interpreter.set_tensor(self._input['index'], batch)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output['index']).copy()
+
+
+def load_tflite_model(model_path, quantization='float16', keras_model=None, num_threads=None):
+    """Load the cached conversion of ``model_path``, converting it first if needed"""
+    path = tflite_path(model_path, quantization)
+    if not os.path.exists(path):
+        if keras_model is None:
+            from tensorflow import keras
+            keras_model = keras.models.load_model(model_path, compile=False)
+        content = convert(keras_model, quantization)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        print(f"Converted {model_path} to {path} ({len(content) / 1024 / 1024:.1f} MB)")
+    with open(path, 'rb') as f:
+        return TFLiteModel(f.read(), num_threads=num_threads)
+
+
+def sample_inputs(paths, input_size, per_video=16):
+    """Model inputs from images and evenly spaced video frames, preprocessed like the analyzers"""
+    preprocessor = FramePreprocessor(model_input_size=input_size)
+    inputs = []
+
+    def add(frame):
+        preprocessor.load(frame)
+        inputs.append(preprocessor.model_input(np.empty((input_size[1], input_size[0], 3), dtype=np.float32)))
+
+    for path in paths:
+        image = cv2.imread(path)
+        if image is not None:
+            add(image)
+            continue
+        cap = cv2.VideoCapture(path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        for index in np.linspace(0, max(0, total - 1), per_video).astype(int):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+            ret, frame = cap.read()
+            if ret:
+                add(frame)
+        cap.release()
+    return np.stack(inputs) if inputs else np.empty((0, input_size[1], input_size[0], 3), dtype=np.float32)
+
+
+def agreement_report(keras_model, tflite_model, inputs, batch_size=16):
+    """How closely the TFLite model reproduces the Keras model on ``inputs``"""
+    if not len(inputs):
+        return {'samples': 0}
+    expected = keras_model.predict(inputs, batch_size=batch_size, verbose=0)
+    actual = np.concatenate([tflite_model.predict(inputs[i:i + batch_size])
+                             for i in range(0, len(inputs), batch_size)])
+    diff = np.abs(expected - actual)
+    return {
+        'samples': len(inputs),
+        'top1_agreement': round(float(np.mean(expected.argmax(axis=1) == actual.argmax(axis=1))) * 100, 2),
+        'max_abs_diff': round(float(diff.max()), 6),
+        'mean_abs_diff': round(float(diff.mean()), 6)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert a driver model to TFLite and compare it with Keras')
+    parser.add_argument('model', help='Keras .h5 model')
+    parser.add_argument('--quantization', choices=QUANTIZATIONS, default='float16')
+    parser.add_argument('--samples', nargs='*', default=[], help='images or videos to compare predictions on')
+    parser.add_argument('--per-video', type=int, default=16, help='frames taken from each sample video')
+    args = parser.parse_args(argv)
+
+    from tensorflow import keras
+    keras_model = keras.models.load_model(args.model, compile=False)
+    tflite_model = load_tflite_model(args.model, args.quantization, keras_model=keras_model)
+
+    input_size = (keras_model.input_shape[2], keras_model.input_shape[1])
+    inputs = sample_inputs(args.samples, input_size, args.per_video)
+    if not len(inputs):
+        # No sample set given: random inputs still show numerical drift
+        inputs = np.random.default_rng(0).random((32, input_size[1], input_size[0], 3), dtype=np.float32)
+
+    report = agreement_report(keras_model, tflite_model, inputs)
+    path = tflite_path(args.model, args.quantization)
+    report.update(model=args.model, quantization=args.quantization, tflite_path=path,
+                  tflite_bytes=os.path.getsize(path), h5_bytes=os.path.getsize(args.model))
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
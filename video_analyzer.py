@@ -1,12 +1,29 @@
-import cv2
-import mediapipe as mp
-import numpy as np
-import os
 import numpy as np
 import os
+import time
+from collections import deque
+from frame_source import LiveFrameReader, open_frame_reader
+from parallel_analysis import analyze_video_segments
+from metrics import REGISTRY, StageTimings
+from motion_gate import MotionGate
+from adaptive_sampling import AdaptiveSampler
+from frame_preprocessor import FramePreprocessor
+from driver_roi import DriverROI
+from early_exit import EarlyExit
+from landmark_store import (LandmarkRecorder, landmark_arrays, write_store, NOSE_TIP, LEFT_EYE, RIGHT_EYE,
+                            MOUTH_LEFT, MOUTH_RIGHT, LEFT_EAR, RIGHT_EAR, INDEX_TIP, MIDDLE_BASE)
 
 class VideoAnalyzer:
-    def __init__(self):
+    # Bump when detection logic changes so cached results are not reused
+    VERSION = 1
+    # Frame areas the heuristics look at, always kept inside the driver ROI
+    ROI_WATCH_REGIONS = [(0.45, 0.55, 0.75, 0.85)]  # radio region
+    
+    def __init__(self, segments=1, segment_processes=None, motion_threshold=None, adaptive_sampling=False,
+                 max_processing_width=None, ffmpeg_decode=False, decode_ahead=0, driver_roi=False,
+                 landmark_store=None, early_exit=False, early_exit_confidence=None):
+        # Imported here: loading MediaPipe takes seconds, so it waits for the first analyzer
+        import mediapipe as mp
         self.mp_face_mesh = mp.solutions.face_mesh
         self.mp_hands = mp.solutions.hands
         self.face_mesh = self.mp_face_mesh.FaceMesh(
@@ -20,79 +37,408 @@ class VideoAnalyzer:
             max_num_hands=2,
             min_detection_confidence=0.5
         )
+        # Reusable RGB buffer shared by hands and face mesh, optionally downscaled
+        self._preprocessor = FramePreprocessor(max_width=max_processing_width)
+        
+        # Split long videos into this many time ranges analyzed in parallel processes
+        self.segments = max(1, segments)
+        self.segment_processes = segment_processes
+        # Mean gray-level difference below which a sampled frame reuses the
+        # previous frame's detections instead of running MediaPipe (None = off)
+        self.motion_threshold = motion_threshold
+        # Sample coarsely and densify around detection changes instead of a fixed frame_skip
+        self.adaptive_sampling = adaptive_sampling
+        # Decode with an ffmpeg process that emits only sampled, downscaled frames
+        # (falls back to OpenCV when ffmpeg isn't installed)
+        self.ffmpeg_decode = ffmpeg_decode
+        # Frames decoded ahead on a background thread (0 = decode inline). Adaptive
+        # sampling picks each step from the last results, so it always decodes inline
+        self.decode_ahead = decode_ahead
+        # Calibrate a driver region from the first seconds' landmarks and run
+        # MediaPipe on that crop only
+        self._roi = None
+        self.driver_roi = driver_roi
+        # Directory the per-frame landmarks of each video are written to, so
+        # thresholds can be re-tuned with landmark_store.rescore_store (None = off)
+        self.landmark_store = landmark_store
+        # Stop reading once the rest of the video can't change the behaviors/risk
+        # level; with a confidence (e.g. 0.95), once that is very unlikely. Not
+        # used for segmented analysis, where no segment sees the whole count
+        self.early_exit = early_exit
+        self.early_exit_confidence = early_exit_confidence
+    
+    def reset(self):
+        """Restart the MediaPipe graphs so tracking state doesn't carry over to the next video"""
+        self.hands.reset()
+        self.face_mesh.reset()
+        if self._roi is not None:
+            self._roi.reset()
+    
+    @property
+    def driver_roi(self):
+        """Whether MediaPipe runs on a calibrated crop around the driver"""
+        return self._roi is not None
     
-    def analyze_video(self, video_path):
-        cap = cv2.VideoCapture(video_path)
+    @driver_roi.setter
+    def driver_roi(self, enabled):
+        if enabled and self._roi is None:
+            self._roi = DriverROI(self.ROI_WATCH_REGIONS)
+        elif not enabled:
+            self._roi = None
+    
+    @property
+    def max_processing_width(self):
+        """Frames wider than this are downscaled before MediaPipe (None = native resolution)"""
+        return self._preprocessor.max_width
+    
+    @max_processing_width.setter
+    def max_processing_width(self, value):
+        self._preprocessor.max_width = value
+    
+    def analyze_video(self, video_path, progress_callback=None):
+        timings = StageTimings()
+        reader = open_frame_reader(video_path, ffmpeg=self.ffmpeg_decode, max_width=self.max_processing_width,
+                                   timings=timings, decode_ahead=self._decode_ahead_depth())
         
         # Get video properties
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
-        total_video_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        # Analysis counters
-        total_frames = 0
-        phone_frames = 0
-        radio_frames = 0
-        distracted_frames = 0
-        face_detected_frames = 0
-        hand_detected_frames = 0
-        
-        behaviors = []
-        warnings = []
+        fps = int(reader.fps)
+        total_video_frames = reader.frame_count
         
         # Analyze every 5th frame for better accuracy
         frame_skip = max(5, fps // 6)  # Analyze ~6 frames per second
-        analyzed_frames = 0  # explicit counter for processed frames
+        recorder = LandmarkRecorder() if self.landmark_store else None
+        
+        if self.segments > 1 and total_video_frames > 0:
+            # Long videos: analyze time ranges on a process pool and merge the counters
+            reader.release()
+            counters = analyze_video_segments(
+                video_path, total_video_frames, frame_skip, self.segments,
+                processes=self.segment_processes, progress_callback=progress_callback,
+                timings=timings, options=self._segment_options(), recorder=recorder
+            )
+            early_exit = None
+        else:
+            # Skipped frames are grabbed but never converted to BGR images
+            reader.step = frame_skip
+            early_exit = EarlyExit(self.early_exit_confidence) if self.early_exit else None
+            try:
+                counters = self._analyze_frames(reader, total_video_frames, progress_callback, timings, recorder,
+                                                early_exit)
+            finally:
+                # Stop a decode-ahead thread or ffmpeg process even when analysis fails
+                reader.release()
+        
+        result = self._build_result(counters, total_video_frames)
+        if early_exit is not None:
+            result['stats']['early_exit'] = {'stopped_at_frame': early_exit.stopped_at, 'mode': early_exit.mode}
+        if self._roi is not None and self._roi.box is not None:
+            result['stats']['driver_roi'] = [round(v, 3) for v in self._roi.box]
+        if recorder is not None:
+            with timings.time('landmark_store'):
+                meta = {'analyzer': 'VideoAnalyzer', 'version': self.VERSION, 'config': self._store_config(),
+                        'total_frames': total_video_frames, 'sampling': result['stats'].get('sampling')}
+                result['stats']['landmark_store'] = write_store(self.landmark_store, video_path, recorder, meta)
+        result['stats']['timings'] = timings.summary()
+        REGISTRY.record(timings)
+        return result
+    
+    def _segment_options(self):
+        """Settings segment worker analyzers must share with this one"""
+        return {
+            'motion_threshold': self.motion_threshold,
+            'adaptive_sampling': self.adaptive_sampling,
+            'max_processing_width': self.max_processing_width,
+            'ffmpeg_decode': self.ffmpeg_decode,
+            'decode_ahead': self.decode_ahead,
+            'driver_roi': self.driver_roi,
+            'landmark_store': self.landmark_store
+        }
+    
+    def _store_config(self):
+        """Settings that change which frames a landmark store holds and what was detected on them"""
+        config = self._segment_options()
+        # Decoding ahead gives identical frames; the store directory is the store itself
+        del config['landmark_store'], config['decode_ahead']
+        config.update(segments=self.segments, early_exit=self.early_exit,
+                      early_exit_confidence=self.early_exit_confidence)
+        return config
+    
+    def analyze_stream(self, source, window_seconds=5.0, emit_every=1.0, follow=False, realtime=None):
+        """Analyze a live source and yield a verdict for the last ``window_seconds`` every ``emit_every`` seconds.
+        
+        ``source`` is a camera index, a growing file (with ``follow``) or a
+        named pipe. Only the newest frame is analyzed; frames that arrive
+        while the previous one is still being analyzed are dropped, so a
+        verdict is never based on a backlog. Each verdict is the usual
+        result dict plus a ``window`` entry with the per-window frame
+        latency (capture to detection) and dropped-frame count.
+        """
+        reader = LiveFrameReader(source, follow=follow, realtime=realtime)
+        timings = StageTimings()
+        window = deque()  # (captured_at, detections, latency_s, frames_dropped_before)
+        dropped_seen = 0
+        next_emit = None
+        emitted = True
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
+        # Also runs when the caller closes the generator or analysis raises
+        try:
+            with reader:
+                for frame_number, frame, captured_at in reader:
+                    self._preprocessor.load(frame)
+                    detections = self._detect_frame(frame, timings)
+                    now = time.monotonic()
+                    
+                    dropped = reader.frames_dropped - dropped_seen
+                    dropped_seen += dropped
+                    window.append((captured_at, detections, now - captured_at, dropped))
+                    while window and window[0][0] < now - window_seconds:
+                        window.popleft()
+                    emitted = False
+                    
+                    if next_emit is None:
+                        next_emit = now + emit_every
+                    elif now >= next_emit:
+                        yield self._window_verdict(window, reader, frame_number, timings)
+                        emitted = True
+                        next_emit = now + emit_every
                 
-            total_frames += 1
+                # The source ended: report what came in since the last verdict
+                if window and not emitted:
+                    yield self._window_verdict(window, reader, reader.frames_read, timings)
+        finally:
+            self.reset()
+            REGISTRY.record(timings, kind='stream')
+    
+    def _window_verdict(self, window, reader, frame_number, timings):
+        counters = {
+            'phone_frames': 0,
+            'radio_frames': 0,
+            'distracted_frames': 0,
+            'face_detected_frames': 0,
+            'hand_detected_frames': 0,
+            'analyzed_frames': len(window)
+        }
+        for _, detections, _, _ in window:
+            for name, hit in detections.items():
+                counters[name] += hit
+        
+        latencies = [latency for _, _, latency, _ in window]
+        result = self._build_result(counters, reader.frames_read)
+        result['window'] = {
+            'frame_number': frame_number,
+            'seconds': round(window[-1][0] - window[0][0], 3),
+            'frames_analyzed': len(window),
+            'frames_dropped': sum(dropped for _, _, _, dropped in window),
+            'latency_ms': {
+                'mean': round(sum(latencies) / len(latencies) * 1000, 1),
+                'max': round(max(latencies) * 1000, 1)
+            },
+            'frames_dropped_total': reader.frames_dropped
+        }
+        timings.count('stream_verdicts')
+        return result
+    
+    def _decode_ahead_depth(self):
+        return 0 if self.adaptive_sampling else self.decode_ahead
+    
+    def analyze_segment(self, video_path, start_frame, end_frame, frame_skip):
+        """Analyze frames start_frame+1..end_frame on the same sampling grid as the whole video.
+        
+        Returns the segment's counters, a snapshot of its stage timings and
+        its LandmarkRecorder (None unless ``landmark_store`` is set).
+        """
+        timings = StageTimings()
+        recorder = LandmarkRecorder() if self.landmark_store else None
+        reader = open_frame_reader(video_path, frame_skip, ffmpeg=self.ffmpeg_decode, max_width=self.max_processing_width,
+                                   start_frame=start_frame, end_frame=end_frame, timings=timings,
+                                   decode_ahead=self._decode_ahead_depth())
+        try:
+            counters = self._analyze_frames(reader, end_frame - start_frame, timings=timings, recorder=recorder)
+        finally:
+            reader.release()
+        return counters, timings.snapshot(), recorder
+    
+    def _analyze_frames(self, reader, total_video_frames, progress_callback=None, timings=None, recorder=None,
+                        early_exit=None):
+        timings = timings if timings is not None else StageTimings()
+        # Landmarks are collected per frame and scored in one batch at the end
+        recorder = recorder if recorder is not None else LandmarkRecorder()
+        running = None  # counters of the frames scored so far, for early exit
+        
+        gate = MotionGate(self.motion_threshold) if self.motion_threshold else None
+        landmarks = None
+        if self._roi is not None:
+            self._roi.reset()
+        
+        sampler = AdaptiveSampler(reader.fps) if self.adaptive_sampling else None
+        if sampler is not None:
+            reader.step = sampler.step
+            reader.min_step = sampler.dense_step
+        previous_frame = reader.start_frame
+        
+        for frame_number, frame in reader:
+            self._preprocessor.load(frame)
             
-            # Skip frames for performance
-            if total_frames % frame_skip != 0:
-                continue
-                
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            # A frame that barely changed reuses the last MediaPipe outcomes
+            static = False
+            if gate is not None:
+                with timings.time('motion_gate'):
+                    static = gate.is_static(frame) and landmarks is not None
             
-            # Detect hands (phone/radio usage)
-            hand_results = self.hands.process(rgb_frame)
-            face_results = self.face_mesh.process(rgb_frame)
+            if static:
+                timings.count('frames_gated')
+            else:
+                landmarks = self._detect_landmarks(frame, timings)
+                recorder.frame_shape = frame.shape[:2]
             
-            # Track detection success
-            if face_results.multi_face_landmarks:
-                face_detected_frames += 1
-            if hand_results.multi_hand_landmarks:
-                hand_detected_frames += 1
+            # Fixed sampling weighs every frame equally; adaptive samples stand
+            # for all video frames since the previous sample
+            weight = 1
+            if sampler is not None:
+                weight = frame_number - previous_frame
+                previous_frame = frame_number
+                with timings.time('sampling_update'):
+                    detections = self._score_frames(landmarks[0][None], landmarks[1][None], frame.shape)
+                    reader.step = sampler.update(frame_number, (
+                        int(detections['phone_frames'][0]), int(detections['radio_frames'][0]),
+                        int(detections['distracted_frames'][0])
+                    ))
             
-            # Count this as an analyzed frame
-            analyzed_frames += 1
-
-            # Check for phone usage (hand near face/ear)
-            if self._detect_phone_usage(hand_results, face_results, frame.shape):
-                phone_frames += 1
-                
-            # Check for radio usage (hand movements in center/dashboard area)
-            if self._detect_radio_usage(hand_results, frame.shape):
-                radio_frames += 1
-                
-            # Check for general distraction (face not forward)
-            if self._detect_distraction(face_results):
-                distracted_frames += 1
+            recorder.add_frame(frame_number, landmarks[0], landmarks[1], weight, static)
+            timings.count('frames_analyzed')
+            
+            if progress_callback is not None:
+                progress_callback(reader.frames_read, total_video_frames)
+            
+            # Without a frame count there is no telling how much video is left
+            if early_exit is not None and total_video_frames > 0 and early_exit.due(len(recorder)):
+                with timings.time('early_exit'):
+                    running = self._update_counters(running, recorder, timings)
+                    # Sample weight still to come: samples on the fixed grid, video frames when adaptive
+                    remaining = max(0, total_video_frames - frame_number)
+                    if sampler is None:
+                        remaining //= reader.step
+                    verdict_counts = {name: running[name] for name in (
+                        'phone_frames', 'radio_frames', 'distracted_frames', 'face_detected_frames'
+                    )}
+                    if remaining and early_exit.settled(self._verdict, verdict_counts, running['covered_frames'],
+                                                        remaining, running['analyzed_frames']):
+                        early_exit.stopped_at = frame_number
+                        timings.count('early_exits')
+                        break
         
-        cap.release()
+        return self._count_detections(recorder.columns(), recorder.frame_shape, timings)
+    
+    def _detect_frame(self, frame, timings):
+        """Run MediaPipe and the heuristics on the loaded BGR frame, returning 0/1 per counter"""
+        face, hands = self._detect_landmarks(frame, timings)
+        detections = self._score_frames(face[None], hands[None], frame.shape, timings)
+        return {name: int(hits[0]) for name, hits in detections.items()}
+    
+    def _detect_landmarks(self, frame, timings):
+        """Run MediaPipe on the loaded BGR frame and return its ``landmark_arrays``"""
+        roi_box = self._use_roi_crop(frame.shape)
+        with timings.time('color_convert'):
+            rgb_frame = self._preprocessor.rgb()
+        
+        # Detect hands (phone/radio usage)
+        with timings.time('hands'):
+            hand_results = self.hands.process(rgb_frame)
+        with timings.time('face_mesh'):
+            face_results = self.face_mesh.process(rgb_frame)
+        if self._roi is not None:
+            # Landmarks come back in full-frame coordinates for the heuristics
+            with timings.time('driver_roi'):
+                self._roi.observe(hand_results, face_results, roi_box, frame.shape)
+        with timings.time('landmark_arrays'):
+            return landmark_arrays(hand_results, face_results)
+    
+    def _score_frames(self, face, hands, frame_shape, timings=None):
+        """Boolean arrays per counter for a batch of frames' landmark arrays (see landmark_store)"""
+        timings = timings if timings is not None else StageTimings()
+        # Track detection success
+        detections = {
+            'face_detected_frames': ~np.isnan(face[:, NOSE_TIP, 0]),
+            'hand_detected_frames': ~np.isnan(hands[:, :, MIDDLE_BASE, 0]).all(axis=1)
+        }
+        
+        # Check for phone usage (hand near face/ear)
+        with timings.time('detect_phone'):
+            detections['phone_frames'] = self._detect_phone_usage(face, hands, frame_shape)
+        
+        # Check for radio usage (hand movements in center/dashboard area)
+        with timings.time('detect_radio'):
+            detections['radio_frames'] = self._detect_radio_usage(hands, frame_shape)
+        
+        # Check for general distraction (face not forward)
+        with timings.time('detect_distraction'):
+            detections['distracted_frames'] = self._detect_distraction(face)
+        
+        return detections
+    
+    def _update_counters(self, counters, recorder, timings):
+        """Add the frames recorded since ``counters`` was last updated"""
+        new = self._count_detections(recorder.columns(counters['analyzed_frames'] if counters else 0),
+                                     recorder.frame_shape, timings)
+        if counters is None:
+            return new
+        return {name: counters[name] + value for name, value in new.items()}
+    
+    def _verdict(self, counts, total):
+        """Behaviors and risk level for final counts over ``total`` (weighted) frames"""
+        counters = dict(counts, hand_detected_frames=0, analyzed_frames=total, covered_frames=total)
+        result = self._build_result(counters, total)
+        return result['behaviors'], result['risk_level']
+    
+    def _count_detections(self, columns, frame_shape, timings=None):
+        """Counters (weighted by the video frames each sample covers) from recorded landmark columns"""
+        weights = np.asarray(columns['weight'], dtype=np.int64)
+        detections = self._score_frames(
+            np.asarray(columns['face']), np.asarray(columns['hands']), frame_shape or (0, 0), timings
+        )
+        counters = {name: int(weights[hits].sum()) for name, hits in detections.items()}
+        counters.update({
+            'analyzed_frames': len(weights),  # explicit counter for processed frames
+            'gated_frames': int(np.count_nonzero(columns['gated'])),  # frames that reused the previous frame's detections
+            'covered_frames': int(weights.sum())  # video frames represented by the analyzed frames
+        })
+        return counters
+    
+    @classmethod
+    def rescore(cls, meta, columns):
+        """Rebuild a result from a landmark store's columns with the current heuristics, without MediaPipe"""
+        # Scoring only needs the heuristics, not MediaPipe graphs
+        analyzer = cls.__new__(cls)
+        analyzer.adaptive_sampling = meta['sampling'] == 'adaptive'
+        counters = analyzer._count_detections(columns, (meta['frame_height'], meta['frame_width']))
+        return analyzer._build_result(counters, meta['total_frames'])
+    
+    def _use_roi_crop(self, frame_shape):
+        """Point the preprocessor at the driver ROI for this frame and return the crop box"""
+        box = self._roi.crop_box(frame_shape) if self._roi is not None else None
+        if box != self._preprocessor.crop:
+            # Tracking state is relative to the previous image; start over on the new one
+            self.hands.reset()
+            self.face_mesh.reset()
+            self._preprocessor.crop = box
+        return box
+    
+    def _build_result(self, counters, total_video_frames):
+        analyzed_frames = counters['analyzed_frames']
+        behaviors = []
+        warnings = []
         
         # Calculate percentages
         if analyzed_frames == 0:
             return self._default_analysis()
 
-        # Calculate detection rates
-        phone_percentage = (phone_frames / analyzed_frames) * 100
-        radio_percentage = (radio_frames / analyzed_frames) * 100
-        distraction_percentage = (distracted_frames / analyzed_frames) * 100
-        face_detection_rate = (face_detected_frames / analyzed_frames) * 100
-        hand_detection_rate = (hand_detected_frames / analyzed_frames) * 100
+        # Calculate detection rates (weighted by the video frames each sample covers)
+        covered_frames = counters.get('covered_frames') or analyzed_frames
+        phone_percentage = (counters['phone_frames'] / covered_frames) * 100
+        radio_percentage = (counters['radio_frames'] / covered_frames) * 100
+        distraction_percentage = (counters['distracted_frames'] / covered_frames) * 100
+        face_detection_rate = (counters['face_detected_frames'] / covered_frames) * 100
+        hand_detection_rate = (counters['hand_detected_frames'] / covered_frames) * 100
         
         # Determine behaviors based on thresholds (adjusted for better detection)
         if phone_percentage > 5:  # Lowered threshold for mobile detection
@@ -164,89 +510,65 @@ class VideoAnalyzer:
                 'face_detection': round(face_detection_rate, 1),
                 'hand_detection': round(hand_detection_rate, 1),
                 'frames_analyzed': analyzed_frames,
+                'frames_gated': counters.get('gated_frames', 0),
+                'sampling': 'adaptive' if self.adaptive_sampling else 'fixed',
                 'total_frames': total_video_frames
             }
         }
     
-    def _detect_phone_usage(self, hand_results, face_results, frame_shape):
-        if not hand_results.multi_hand_landmarks or not face_results.multi_face_landmarks:
-            return False
-
+    def _detect_phone_usage(self, face, hands, frame_shape):
         h, w = frame_shape[:2]
-        face_landmarks = face_results.multi_face_landmarks[0]
-
-        # Get ear and mouth landmarks for more specific phone detection
-        left_ear = face_landmarks.landmark[234]   # Left ear
-        right_ear = face_landmarks.landmark[454]  # Right ear
-        mouth_left = face_landmarks.landmark[61]  # Left mouth corner
-        mouth_right = face_landmarks.landmark[291] # Right mouth corner
-
-        ear_mouth_points = [
-            (left_ear.x * w, left_ear.y * h),
-            (right_ear.x * w, right_ear.y * h),
-            (mouth_left.x * w, mouth_left.y * h),
-            (mouth_right.x * w, mouth_right.y * h)
-        ]
-
-        for hand_landmarks in hand_results.multi_hand_landmarks:
-            # Get hand position (use index finger tip for more precision)
-            hand_x = hand_landmarks.landmark[8].x * w  # Index finger tip
-            hand_y = hand_landmarks.landmark[8].y * h
-
-            # Check if hand is near ear or mouth (phone usage pattern)
-            for point_x, point_y in ear_mouth_points:
-                distance = np.sqrt((hand_x - point_x)**2 + (hand_y - point_y)**2)
-                if distance < w * 0.08:  # Within 8% of frame width of ear/mouth
-                    return True
-        return False
+        scale = np.array([w, h], dtype=np.float64)
+        
+        # Ear and mouth landmarks for more specific phone detection, (frames, 4, xy) in pixels
+        ear_mouth_points = face[:, [LEFT_EAR, RIGHT_EAR, MOUTH_LEFT, MOUTH_RIGHT]].astype(np.float64) * scale
+        # Index finger tips for more precision, (frames, hands, xy)
+        fingertips = hands[:, :, INDEX_TIP].astype(np.float64) * scale
+        
+        # Distance of every fingertip to every ear/mouth point, (frames, hands, 4)
+        distance = np.sqrt(((fingertips[:, :, None] - ear_mouth_points[:, None]) ** 2).sum(axis=-1))
+        # Hand near ear or mouth (phone usage pattern): within 8% of frame width.
+        # Missing hands/faces are NaN and never compare as near
+        return (distance < w * 0.08).any(axis=(1, 2))
     
-    def _detect_radio_usage(self, hand_results, frame_shape):
-        if not hand_results.multi_hand_landmarks:
-            return False
-
+    def _detect_radio_usage(self, hands, frame_shape):
         h, w = frame_shape[:2]
         # Focus on right/center dashboard area, exclude left side (mirror area)
         # Narrower region: center-lower dashboard to reduce false positives
         radio_region = (w * 0.45, w * 0.75, h * 0.55, h * 0.85)  # Right-center dashboard
-
-        for hand_landmarks in hand_results.multi_hand_landmarks:
-            # Use index-middle base (landmark 9) for a reliable central hand point
-            hand_x = hand_landmarks.landmark[9].x * w
-            hand_y = hand_landmarks.landmark[9].y * h
-
-            # Check if hand is in right/center dashboard region (radio controls)
-            if (radio_region[0] < hand_x < radio_region[1] and
-                radio_region[2] < hand_y < radio_region[3]):
-                return True
-        return False
+        
+        # Use index-middle base (landmark 9) for a reliable central hand point
+        hand_x = hands[:, :, MIDDLE_BASE, 0].astype(np.float64) * w
+        hand_y = hands[:, :, MIDDLE_BASE, 1].astype(np.float64) * h
+        
+        # Any hand in right/center dashboard region (radio controls)
+        in_region = ((radio_region[0] < hand_x) & (hand_x < radio_region[1]) &
+                     (radio_region[2] < hand_y) & (hand_y < radio_region[3]))
+        return in_region.any(axis=1)
     
-    def _detect_distraction(self, face_results):
-        # If no face landmarks available, do NOT count as distracted here.
-        # Missing face is handled separately via face_detection_rate.
-        if not face_results.multi_face_landmarks:
-            return False
-        face_landmarks = face_results.multi_face_landmarks[0]
-
+    def _detect_distraction(self, face):
         # Check head pose using nose and eye landmarks
-        nose_tip = face_landmarks.landmark[1]
-        left_eye = face_landmarks.landmark[33]
-        right_eye = face_landmarks.landmark[263]
-
+        nose_x = face[:, NOSE_TIP, 0].astype(np.float64)
+        left_eye_x = face[:, LEFT_EYE, 0].astype(np.float64)
+        right_eye_x = face[:, RIGHT_EYE, 0].astype(np.float64)
+        
         # Calculate if face is looking forward (normalized by inter-ocular distance)
-        eye_center_x = (left_eye.x + right_eye.x) / 2
-        deviation = abs(nose_tip.x - eye_center_x)
-
+        eye_center_x = (left_eye_x + right_eye_x) / 2
+        deviation = np.abs(nose_x - eye_center_x)
+        
         # Normalize deviation by interocular distance to account for camera placement
-        interocular = abs(left_eye.x - right_eye.x)
-        if interocular <= 0.001:
-            # Fallback to raw threshold if landmarks are unreliable
-            return deviation > 0.08
-
-        deviation_norm = deviation / interocular
-
+        interocular = np.abs(left_eye_x - right_eye_x)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            deviation_norm = deviation / interocular
+        
         # Use a normalized threshold (tunable). This reduces false positives
         # caused by camera angle or mirror reflections. Raised slightly.
-        return deviation_norm > 0.28
+        # Fall back to the raw threshold where the eye landmarks are unreliable
+        distracted = np.where(interocular <= 0.001, deviation > 0.08, deviation_norm > 0.28)
+        
+        # No face is NOT counted as distracted here; missing faces are
+        # handled separately via face_detection_rate
+        return distracted & ~np.isnan(nose_x)
     
     def _default_analysis(self):
         return {